@@ -0,0 +1,99 @@
+"""
+audit_v10.json -> audit_metadata.db (SQLRetriever용 SQLite) 생성 스크립트
+실행: python build_metadata_db.py
+      python build_metadata_db.py --upgrade   # 기존 DB에 B-tree / FTS5 인덱스 (+ 통계 큐브) 추가
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+
+from common.metadata_db import (
+    CUBE_DIMENSIONS,
+    audit_columns,
+    create_schema,
+    create_search_index,
+    create_stats_cube,
+    insert_rows,
+    row_from_item,
+)
+
+# ── 설정 ──────────────────────────────────────────────
+DATA_PATH = os.path.join(project_root, "audit_v10.json")
+DB_PATH = os.path.join(project_root, "common", "audit_metadata.db")
+# ─────────────────────────────────────────────────────
+
+
+def build(data_path: str, db_path: str) -> None:
+    print(f"\n1️⃣  데이터 로드: {data_path}")
+    with open(data_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    print(f"   총 {len(data)}개 항목 로드 완료")
+
+    # 서버가 읽는 중인 DB를 건드리지 않도록 임시 파일에 만든 뒤 교체합니다.
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    start = time.time()
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    print("\n2️⃣  audits 테이블 생성")
+    create_schema(conn)
+    count = insert_rows(conn, (row_from_item(item) for item in data))
+    conn.commit()
+    print(f"   {count}행 저장")
+
+    print("\n3️⃣  B-tree (date, company, site) / FTS5 trigram 인덱스 생성")
+    create_search_index(conn)
+    conn.commit()
+
+    print(f"\n4️⃣  통계 큐브 생성 ({', '.join(CUBE_DIMENSIONS)})")
+    print(f"   {create_stats_cube(conn)}행")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    print(f"\n✅ 완료: {db_path} ({os.path.getsize(db_path) / 1e6:.1f}MB, {time.time() - start:.1f}s)")
+
+
+def upgrade(db_path: str) -> None:
+    print(f"\n🔧 인덱스 추가: {db_path}")
+    start = time.time()
+    conn = sqlite3.connect(db_path)
+    create_search_index(conn)
+    # 통계 큐브는 risk_category / disposition_level 등 새 컬럼이 있는 DB에서만 만들 수 있습니다.
+    missing = {"risk_category", "disposition_level", "penalty_amount"} - set(audit_columns(conn))
+    if missing:
+        print(f"⚠️  통계 큐브 생략: audits에 {sorted(missing)} 컬럼이 없습니다 (--upgrade 없이 다시 빌드하세요).")
+    else:
+        print(f"   통계 큐브 {create_stats_cube(conn)}행")
+    conn.commit()
+    conn.close()
+    print(f"✅ 완료 ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="audit_metadata.db builder")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--upgrade", action="store_true", help="기존 DB에 인덱스만 추가")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("🗄️  audit_metadata.db 빌드")
+    print("=" * 50)
+    if args.upgrade:
+        upgrade(args.db)
+    else:
+        build(args.data, args.db)
+    print("\n🎉 SQLRetriever가 DB 변경을 감지해 FTS5 인덱스 / 통계 큐브를 바로 사용합니다.")
@@ -0,0 +1,219 @@
+"""
+감사 사례 본문(parent_text) 생성과 청킹.
+
+- build_parent_text: audit_v10.json 항목 -> "[Title]: ...\n[Outline]: ..." 형식의 본문
+- fixed_chunks: 글자 수로 자르는 기존 방식 (CHUNK_STRATEGY=fixed)
+- SectionChunker: [Title]/[Outline]/[Problems]/... 섹션과 Kiwi 문장 경계를 지키며 토큰 수 기준으로 묶습니다.
+  섹션은 청크 하나에 들어가면 나누지 않고, 넘치면 문장 단위로 나누며 직전 청크의 마지막 문장들을 겹쳐(overlap) 넣습니다.
+  모든 청크 앞에는 [Title] 줄을, 섹션 중간에서 시작하는 청크에는 섹션 마커를 다시 붙여 청크만으로도 맥락을 알 수 있게 합니다.
+"""
+
+import math
+import re
+import threading
+from typing import List, Optional
+
+from common.config import Config
+
+# parent_text 섹션 마커 (build_parent_text 형식)
+SECTION_PATTERN = re.compile(r"^\[(Title|Outline|Problems|Opinion|Criteria|Action)\]:", re.M)
+HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    HCX 토크나이저 근사치 (Local Approximation).
+    한글 음절은 약 0.7토큰, 그 외 공백이 아닌 문자는 약 3.5자당 1토큰으로 계산합니다.
+    API 호출 없이 예산 판단에 충분한 정밀도를 목표로 합니다.
+    """
+    if not text:
+        return 0
+    hangul = len(HANGUL_PATTERN.findall(text))
+    others = len(re.sub(r"\s", "", text)) - hangul
+    return int(math.ceil(hangul * 0.7 + others / 3.5))
+
+
+def build_parent_text(item: dict) -> str:
+    """
+    v10 구조에 맞게 parent_text 생성
+    - contents_summary 안에 outline, problems, opinion, criteria, action이 있음
+    - contents, problem, action은 최상위 필드
+    """
+    summary = item.get("contents_summary") or {}
+
+    # contents_summary가 dict인 경우 (감사원 데이터)
+    if isinstance(summary, dict):
+        outline   = summary.get("outline", "")
+        problems  = summary.get("problems", "")
+        opinion   = summary.get("opinion", "")
+        criteria  = summary.get("criteria", "")
+        action    = summary.get("action", "")
+    else:
+        outline = problems = opinion = criteria = action = ""
+
+    # 최상위 필드 fallback
+    if not problems:
+        problems = item.get("problem", "")
+    if not action:
+        action = item.get("action", "")
+    if not outline:
+        outline = item.get("contents", "")
+
+    parts = [
+        f"[Title]: {item.get('title', '')}",
+        f"[Outline]: {outline}",
+        f"[Problems]: {problems}",
+        f"[Opinion]: {opinion}",
+        f"[Criteria]: {criteria}",
+        f"[Action]: {action}",
+    ]
+    return "\n".join([p for p in parts if p.split(": ", 1)[1].strip()])
+
+
+def fixed_chunks(text: str, chunk_size: int = 500) -> List[str]:
+    if len(text) <= chunk_size:
+        return [text]
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+def split_sections(text: str) -> List[str]:
+    """[Title]/[Outline]/... 마커 기준으로 섹션을 나눕니다. 마커가 없으면 문단 단위로 나눕니다."""
+    starts = [m.start() for m in SECTION_PATTERN.finditer(text)]
+    if not starts:
+        return [p for p in text.split("\n\n") if p.strip()] or [text]
+    if starts[0] != 0:
+        starts = [0] + starts
+    bounds = starts + [len(text)]
+    return [text[bounds[i] : bounds[i + 1]].strip() for i in range(len(starts))]
+
+
+class SectionChunker:
+    def __init__(self, max_tokens: int = 300, overlap_tokens: int = 50, kiwi=None):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        self._kiwi = kiwi
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return f"section:{self.max_tokens}:{self.overlap_tokens}"
+
+    def _sentences(self, text: str) -> List[str]:
+        # Kiwi 인스턴스 하나를 여러 스레드가 동시에 쓰지 않도록 잠급니다.
+        with self._lock:
+            if self._kiwi is None:
+                from kiwipiepy import Kiwi
+
+                self._kiwi = Kiwi()
+            return [s.text.strip() for s in self._kiwi.split_into_sents(text) if s.text.strip()]
+
+    def _pieces(self, text: str, budget: int) -> List[str]:
+        """문장 목록. 예산보다 긴 문장은 글자 단위로 다시 자릅니다."""
+        pieces = []
+        for sentence in self._sentences(text):
+            while count_tokens(sentence) > budget:
+                lo, hi = 1, len(sentence)
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if count_tokens(sentence[:mid]) <= budget:
+                        lo = mid
+                    else:
+                        hi = mid - 1
+                pieces.append(sentence[:lo])
+                sentence = sentence[lo:].lstrip()
+            if sentence:
+                pieces.append(sentence)
+        return pieces
+
+    def _split_section(self, marker: str, body: str, budget: int) -> List[str]:
+        """한 섹션을 문장 단위로 budget 이내 청크로 나눕니다 (청크마다 섹션 마커 포함, 문장 overlap)."""
+        prefix = f"{marker} " if marker else ""
+        marker_tokens = count_tokens(marker)
+        pieces = self._pieces(body, max(1, budget - marker_tokens))
+        chunks, current, used = [], [], marker_tokens
+        for piece in pieces:
+            tokens = count_tokens(piece)
+            if current and used + tokens > budget:
+                chunks.append(prefix + " ".join(current))
+                # 직전 청크 끝의 문장들을 overlap 예산만큼 다음 청크 앞에 둡니다.
+                carry, carried = [], 0
+                for prev in reversed(current):
+                    prev_tokens = count_tokens(prev)
+                    if carried + prev_tokens > self.overlap_tokens or marker_tokens + carried + prev_tokens + tokens > budget:
+                        break
+                    carry.insert(0, prev)
+                    carried += prev_tokens
+                current, used = carry, marker_tokens + carried
+            current.append(piece)
+            used += tokens
+        if current:
+            chunks.append(prefix + " ".join(current))
+        return chunks
+
+    def split(self, text: str) -> List[str]:
+        sections = split_sections(text)
+        header = sections[0] if sections[0].startswith("[Title]:") else ""
+        if header and count_tokens(header) > self.max_tokens // 2:
+            header = header[: max(1, len(header) * (self.max_tokens // 2) // count_tokens(header))]
+        body_sections = sections[1:] if header else sections
+        if not body_sections:
+            return [text]
+
+        budget = self.max_tokens - count_tokens(header)
+        chunks: List[str] = []
+        current: List[str] = []
+        used = 0
+
+        def emit():
+            nonlocal current, used
+            if current:
+                chunks.append("\n".join(([header] if header else []) + current))
+            current, used = [], 0
+
+        for section in body_sections:
+            tokens = count_tokens(section)
+            if used + tokens <= budget:
+                current.append(section)
+                used += tokens
+                continue
+            emit()
+            if tokens <= budget:
+                current, used = [section], tokens
+                continue
+            match = SECTION_PATTERN.match(section)
+            marker = match.group(0) if match else ""
+            body = section[len(marker):].strip() if marker else section
+            parts = self._split_section(marker, body, budget)
+            # 마지막 조각은 다음 섹션과 같은 청크에 들어갈 수 있습니다.
+            for part in parts[:-1]:
+                current = [part]
+                emit()
+            current, used = [parts[-1]], count_tokens(parts[-1])
+        emit()
+        return chunks
+
+
+# --- Singleton ---
+_chunker: Optional[SectionChunker] = None
+_chunker_lock = threading.Lock()
+
+
+def get_chunker() -> SectionChunker:
+    global _chunker
+    with _chunker_lock:
+        if _chunker is None:
+            _chunker = SectionChunker(Config.CHUNK_TOKENS, Config.CHUNK_OVERLAP_TOKENS)
+        return _chunker
+
+
+def chunker_name() -> str:
+    """적재 목록(manifest)에 기록할 청킹 설정. 바뀌면 전체 재적재가 필요합니다."""
+    if Config.CHUNK_STRATEGY == "fixed":
+        return f"fixed:{Config.CHUNK_FIXED_CHARS}"
+    return get_chunker().name
+
+
+def chunk_parent_text(text: str) -> List[str]:
+    if Config.CHUNK_STRATEGY == "fixed":
+        return fixed_chunks(text, Config.CHUNK_FIXED_CHARS)
+    return get_chunker().split(text)
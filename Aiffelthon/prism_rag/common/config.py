@@ -43,6 +43,14 @@ class Config:
 
     # Embeddings
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "bge-m3")
+    # Embedding Ingestion (upload_to_milvus.py: 초기/최대 초당 호출 수(AIMD), 동시 호출 수, 호출당 문장 수)
+    EMBEDDING_QPS = float(os.getenv("EMBEDDING_QPS", "10"))
+    EMBEDDING_QPS_MAX = float(os.getenv("EMBEDDING_QPS_MAX", "50"))
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "8"))
+    EMBEDDING_CALL_SIZE = int(os.getenv("EMBEDDING_CALL_SIZE", "1"))
+    # Embedding Cache (적재 스크립트 공용 디스크 캐시: SQLite 인덱스 + float16 memmap 벡터 파일)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
 
     # Milvus
     MILVUS_URI = os.getenv("MILVUS_URI", "./milvus_demo.db")
@@ -50,14 +58,110 @@ class Config:
     MILVUS_COLLECTION_NAME_V0 = "data_v1"
     MILVUS_COLLECTION_NAME_V1 = "data_v2"
     MILVUS_COLLECTION_NAME_MARKDOWN = "markdown_rag_parent_child_v1"
+    # Milvus Bulk Import (upload_to_milvus.py --bulk: 적재 파일을 올릴 MinIO, 파일 형식 numpy | parquet)
+    MILVUS_BULK_FILE_TYPE = os.getenv("MILVUS_BULK_FILE_TYPE", "numpy")
+    MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
+    MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
+    MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
+    MINIO_BUCKET = os.getenv("MINIO_BUCKET", "a-bucket")  # Milvus 기본 버킷
+    MINIO_SECURE = os.getenv("MINIO_SECURE", "false").lower() == "true"
 
     # Data
     DATA_PATH = os.getenv("DATA_PATH", "data_v10.json")
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "800"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
+    # Milvus 적재 청킹 (upload_to_milvus.py): section = 섹션 / Kiwi 문장 경계 + 토큰 수 기준, fixed = 글자 수로 자르기
+    CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "section")
+    CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "300"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+    CHUNK_FIXED_CHARS = int(os.getenv("CHUNK_FIXED_CHARS", "500"))
 
     # Feature Flags (Lego Switches)
     ENABLE_REDIS = os.getenv("ENABLE_REDIS", "true").lower() == "true"
 
+    # Redis
+    REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+
+    # Redis Checkpointer (세션 상태 TTL, 직렬화 압축: zstd | none)
+    CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", "86400"))
+    CHECKPOINT_COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "zstd")
+    # 스레드별로 남길 최근 체크포인트 수 (0이면 TTL로만 만료)와 compactor 주기(초)
+    CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+    CHECKPOINT_COMPACT_INTERVAL = float(os.getenv("CHECKPOINT_COMPACT_INTERVAL", "60"))
+
+    # SQL Retriever (audit_metadata.db 읽기 전용 커넥션 풀)
+    # immutable=1은 파일 변경 감지/잠금을 끄므로, 서버 실행 중 DB를 다시 만들지 않는 배포에서만 켜십시오.
+    SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+    SQLITE_IMMUTABLE = os.getenv("SQLITE_IMMUTABLE", "false").lower() == "true"
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    # 통계/목록 질문을 LLM 없이 SQL 템플릿으로 처리 (파싱 실패 시에만 NL2SQL)
+    SQL_TEMPLATE_ENABLED = os.getenv("SQL_TEMPLATE_ENABLED", "true").lower() == "true"
+    # NL2SQL 캐시 (질문 -> SQL, SQL -> 결과 행) 공용 LRU 한도. DB 파일이 바뀌면 자동 무효화 (0이면 끔)
+    SQL_CACHE_MAXSIZE = int(os.getenv("SQL_CACHE_MAXSIZE", "512"))
+
+    # LLM Response Cache (Exact-Match, temperature=0 호출에만 적용)
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | sqlite | redis | none
+    LLM_CACHE_MAXSIZE = int(os.getenv("LLM_CACHE_MAXSIZE", "2048"))
+    LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "./llm_cache.db")
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+
+    # LLM HTTP Connection Pool (ModelFactory 공유 keep-alive 풀)
+    LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "20"))
+    LLM_HTTP_KEEPALIVE = float(os.getenv("LLM_HTTP_KEEPALIVE", "60"))
+    LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+    # LLM Rate Limit Scheduler (모델별 QPS/TPM 예산, 우선순위 스케줄링)
+    LLM_RATE_LIMIT_BACKEND = os.getenv("LLM_RATE_LIMIT_BACKEND", "memory")  # memory | redis | none
+    LLM_RATE_LIMITS = {
+        "reasoning": {
+            "qps": float(os.getenv("LLM_QPS_REASONING", "1")),
+            "tpm": int(os.getenv("LLM_TPM_REASONING", "40000")),
+        },
+        "heavy": {
+            "qps": float(os.getenv("LLM_QPS_HEAVY", "3")),
+            "tpm": int(os.getenv("LLM_TPM_HEAVY", "60000")),
+        },
+        "light": {
+            "qps": float(os.getenv("LLM_QPS_LIGHT", "5")),
+            "tpm": int(os.getenv("LLM_TPM_LIGHT", "100000")),
+        },
+        "eval": {
+            "qps": float(os.getenv("LLM_QPS_EVAL", "5")),
+            "tpm": int(os.getenv("LLM_TPM_EVAL", "200000")),
+        },
+    }
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RATE_LIMIT_COOLDOWN = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN", "2"))
+
+    # Tracing (OpenTelemetry Exporter: none | console | file | otlp)
+    OTEL_EXPORTER = os.getenv("OTEL_EXPORTER", "none")
+    OTEL_ENDPOINT = os.getenv("OTEL_ENDPOINT", "http://localhost:4318/v1/traces")
+    OTEL_FILE_PATH = os.getenv("OTEL_FILE_PATH", "./traces.jsonl")
+    OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "prism-rag")
+
+    # Context Packing (모델 레벨별 프롬프트 컨텍스트 토큰 예산)
+    CONTEXT_TOKEN_BUDGET = {
+        "reasoning": int(os.getenv("CONTEXT_BUDGET_REASONING", "6000")),
+        "heavy": int(os.getenv("CONTEXT_BUDGET_HEAVY", "4000")),
+        "light": int(os.getenv("CONTEXT_BUDGET_LIGHT", "2500")),
+    }
+    CONTEXT_PER_DOC_TOKENS = int(os.getenv("CONTEXT_PER_DOC_TOKENS", "1200"))
+
+    # Conversation Summary (Background, Debounced)
+    SUMMARY_TRIGGER_MESSAGES = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "6"))
+    SUMMARY_EVERY_N_TURNS = int(os.getenv("SUMMARY_EVERY_N_TURNS", "2"))
+    # 요약 후에도 체크포인트에 남겨둘 최근 메시지 수 (노드들은 이 중 최근 몇 개만 프롬프트에 사용)
+    HISTORY_WINDOW_MESSAGES = int(os.getenv("HISTORY_WINDOW_MESSAGES", "8"))
+    # [Debug] 턴마다 체크포인트를 두 번 더 읽어 대화 기록 증가분(user/assistant 1개씩)을 검사합니다.
+    DEBUG_CHECK_TURN_MESSAGES = os.getenv("DEBUG_CHECK_TURN_MESSAGES", "false").lower() == "true"
+
+    # Async Graph: 문서 채점(Grader) 동시 호출 수
+    GRADER_MAX_CONCURRENCY = int(os.getenv("GRADER_MAX_CONCURRENCY", "5"))
+
     # RAG Versioning
     ACTIVE_RAG_DIR = os.getenv("ACTIVE_RAG_DIR", "agentic_rag_v2") # or "agentic_rag_v1"
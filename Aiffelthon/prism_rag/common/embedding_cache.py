@@ -0,0 +1,191 @@
+"""
+디스크 임베딩 캐시 (적재 스크립트 공용).
+
+- 인덱스: SQLite (EMBEDDING_CACHE_DIR/index.db). 키 = sha256(모델명 + 문장), 값 = 벡터 파일 이름 + 행 번호
+- 벡터: 모델/차원별 float16 파일 ({model}-{dim}.f16)에 행 단위로 이어 붙이고, 읽을 때는 numpy.memmap으로 매핑합니다.
+
+같은 문장을 같은 모델로 다시 임베딩하지 않으므로 청킹 / 스키마를 바꿔 컬렉션을 다시 만들 때도
+바뀐 청크만 API를 호출합니다. 여러 프로세스가 함께 써도 되도록 쓰기는 SQLite 쓰기 트랜잭션(BEGIN IMMEDIATE) 안에서 합니다.
+캐시 여부와 관계없이 같은 값을 돌려주도록 새로 계산한 벡터도 float16으로 반올림해서 반환합니다.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("EMBED_CACHE")
+
+# SQLite 바인딩 변수 개수 제한 아래로 IN (...) 조회를 나눕니다.
+LOOKUP_CHUNK = 500
+
+
+def _key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _round(vectors: Sequence[Sequence[float]]) -> List[List[float]]:
+    return np.asarray(vectors, dtype=np.float16).astype(np.float32).tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.db"), timeout=60, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, file TEXT NOT NULL, slot INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, dim INTEGER NOT NULL, count INTEGER NOT NULL)"
+        )
+        self._maps: Dict[str, np.memmap] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_name(model: str, dim: int) -> str:
+        return f"{re.sub(r'[^0-9A-Za-z._-]+', '_', model)}-{dim}.f16"
+
+    def _matrix(self, name: str, slot: int) -> np.memmap:
+        """slot 행까지 들어 있는 memmap. 다른 프로세스가 행을 추가했으면 다시 매핑합니다."""
+        matrix = self._maps.get(name)
+        if matrix is None or slot >= matrix.shape[0]:
+            dim, count = self._conn.execute("SELECT dim, count FROM files WHERE name = ?", (name,)).fetchone()
+            matrix = np.memmap(os.path.join(self.cache_dir, name), dtype=np.float16, mode="r", shape=(count, dim))
+            self._maps[name] = matrix
+        return matrix
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [_key(model, text) for text in texts]
+        found: Dict[str, Tuple[str, int]] = {}
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                part = keys[i:i + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, file, slot FROM vectors WHERE key IN ({', '.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((key, (name, slot)) for key, name, slot in rows)
+            results: List[Optional[List[float]]] = []
+            for key in keys:
+                if key not in found:
+                    results.append(None)
+                    continue
+                name, slot = found[key]
+                results.append(self._matrix(name, slot)[slot].astype(np.float32).tolist())
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """아직 없는 (모델, 문장)만 추가합니다. 반환값은 새로 저장한 벡터 수."""
+        if not texts:
+            return 0
+        matrix = np.asarray(vectors, dtype=np.float16)
+        name = self._file_name(model, matrix.shape[1])
+        keys = [_key(model, text) for text in texts]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO files (name, dim, count) VALUES (?, ?, 0)", (name, matrix.shape[1])
+                )
+                existing = set()
+                for i in range(0, len(keys), LOOKUP_CHUNK):
+                    part = keys[i:i + LOOKUP_CHUNK]
+                    existing.update(
+                        row[0] for row in self._conn.execute(
+                            f"SELECT key FROM vectors WHERE key IN ({', '.join('?' * len(part))})", part
+                        )
+                    )
+                new_rows, seen = [], set()
+                for row, key in enumerate(keys):
+                    if key not in existing and key not in seen:
+                        seen.add(key)
+                        new_rows.append((row, key))
+                if not new_rows:
+                    self._conn.execute("COMMIT")
+                    return 0
+
+                count = self._conn.execute("SELECT count FROM files WHERE name = ?", (name,)).fetchone()[0]
+                path = os.path.join(self.cache_dir, name)
+                # 커밋되지 않은 이전 쓰기(중단된 프로세스)가 파일 끝에 남아 있으면 그 위에 덮어씁니다.
+                with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                    f.seek(count * matrix.shape[1] * matrix.itemsize)
+                    f.write(matrix[[row for row, _ in new_rows]].tobytes())
+                self._conn.executemany(
+                    "INSERT INTO vectors (key, file, slot) VALUES (?, ?, ?)",
+                    [(key, name, count + n) for n, (_, key) in enumerate(new_rows)],
+                )
+                self._conn.execute("UPDATE files SET count = ? WHERE name = ?", (count + len(new_rows), name))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(new_rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, count FROM files").fetchall()
+        return dict(rows)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    embed_documents 결과를 EmbeddingCache에 저장하는 Embeddings 래퍼.
+    질문(embed_query)은 매번 다르므로 캐시하지 않고 그대로 넘깁니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: Optional[str] = None, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.cache = cache or get_embedding_cache()
+        self.hits = 0
+        self.misses = 0
+        # lookup은 임베딩 워커 스레드들에서 동시에 호출되므로 카운터 갱신을 보호합니다.
+        self._stats_lock = threading.Lock()
+
+    def lookup(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        cached = self.cache.get_many(self.model, texts)
+        hits = sum(vector is not None for vector in cached)
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += len(cached) - hits
+        return cached
+
+    def store(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> List[List[float]]:
+        self.cache.put_many(self.model, texts, vectors)
+        return _round(vectors)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.lookup(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if missing:
+            fresh = dict(zip(missing, self.store(missing, self.embeddings.embed_documents(missing))))
+            cached = [vector if vector is not None else fresh[text] for text, vector in zip(texts, cached)]
+        return cached
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+# --- Singleton ---
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(Config.EMBEDDING_CACHE_DIR)
+            logger.info(f"Embedding cache: {os.path.abspath(Config.EMBEDDING_CACHE_DIR)} {_cache.stats()}")
+        return _cache
@@ -0,0 +1,291 @@
+"""
+임베딩 적재(Ingestion) 파이프라인.
+
+- AdaptiveRateLimiter: 임베딩 API 호출 속도를 AIMD로 조절합니다.
+  성공하면 조금씩(+) 올리고, 429를 받으면 절반(x0.5)으로 줄이고 버킷을 비워 잠시 멈춥니다.
+- run_pipeline: [임베딩 스레드 풀] -> 큐 -> [삽입 스레드 1개] 로 단계를 분리합니다.
+  임베딩이 끝난 배치부터 바로 삽입되고, 삽입이 밀리면 큐가 차서 임베딩도 자동으로 속도를 늦춥니다.
+- UploadCheckpoint: 삽입이 끝난 배치 번호를 파일에 기록해, 중단된 업로드를 같은 입력으로 다시 실행하면 이어서 진행합니다.
+- IngestManifest: 컬렉션에 들어 있는 사례별 내용 해시 / 청크 수. 다음 업로드에서 바뀐 사례만 다시 임베딩합니다.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from common.config import Config
+from common.embedding_cache import CachedEmbeddings
+from common.llm_scheduler import TokenBucket, is_rate_limit_error, retryable_errors
+from common.logger_config import setup_logger
+
+logger = setup_logger("EMBED_PIPELINE")
+
+# 429 이후 재시도 대기 (초). 시도마다 두 배 (Jitter 포함)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD(Additive Increase / Multiplicative Decrease) 호출 속도 제한기 (Thread-safe).
+    - acquire(): 호출 1회분 토큰을 얻을 때까지 기다립니다.
+    - on_success(): 속도를 초당 increase만큼 올립니다 (max_rate까지, 기본값은 max_rate의 5%).
+      호출 1회마다 increase / rate씩 올리므로 호출 속도와 무관하게 초당 증가량이 일정합니다.
+    - on_rate_limited(): 속도를 절반으로 줄이고 (min_rate까지) 버킷을 비웁니다.
+      동시에 떠 있던 호출들이 같이 받은 429로 여러 번 줄지 않도록 cooldown(초) 동안은 한 번만 줄입니다.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_rate: Optional[float] = None,
+        min_rate: float = 0.5,
+        increase: Optional[float] = None,
+        cooldown: Optional[float] = None,
+    ):
+        self.max_rate = max(rate, max_rate or rate)
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase or self.max_rate * 0.05
+        self.cooldown = Config.LLM_RATE_LIMIT_COOLDOWN if cooldown is None else cooldown
+        self.bucket = TokenBucket(rate, max(1.0, rate))
+        self.rate_limited = 0
+        self._decreased_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _set_rate(self, rate: float) -> None:
+        # TokenBucket은 rate / capacity를 호출 시점에 읽으므로 바로 반영됩니다.
+        self.bucket.rate = rate
+        self.bucket.capacity = max(1.0, rate)
+
+    def acquire(self) -> None:
+        while True:
+            wait = self.bucket.try_consume(1)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._set_rate(min(self.max_rate, self.rate + self.increase / self.rate))
+
+    def on_rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limited += 1
+            now = time.monotonic()
+            decrease = now - self._decreased_at >= self.cooldown
+            if decrease:
+                self._decreased_at = now
+                self._set_rate(max(self.min_rate, self.rate * 0.5))
+        self.bucket.drain()
+        if decrease:
+            logger.warning(f"Embedding rate limited (429) -> {self.rate:.2f} req/s")
+
+
+def embed_texts(
+    embeddings,
+    texts: Sequence[str],
+    limiter: AdaptiveRateLimiter,
+    call_size: int = 1,
+    max_retries: Optional[int] = None,
+) -> List[List[float]]:
+    """
+    texts를 call_size개씩 embed_documents로 임베딩합니다 (호출마다 limiter 토큰 1개).
+    ClovaX 임베딩 API는 요청 1건에 문장 1개이므로 기본값은 1입니다.
+    429와 일시적 오류(연결/5xx)는 지수 백오프로 재시도합니다.
+    embeddings가 CachedEmbeddings이면 캐시에 없는 문장만 호출하므로 캐시 적중분은 limiter 토큰을 쓰지 않습니다.
+    """
+    if isinstance(embeddings, CachedEmbeddings):
+        cached = embeddings.lookup(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if missing:
+            vectors = embed_texts(embeddings.embeddings, missing, limiter, call_size, max_retries)
+            fresh = dict(zip(missing, embeddings.store(missing, vectors)))
+            cached = [vector if vector is not None else fresh[text] for text, vector in zip(texts, cached)]
+        return cached
+
+    max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+    retryable = retryable_errors()
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), call_size):
+        part = list(texts[start:start + call_size])
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                vectors.extend(embeddings.embed_documents(part))
+                limiter.on_success()
+                break
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if attempt >= max_retries or not (rate_limited or isinstance(e, retryable)):
+                    raise
+                if rate_limited:
+                    limiter.on_rate_limited()
+                attempt += 1
+                time.sleep(min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0))
+    return vectors
+
+
+class UploadCheckpoint:
+    """
+    업로드 진행 상황 파일 (JSON). fingerprint(컬렉션 + 모델 + 청크 ID 목록 해시)가 같을 때만 이어서 진행하고,
+    입력이 바뀌었으면 기록을 무시합니다. 파일은 임시 파일에 쓴 뒤 교체하므로 중간에 끊겨도 깨지지 않습니다.
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> Set[int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if state.get("fingerprint") != self.fingerprint:
+            return set()
+        self.done = set(state.get("done", []))
+        return set(self.done)
+
+    def mark(self, batch_no: int) -> None:
+        with self._lock:
+            self.done.add(batch_no)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint, "done": sorted(self.done)}, f)
+            os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.done = set()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class IngestManifest:
+    """
+    컬렉션 옆에 두는 적재 목록 (JSON): {"meta": {...}, "cases": {case_id: {"hash": ..., "chunks": n}}}.
+    meta(컬렉션 / Milvus URI / 임베딩 모델 / 청킹 설정)가 바뀌면 목록을 버리고 전체를 다시 적재해야 합니다.
+    """
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.path = path
+        self.meta = meta
+
+    def load(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """저장된 사례 목록. 파일이 없거나 meta가 다르면 None."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("meta") != self.meta:
+            return None
+        return state.get("cases", {})
+
+    def save(self, cases: Dict[str, Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "cases": cases}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def content_hash(payload: Any) -> str:
+    """사례 내용(본문 + 메타데이터) 해시. dict는 키 순서와 무관하게 같은 값을 냅니다."""
+    text = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def diff_cases(
+    old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]
+) -> Tuple[List[str], List[str], List[str]]:
+    """(추가된 사례, 내용이 바뀐 사례, 삭제된 사례) ID 목록."""
+    added = [case_id for case_id in new if case_id not in old]
+    changed = [case_id for case_id in new if case_id in old and old[case_id]["hash"] != new[case_id]["hash"]]
+    removed = [case_id for case_id in old if case_id not in new]
+    return added, changed, removed
+
+
+_DONE = object()
+
+
+def run_pipeline(
+    batches: Iterable[Any],
+    embed: Callable[[Any], List[List[float]]],
+    insert: Callable[[Any, List[List[float]]], None],
+    concurrency: int = 4,
+    queue_size: int = 8,
+    on_inserted: Optional[Callable[[Any], None]] = None,
+) -> int:
+    """
+    batches의 각 배치를 embed(batch)로 임베딩하고 insert(batch, vectors)로 삽입합니다. 반환값은 삽입한 배치 수.
+    - 임베딩: concurrency개 스레드, 동시에 떠 있는 배치는 concurrency + queue_size개까지
+    - 삽입: 스레드 1개가 완료 순서대로 처리 (Milvus 쓰기는 한 곳에서만)
+    어느 단계든 실패하면 새 배치 제출을 멈추고, 이미 삽입된 배치는 그대로 둔 채 예외를 다시 던집니다.
+    """
+    inserts: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    slots = threading.Semaphore(concurrency + queue_size)
+    errors: List[BaseException] = []
+    stop = threading.Event()
+    inserted = 0
+
+    def embed_one(batch):
+        try:
+            if not stop.is_set():
+                inserts.put((batch, embed(batch)))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            slots.release()
+
+    def insert_loop():
+        nonlocal inserted
+        while True:
+            item = inserts.get()
+            if item is _DONE:
+                return
+            if stop.is_set():
+                continue
+            batch, vectors = item
+            try:
+                insert(batch, vectors)
+                inserted += 1
+                if on_inserted:
+                    on_inserted(batch)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+    writer = threading.Thread(target=insert_loop, name="milvus-insert", daemon=True)
+    writer.start()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed") as pool:
+        for batch in batches:
+            slots.acquire()
+            if stop.is_set():
+                slots.release()
+                break
+            pool.submit(embed_one, batch)
+    inserts.put(_DONE)
+    writer.join()
+
+    if errors:
+        raise errors[0]
+    return inserted
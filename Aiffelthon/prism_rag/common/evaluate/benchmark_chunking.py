@@ -0,0 +1,236 @@
+"""
+청킹 방식별 Dense 검색 Recall Benchmark: 글자 수 고정 청킹 vs 섹션 / Kiwi 문장 경계 청킹.
+
+질문 세트는 advanced_rag 검색 평가(results/advanced_retrieval_data_score.csv)를 사용합니다.
+평가 CSV의 문서별 LLM 판정(5개 기준, run_retrieval_evaluation.calculate_score와 같은 점수)을
+3회 평균해 --min-score 이상인 사례(idx)를 정답으로 삼습니다 (판정된 문서만 정답이 되는 pooled relevance).
+
+청킹 방식마다 audit_v10.json 전체(또는 정답 사례 + --distractors개 사례)를 청킹 / 임베딩하고,
+질문별로 상위 k개 청크(VectorRetriever의 similarity_search k)에 정답 사례가 몇 개 들어오는지(Recall@k)를 계산합니다.
+Milvus 기본값과 같은 L2 거리로 전수 검색하며, 임베딩은 디스크 캐시(EMBEDDING_CACHE_DIR)를 사용하므로 두 번째 실행부터는 API를 거의 호출하지 않습니다.
+
+Usage (prism_rag 루트에서):
+    python -m common.evaluate.benchmark_chunking
+    python -m common.evaluate.benchmark_chunking --strategies fixed:500 section:300:50 section:200:40
+    python -m common.evaluate.benchmark_chunking --distractors 2000 --ks 5 10 20 50
+"""
+
+import argparse
+import ast
+import csv
+import json
+import os
+import random
+import sys
+import time
+from statistics import mean
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_naver import ClovaXEmbeddings
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from common.chunking import SectionChunker, build_parent_text, count_tokens, fixed_chunks
+from common.config import Config
+from common.embedding_cache import CachedEmbeddings
+from common.embedding_pipeline import AdaptiveRateLimiter, embed_texts
+
+DEFAULT_OUTPUT_DIR = os.path.join(current_dir, "benchmarks")
+DEFAULT_DATA = os.path.join(project_root, "audit_v10.json")
+DEFAULT_GOLD = os.path.join(
+    project_root, "..", "..", "advanced_rag", "results", "advanced_retrieval_data_score.csv"
+)
+CRITERIA = ("topic_match", "subtopic_match", "case_structure_match", "violation_pattern_match", "cause_pattern_match")
+
+
+def judgement_score(result: Dict[str, Any]) -> float:
+    """advanced_rag run_retrieval_evaluation.calculate_score와 같은 규칙."""
+    if not isinstance(result, dict):
+        return 0.0
+    count = sum(1 for key in CRITERIA if isinstance(result.get(key), dict) and result[key].get("decision") is True)
+    if count >= 4:
+        return 1.0
+    if count >= 2:
+        return 0.6
+    return 0.2 if count == 1 else 0.0
+
+
+def load_gold(path: str, min_score: float) -> List[Dict[str, Any]]:
+    """질문별 정답 사례 idx 집합. 정답이 없는 질문은 제외합니다."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, "r", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    questions = []
+    for row in rows:
+        idxs = [str(idx) for idx in ast.literal_eval(row["contexts_idx"] or "[]")]
+        runs = [ast.literal_eval(row[key]) for key in sorted(row) if key.startswith("details_run_") and row[key]]
+        relevant = set()
+        for pos, idx in enumerate(idxs):
+            scores = [judgement_score(run[pos]) for run in runs if pos < len(run)]
+            if scores and mean(scores) >= min_score:
+                relevant.add(idx)
+        if relevant:
+            questions.append({"question": row["question"], "type": row.get("type", ""), "relevant": relevant})
+    return questions
+
+
+def parse_strategy(spec: str) -> Tuple[str, Any]:
+    """'fixed:500' | 'section:300:50' -> (이름, 청킹 함수)."""
+    kind, *params = spec.split(":")
+    if kind == "fixed":
+        size = int(params[0]) if params else Config.CHUNK_FIXED_CHARS
+        return f"fixed:{size}", lambda text: fixed_chunks(text, size)
+    if kind == "section":
+        tokens = int(params[0]) if params else Config.CHUNK_TOKENS
+        overlap = int(params[1]) if len(params) > 1 else Config.CHUNK_OVERLAP_TOKENS
+        chunker = SectionChunker(tokens, overlap)
+        return chunker.name, chunker.split
+    raise ValueError(f"Unknown chunking strategy: {spec}")
+
+
+def load_corpus(path: str, gold_idx: set, distractors: int, seed: int) -> Dict[str, str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    corpus = {}
+    for item in data:
+        text = build_parent_text(item)
+        if text.strip():
+            corpus[str(item.get("idx", ""))] = text
+    missing = gold_idx - set(corpus)
+    if missing:
+        print(f"⚠️  정답 사례 {len(missing)}개가 {path}에 없습니다 (예: {sorted(missing)[:5]})")
+    if distractors:
+        others = sorted(set(corpus) - gold_idx)
+        keep = gold_idx | set(random.Random(seed).sample(others, min(distractors, len(others))))
+        corpus = {idx: text for idx, text in corpus.items() if idx in keep}
+    return corpus
+
+
+def embed_all(embeddings, texts: List[str], limiter: AdaptiveRateLimiter) -> np.ndarray:
+    vectors = []
+    batch = 64
+    for i in range(0, len(texts), batch):
+        vectors.extend(embed_texts(embeddings, texts[i:i + batch], limiter, Config.EMBEDDING_CALL_SIZE))
+        print(f"\r   임베딩 {min(i + batch, len(texts))}/{len(texts)}", end="", flush=True)
+    print()
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def evaluate(
+    questions: List[Dict[str, Any]],
+    query_vectors: np.ndarray,
+    chunk_vectors: np.ndarray,
+    chunk_cases: List[str],
+    ks: List[int],
+) -> Dict[str, Any]:
+    # L2 거리 (Milvus 기본 metric). |q|^2은 질문마다 상수라 순위에 영향이 없어 생략합니다.
+    distances = (chunk_vectors ** 2).sum(axis=1)[None, :] - 2 * query_vectors @ chunk_vectors.T
+    order = np.argsort(distances, axis=1)[:, : max(ks)]
+
+    recall = {k: [] for k in ks}
+    hit = {k: [] for k in ks}
+    cases_in_pool = {k: [] for k in ks}
+    for q, question in enumerate(questions):
+        ranked = [chunk_cases[i] for i in order[q]]
+        for k in ks:
+            found = set(ranked[:k])
+            recall[k].append(len(found & question["relevant"]) / len(question["relevant"]))
+            hit[k].append(1.0 if found & question["relevant"] else 0.0)
+            cases_in_pool[k].append(len(found))
+    return {
+        "recall": {k: round(mean(v), 4) for k, v in recall.items()},
+        "hit_rate": {k: round(mean(v), 4) for k, v in hit.items()},
+        "unique_cases": {k: round(mean(v), 1) for k, v in cases_in_pool.items()},
+    }
+
+
+def print_results(results: List[Dict[str, Any]], ks: List[int]) -> None:
+    header = f"\n{'strategy':<20} {'chunks':>7} {'avg tok':>8} " + " ".join(f"{'R@' + str(k):>7}" for k in ks)
+    print(header)
+    for r in results:
+        print(
+            f"{r['strategy']:<20} {r['chunks']:>7} {r['avg_tokens']:>8} "
+            + " ".join(f"{r['recall'][k]:>7.3f}" for k in ks)
+        )
+    print("\n(R@k: 상위 k개 청크 안에 들어온 정답 사례 비율. 현재 VectorRetriever는 k=50)")
+    base = results[0]
+    for r in results:
+        # 기준 방식(첫 번째)의 R@최대k 이상을 내는 가장 작은 k
+        target = base["recall"][max(ks)]
+        enough = next((k for k in ks if r["recall"][k] >= target), None)
+        print(f"   {r['strategy']}: {base['strategy']} R@{max(ks)}({target:.3f}) 도달 k = {enough or '-'}")
+
+
+def main(args):
+    questions = load_gold(args.gold, args.min_score)
+    gold_idx = set().union(*(q["relevant"] for q in questions)) if questions else set()
+    print(f"📋 질문 {len(questions)}개 (정답 사례 {len(gold_idx)}개, min_score={args.min_score})")
+    corpus = load_corpus(args.data, gold_idx, args.distractors, args.seed)
+    print(f"📚 코퍼스 {len(corpus)}개 사례")
+
+    embeddings = ClovaXEmbeddings(model=Config.EMBEDDING_MODEL)
+    if Config.EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(embeddings, model=Config.EMBEDDING_MODEL)
+    limiter = AdaptiveRateLimiter(Config.EMBEDDING_QPS, Config.EMBEDDING_QPS_MAX)
+
+    print("\n❓ 질문 임베딩")
+    query_vectors = embed_all(embeddings, [q["question"] for q in questions], limiter)
+
+    ks = sorted(args.ks)
+    results = []
+    for spec in args.strategies:
+        name, split = parse_strategy(spec)
+        print(f"\n✂️  {name}")
+        start = time.perf_counter()
+        chunks, chunk_cases = [], []
+        for idx, text in corpus.items():
+            for chunk in split(text):
+                chunks.append(chunk)
+                chunk_cases.append(idx)
+        chunk_sec = time.perf_counter() - start
+        chunk_vectors = embed_all(embeddings, chunks, limiter)
+        metrics = evaluate(questions, query_vectors, chunk_vectors, chunk_cases, ks)
+        results.append({
+            "strategy": name,
+            "chunks": len(chunks),
+            "avg_tokens": round(mean(count_tokens(c) for c in chunks), 1),
+            "chunk_sec": round(chunk_sec, 2),
+            **metrics,
+        })
+
+    print_results(results, ks)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "questions": len(questions),
+        "gold_cases": len(gold_idx),
+        "min_score": args.min_score,
+        "corpus_cases": len(corpus),
+        "distractors": args.distractors,
+        "ks": ks,
+        "results": results,
+    }
+    if isinstance(embeddings, CachedEmbeddings):
+        report["embedding_cache"] = {"hits": embeddings.hits, "misses": embeddings.misses}
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"chunking_{time.strftime('%Y%m%d%H%M%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunking strategy dense recall benchmark")
+    parser.add_argument("--data", default=DEFAULT_DATA)
+    parser.add_argument("--gold", default=DEFAULT_GOLD, help="advanced_rag 검색 평가 결과 CSV")
+    parser.add_argument("--min-score", type=float, default=0.6, help="정답으로 볼 문서별 평균 판정 점수")
+    parser.add_argument("--strategies", nargs="+", default=["fixed:500", "section:300:50", "section:200:40"])
+    parser.add_argument("--ks", nargs="+", type=int, default=[5, 10, 20, 30, 50])
+    parser.add_argument("--distractors", type=int, default=0, help="정답 외 코퍼스 사례 수 (0이면 전체)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    main(parser.parse_args())
@@ -0,0 +1,260 @@
+"""
+SQLRetriever 키워드 검색 Benchmark: LIKE '%kw%' 스캔 vs FTS5 trigram 인덱스.
+
+합성 audits 테이블(기본 100만 행)을 만들고, NL2SQL이 생성하는 형태의 쿼리를
+- LIKE: title / problem / cat / sub_cat 컬럼별 LIKE OR (기존 생성 규칙)
+- FTS:  id IN (SELECT rowid FROM audits_fts WHERE audits_fts MATCH ...) (새 생성 규칙)
+두 방식으로 실행하여 지연 시간 분위수와 결과 일치 여부를 비교합니다.
+
+참고 (100만 행): 결과가 적거나 없는 키워드는 LIKE가 전체 스캔(2~4.5초)인 반면 FTS는 수 ms입니다.
+흔한 키워드 + ORDER BY date DESC LIMIT n은 LIKE가 date 인덱스를 역순으로 읽다 조기 종료하므로 더 빠를 수 있습니다.
+FTS는 이 경우에도 수백 ms 이내라 최악의 경우(worst case) 지연 시간이 크게 줄어듭니다.
+
+Usage (prism_rag 루트에서):
+    python -m common.evaluate.benchmark_fts                      # 1,000,000 rows
+    python -m common.evaluate.benchmark_fts --rows 200000 --repeat 3
+    python -m common.evaluate.benchmark_fts --db /tmp/fts_bench.db --keep   # DB 재사용
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from common.metadata_db import (
+    FTS_COLUMNS,
+    FTS_TABLE,
+    create_schema,
+    create_search_index,
+    fts_match,
+    has_fts,
+    insert_rows,
+)
+
+DEFAULT_OUTPUT_DIR = os.path.join(current_dir, "benchmarks")
+
+COMPANIES = [
+    "인천국제공항공사", "한국가스공사", "한국철도공사", "한국전력공사", "한국도로공사",
+    "한국수자원공사", "한국토지주택공사", "국민건강보험공단", "한국관광공사", "한국농어촌공사",
+]
+SITES = ["ALIO 공공기관 경영정보 공개시스템", "감사원"]
+CATS = ["복무", "회계", "계약", "인사", "안전", "시설", "예산", "보수"]
+SUB_CATS = ["근무태만", "공금횡령", "부당지급", "입찰담합", "안전관리소홀", "채용비리", "예산낭비", "겸직위반"]
+# 본문을 채우는 일반 단어 (검색 대상 아님)
+WORDS = [
+    "직원", "관리", "감독", "점검", "부적정", "미흡", "처리", "규정", "위반", "지급",
+    "업무", "사업", "시설물", "유지보수", "검수", "선정", "평가", "기준", "절차", "확인",
+]
+
+# 검색 대상 주제어와 행별 등장 확률. 실제 감사 데이터처럼 드문 주제어부터 흔한 주제어까지 분포시킵니다.
+TOPIC_TERMS = {
+    "레일바이크": 0.0005,
+    "초과근무수당": 0.005,
+    "안전사고": 0.01,
+    "법인카드": 0.03,
+    "출장여비": 0.03,
+    "수의계약": 0.1,
+    "용역계약": 0.3,
+}
+
+# 검색어 (모두 3글자 이상: trigram 인덱스 대상). 선택도가 다른 단일 / 다중 키워드를 섞습니다.
+QUERY_KEYWORDS = [
+    ["레일바이크"],
+    ["초과근무수당"],
+    ["법인카드"],
+    ["수의계약"],
+    ["용역계약"],
+    ["안전관리소홀"],
+    ["레일바이크", "안전사고"],
+    ["법인카드", "출장여비"],
+    ["존재하지않는키워드"],
+]
+
+
+def synthetic_rows(n: int, seed: int):
+    rng = random.Random(seed)
+    start = date(2021, 1, 4)
+    span = (date(2024, 6, 28) - start).days
+
+    def sentence(k: int) -> str:
+        words = [rng.choice(WORDS) for _ in range(k)]
+        for term, p in TOPIC_TERMS.items():
+            if rng.random() < p:
+                words.insert(rng.randrange(len(words) + 1), term)
+        return " ".join(words)
+
+    for i in range(n):
+        sub_cat = rng.choice(SUB_CATS)
+        yield {
+            "idx": i,
+            "date": (start + timedelta(days=rng.randrange(span))).isoformat(),
+            "title": f"{rng.choice(COMPANIES)} {sentence(3)} {sub_cat}",
+            "site": rng.choice(SITES),
+            "company": rng.choice(COMPANIES),
+            "company_code": "",
+            "category": "",
+            "cat": rng.choice(CATS),
+            "sub_cat": sub_cat,
+            "file_path": "",
+            "download_url": "",
+            "problem": sentence(rng.randint(15, 40)),
+            "action": sentence(rng.randint(5, 15)),
+        }
+
+
+def build_db(path: str, rows: int, seed: int) -> Dict[str, float]:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    create_schema(conn)
+
+    start = time.perf_counter()
+    insert_rows(conn, synthetic_rows(rows, seed))
+    conn.commit()
+    insert_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    create_search_index(conn)
+    conn.commit()
+    index_sec = time.perf_counter() - start
+    conn.close()
+    return {"insert_sec": round(insert_sec, 2), "index_sec": round(index_sec, 2)}
+
+
+def like_sql(keywords: List[str]) -> str:
+    """
+    기존 NL2SQL 규칙이 만드는 형태 (키워드마다 컬럼별 LIKE OR, 키워드끼리 AND).
+    결과 일치 비교를 위해 FTS 인덱스와 같은 컬럼(action 포함)을 검색합니다.
+    """
+    clauses = [
+        "(" + " OR ".join(f"{col} LIKE '%{kw}%'" for col in FTS_COLUMNS) + ")"
+        for kw in keywords
+    ]
+    return "WHERE " + " AND ".join(clauses)
+
+
+def fts_sql(keywords: List[str]) -> str:
+    """새 NL2SQL 규칙이 만드는 형태."""
+    return f"WHERE id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH '{fts_match(keywords)}')"
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+    return {"p50": round(pick(50) * 1000, 2), "p95": round(pick(95) * 1000, 2)}
+
+
+def timed(conn: sqlite3.Connection, sql: str, repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = conn.execute(sql).fetchall()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def run(conn: sqlite3.Connection, repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for keywords in QUERY_KEYWORDS:
+        for shape, tail in (
+            ("count", None),
+            # 동률(date)이 있어도 같은 결과가 나오도록 id로 2차 정렬합니다.
+            ("latest5", "ORDER BY date DESC, id DESC LIMIT 5"),
+        ):
+            row = {"keywords": keywords, "shape": shape}
+            for mode, where in (("like", like_sql(keywords)), ("fts", fts_sql(keywords))):
+                if shape == "count":
+                    sql = f"SELECT COUNT(*) FROM audits {where}"
+                else:
+                    sql = f"SELECT id FROM audits {where} {tail}"
+                samples, result = timed(conn, sql, repeat)
+                row[mode] = percentiles(samples)
+                row[f"{mode}_result"] = [r[0] for r in result]
+
+            row["match"] = row["like_result"] == row["fts_result"]
+            row["hits"] = row["like_result"][0] if shape == "count" else len(row["like_result"])
+            row["speedup_p50"] = (
+                round(row["like"]["p50"] / row["fts"]["p50"], 1) if row["fts"]["p50"] else None
+            )
+            results.append(row)
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'keywords':<24} {'shape':<8} {'hits':>8} {'LIKE p50':>10} {'FTS p50':>10} {'speedup':>8} {'match':>6}")
+    for r in results:
+        kw = "+".join(r["keywords"])
+        print(
+            f"{kw:<24} {r['shape']:<8} {r['hits']:>8} {r['like']['p50']:>8}ms {r['fts']['p50']:>8}ms "
+            f"{str(r['speedup_p50']) + 'x':>8} {'✅' if r['match'] else '❌':>6}"
+        )
+
+
+def main(args):
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="fts_bench_"), "audits.db")
+    build_stats = {}
+
+    reuse = os.path.exists(db_path)
+    if reuse:
+        with sqlite3.connect(db_path) as conn:
+            reuse = has_fts(conn)
+    if not reuse:
+        print(f"🏗️  Building synthetic audits table: {args.rows:,} rows -> {db_path}")
+        build_stats = build_db(db_path, args.rows, args.seed)
+        print(f"   insert {build_stats['insert_sec']}s, index {build_stats['index_sec']}s")
+    else:
+        print(f"♻️  Reusing {db_path}")
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -65536")
+    rows = conn.execute("SELECT COUNT(*) FROM audits").fetchone()[0]
+
+    # 워밍업 (페이지 캐시)
+    conn.execute(f"SELECT COUNT(*) FROM audits WHERE {FTS_COLUMNS[1]} LIKE '%워밍업%'").fetchone()
+
+    results = run(conn, args.repeat)
+    conn.close()
+    print_results(results)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": rows,
+        "repeat": args.repeat,
+        "sqlite_version": sqlite3.sqlite_version,
+        "db_size_mb": round(os.path.getsize(db_path) / 1e6, 1),
+        "build": build_stats,
+        # 결과 ID 목록은 일치 여부 확인용이므로 저장하지 않습니다.
+        "results": [
+            {k: v for k, v in r.items() if not k.endswith("_result")} for r in results
+        ],
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"fts_{rows}_{time.strftime('%Y%m%d%H%M%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved to {output_path}")
+
+    if not args.keep and not args.db:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LIKE scan vs FTS5 trigram benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=None, help="벤치마크 DB 경로 (있으면 재사용)")
+    parser.add_argument("--keep", action="store_true", help="임시 DB를 지우지 않음")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    main(parser.parse_args())
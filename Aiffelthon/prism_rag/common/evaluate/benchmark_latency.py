@@ -0,0 +1,494 @@
+"""
+Replay 기반 End-to-End Latency Benchmark.
+
+고정 질문 세트(advanced_rag/data/retrieval.csv, generation.csv)를 컴파일된 graph.app에 재생하여
+노드별 / 전체 지연 시간 분위수, 동시 세션 수별 처리량, 메모리 사용량을 측정합니다.
+
+- LLM / 임베딩 호출은 지연 분포를 설정할 수 있는 결정적(Deterministic) Stub으로 대체합니다.
+  (같은 질문은 항상 같은 응답과 같은 지연 시간을 가지므로 커밋 간 비교가 가능합니다.)
+- Milvus는 로컬 Lite 파일(Config.MILVUS_URI, 기본 ./milvus_demo.db)을 사용합니다.
+- 결과는 JSON으로 저장되며 --compare로 이전 결과와 비교할 수 있습니다.
+
+Usage (prism_rag 루트에서):
+    python -m common.evaluate.benchmark_latency --concurrency 1,4,8 --limit 20
+    python -m common.evaluate.benchmark_latency --llm-latency lognormal:0.8,0.4 --stub-reranker
+    python -m common.evaluate.benchmark_latency --compare common/evaluate/benchmarks/latency_abc123.json
+    ENABLE_REDIS=true python -m common.evaluate.benchmark_latency   # Redis 체크포인터 포함 측정
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+repo_root = os.path.dirname(os.path.dirname(project_root))
+sys.path.append(project_root)
+
+# 벤치마크는 외부 상태의 영향을 받지 않도록 In-Memory 체크포인터와 캐시 비활성화가 기본입니다.
+os.environ.setdefault("ENABLE_REDIS", "false")
+os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from common.config import Config
+from common.tracing import TracingCallback, latency_summary, reset_latency_samples
+
+DEFAULT_DATASETS = [
+    os.path.join(repo_root, "advanced_rag", "data", "retrieval.csv"),
+    os.path.join(repo_root, "advanced_rag", "data", "generation.csv"),
+]
+DEFAULT_OUTPUT_DIR = os.path.join(current_dir, "benchmarks")
+
+
+# --- Latency Distribution ---
+def parse_latency(spec: str):
+    """
+    지연 분포 문자열을 (rng -> seconds) 함수로 변환합니다.
+    - fixed:0.5
+    - uniform:0.2,1.0
+    - normal:0.8,0.2        (mean, std)
+    - lognormal:0.8,0.4     (median, sigma)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def _seeded_rng(seed: int, text: str) -> random.Random:
+    digest = hashlib.sha256(f"{seed}:{text}".encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+# --- Stub LLM ---
+STUB_ANSWER = (
+    "검색된 감사 사례를 종합하면, 해당 기관은 내부 통제 절차를 준수하지 않아 "
+    "주의 처분을 받았으며 관련 규정의 개선이 요구되었습니다. "
+)
+
+
+def stub_response(prompt: str) -> str:
+    """프롬프트 마커로 호출 노드를 식별하여 각 파서가 받아들이는 형식의 응답을 반환합니다."""
+    if "의도 분류기" in prompt:
+        return "deep | True"
+    if "selected_fields" in prompt:
+        return json.dumps(
+            {
+                "selected_fields": ["outline", "problems"],
+                "selected_fields_cot": ["stub"],
+                "limit": 5,
+                "sort": "relevance",
+            }
+        )
+    if "binary_score" in prompt:
+        return '{"binary_score": "yes"}'
+    if '"compliance"' in prompt:
+        return json.dumps(
+            {
+                "facts": {"subject": "-", "action": "-", "amount": "-", "date": "-"},
+                "compliance": {"status": "판단불가", "reasoning": "-", "matched_regulation": "-"},
+                "disposition": {"type": "-", "detail": "-"},
+            },
+            ensure_ascii=False,
+        )
+    if "missing_fields" in prompt:
+        return '{"status": "ready", "missing_fields": []}'
+    if "SQL" in prompt and "audits" in prompt:
+        return "SELECT * FROM audits ORDER BY date DESC LIMIT 3;"
+    return STUB_ANSWER * 4
+
+
+class StubChatModel(BaseChatModel):
+    """결정적 Stub LLM. 질문별로 고정된 지연 시간(분포에서 샘플)만큼 대기한 뒤 응답합니다."""
+
+    stub_name: str = "stub"
+    latency: str = "lognormal:0.8,0.4"
+    seed: int = 0
+    tokens_per_second: float = 60.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _prompt_text(self, messages) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _plan(self, messages):
+        prompt = self._prompt_text(messages)
+        rng = _seeded_rng(self.seed, self.stub_name + prompt)
+        text = stub_response(prompt)
+        usage = {
+            "input_tokens": len(prompt) // 2,
+            "output_tokens": len(text) // 2,
+            "total_tokens": len(prompt) // 2 + len(text) // 2,
+        }
+        return text, parse_latency(self.latency)(rng), usage
+
+    def _result(self, text: str, usage: dict) -> ChatResult:
+        message = AIMessage(content=text, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text, delay, usage = self._plan(messages)
+        time.sleep(delay)
+        return self._result(text, usage)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text, delay, usage = self._plan(messages)
+        await asyncio.sleep(delay)
+        return self._result(text, usage)
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i : i + 8] for i in range(0, len(text), 8)]
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, delay, usage = self._plan(messages)
+        time.sleep(delay)  # TTFT
+        for piece in self._chunks(text):
+            time.sleep(4 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, delay, usage = self._plan(messages)
+        await asyncio.sleep(delay)  # TTFT
+        for piece in self._chunks(text):
+            await asyncio.sleep(4 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+# --- Stub Embeddings / Reranker ---
+class StubEmbeddings(Embeddings):
+    """텍스트 해시 기반의 결정적 단위 벡터. 지연 시간만 실제 API와 비슷하게 흉내냅니다."""
+
+    def __init__(self, dim: int, latency: str, seed: int = 0):
+        self.dim = dim
+        self.latency = parse_latency(latency)
+        self.seed = seed
+
+    def _vector(self, text: str) -> List[float]:
+        rng = _seeded_rng(self.seed, text)
+        vec = [rng.gauss(0, 1) for _ in range(self.dim)]
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency(_seeded_rng(self.seed, text)))
+        return self._vector(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency(_seeded_rng(self.seed, text)))
+        return self._vector(text)
+
+
+class StubReranker:
+    """CrossEncoder 대체 (모델 다운로드 없이 실행할 때). 쌍 개수에 비례하는 고정 지연."""
+
+    def __init__(self, *args, seconds_per_pair: float = 0.004, **kwargs):
+        self.seconds_per_pair = seconds_per_pair
+
+    def predict(self, pairs):
+        time.sleep(self.seconds_per_pair * len(pairs))
+        return [1.0 / (i + 1) for i in range(len(pairs))]
+
+
+def detect_embedding_dim(collection_name: str, default: int) -> int:
+    """Milvus Lite 컬렉션 스키마에서 벡터 차원을 읽습니다."""
+    try:
+        from pymilvus import MilvusClient
+
+        client = MilvusClient(uri=Config.MILVUS_URI, token=Config.MILVUS_TOKEN)
+        desc = client.describe_collection(collection_name)
+        for field in desc.get("fields", []):
+            dim = (field.get("params") or {}).get("dim")
+            if dim:
+                return int(dim)
+    except Exception as e:
+        print(f"⚠️ Could not detect embedding dim ({e}). Using {default}.")
+    return default
+
+
+def install_stubs(args) -> None:
+    """ModelFactory(SQL LLM 포함) / 임베딩 / (선택) 리랭커를 Stub으로 교체합니다. graph 임포트 전에 호출해야 합니다."""
+    from common.model_factory import ModelFactory
+
+    def make_llm(name: str) -> StubChatModel:
+        return StubChatModel(
+            stub_name=name,
+            latency=args.llm_latency,
+            seed=args.seed,
+            callbacks=[TracingCallback(name)],
+        )
+
+    def get_rag_model(level="light", temperature=0.1, max_tokens=None, priority="interactive"):
+        return make_llm(f"stub-{level}")
+
+    def get_eval_model(level="light", temperature=0.0):
+        return make_llm(f"stub-eval-{level}")
+
+    ModelFactory.get_rag_model = staticmethod(get_rag_model)
+    ModelFactory.get_eval_model = staticmethod(get_eval_model)
+
+    sys.path.append(os.path.join(project_root, "rag", Config.ACTIVE_RAG_DIR))
+    from modules import vector_retriever
+
+    dim = detect_embedding_dim("audit_v10_collection", args.embedding_dim)
+    vector_retriever.ClovaXEmbeddings = lambda **kw: StubEmbeddings(
+        dim, args.embed_latency, seed=args.seed
+    )
+    if args.stub_reranker:
+        vector_retriever.CrossEncoder = StubReranker
+
+
+# --- Dataset ---
+def load_queries(paths: List[str], limit: Optional[int]) -> List[str]:
+    queries = []
+    seen = set()
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                q = (row.get("question") or "").strip()
+                if q and q not in seen:
+                    seen.add(q)
+                    queries.append(q)
+    return queries[:limit] if limit else queries
+
+
+# --- Measurement ---
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    values = sorted(values)
+
+    def pick(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    return {
+        "count": len(values),
+        "p50": round(pick(50), 4),
+        "p95": round(pick(95), 4),
+        "p99": round(pick(99), 4),
+        "mean": round(sum(values) / len(values), 4),
+    }
+
+
+def memory_mb() -> Dict[str, float]:
+    """현재 RSS와 최대 RSS (MB). /proc 또는 resource 모듈이 없으면 0."""
+    result = {"rss_mb": 0.0, "max_rss_mb": 0.0}
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        result["rss_mb"] = round(pages * os.sysconf("SC_PAGE_SIZE") / 1024**2, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB, macOS: bytes
+        divisor = 1024**2 if sys.platform == "darwin" else 1024
+        result["max_rss_mb"] = round(max_rss / divisor, 1)
+    except ImportError:
+        pass
+    return result
+
+
+async def replay(app, queries: List[str], concurrency: int, run_id: str) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int, query: str) -> Dict[str, Any]:
+        async with semaphore:
+            inputs = {
+                "query": query,
+                "messages": [{"role": "user", "content": query}],
+                "reflection_count": 0,
+            }
+            config = {
+                "configurable": {"thread_id": f"bench_{run_id}_{concurrency}_{i}"},
+                "recursion_limit": 50,
+            }
+            start = time.perf_counter()
+            error = None
+            try:
+                await app.ainvoke(inputs, config=config)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            return {"latency": time.perf_counter() - start, "error": error}
+
+    reset_latency_samples()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+    elapsed = time.perf_counter() - start
+
+    ok = [r["latency"] for r in results if not r["error"]]
+    errors = [r["error"] for r in results if r["error"]]
+    return {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "elapsed_sec": round(elapsed, 3),
+        "throughput_qps": round(len(ok) / elapsed, 4) if elapsed else 0.0,
+        "end_to_end": percentiles(ok),
+        "spans": latency_summary(),
+        "memory": memory_mb(),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return "unknown"
+
+
+# --- Report ---
+def print_run(run: Dict[str, Any]) -> None:
+    e2e = run["end_to_end"]
+    print(
+        f"\n📊 concurrency={run['concurrency']} | {run['throughput_qps']} q/s | "
+        f"e2e p50={e2e['p50']}s p95={e2e['p95']}s p99={e2e['p99']}s | "
+        f"errors={run['errors']} | rss={run['memory']['rss_mb']}MB"
+    )
+    for name, stats in run["spans"].items():
+        if name.startswith(("node.", "retrieval.", "checkpoint.")):
+            print(f"   {name:<32} p50={stats['p50']:<8} p95={stats['p95']:<8} p99={stats['p99']}")
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """같은 concurrency끼리 e2e / 노드별 p50, p95 변화율을 출력합니다."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\n🔍 Compare: {baseline.get('commit')} -> {current.get('commit')}")
+    base_runs = {r["concurrency"]: r for r in baseline.get("runs", [])}
+
+    def delta(new, old):
+        if not old:
+            return "   n/a"
+        return f"{(new - old) / old * 100:+6.1f}%"
+
+    for run in current["runs"]:
+        base = base_runs.get(run["concurrency"])
+        if not base:
+            continue
+        print(f"\n   [concurrency={run['concurrency']}]")
+        print(
+            f"   {'throughput':<32} {base['throughput_qps']:>8} -> {run['throughput_qps']:<8} {delta(run['throughput_qps'], base['throughput_qps'])}"
+        )
+        rows = [("end_to_end", base["end_to_end"], run["end_to_end"])]
+        rows += [
+            (name, base["spans"][name], stats)
+            for name, stats in run["spans"].items()
+            if name in base["spans"]
+        ]
+        for name, old, new in rows:
+            for p in ("p50", "p95"):
+                print(
+                    f"   {name + ' ' + p:<32} {old[p]:>8} -> {new[p]:<8} {delta(new[p], old[p])}"
+                )
+
+
+async def main(args) -> Dict[str, Any]:
+    install_stubs(args)
+
+    startup = time.perf_counter()
+    from graph import app
+    from modules.vector_retriever import get_retriever
+
+    # BM25 / Reranker 로딩은 측정 구간에서 제외합니다.
+    await asyncio.to_thread(get_retriever)
+    startup_sec = time.perf_counter() - startup
+
+    queries = load_queries(args.datasets, args.limit)
+    print(f"🚀 Replaying {len(queries)} queries (startup {startup_sec:.2f}s)")
+
+    if args.warmup:
+        await replay(app, queries[: args.warmup], 1, "warmup")
+
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    runs = []
+    for concurrency in args.concurrency:
+        run = await replay(app, queries, concurrency, run_id)
+        print_run(run)
+        runs.append(run)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "settings": {
+            "llm_latency": args.llm_latency,
+            "embed_latency": args.embed_latency,
+            "stub_reranker": args.stub_reranker,
+            "seed": args.seed,
+            "milvus_uri": Config.MILVUS_URI,
+            "checkpointer": "redis" if Config.ENABLE_REDIS else "memory",
+            "datasets": [os.path.relpath(p, repo_root) for p in args.datasets],
+        },
+        "startup_sec": round(startup_sec, 3),
+        "runs": runs,
+        "checkpointer_stats": getattr(app.checkpointer, "stats", None),
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"latency_{report['commit']}_{run_id}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved to {output_path}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="prism_rag replay latency benchmark")
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--limit", type=int, default=None, help="질문 수 제한")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[1, 4, 8],
+        help="동시 세션 수 목록 (예: 1,4,8)",
+    )
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--embed-latency", default="lognormal:0.05,0.3")
+    parser.add_argument("--embedding-dim", type=int, default=1024)
+    parser.add_argument("--stub-reranker", action="store_true", help="CrossEncoder 대신 Stub 사용")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    asyncio.run(main(parser.parse_args()))
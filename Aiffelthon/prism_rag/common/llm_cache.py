@@ -0,0 +1,153 @@
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from common.config import Config
+from common.logger_config import setup_logger
+from common.tracing import record_cache_lookup
+
+logger = setup_logger("LLM_CACHE")
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    (모델 + 파라미터) 문자열과 전체 프롬프트를 합쳐 SHA-256 키를 만듭니다.
+    llm_string에는 LangChain이 직렬화한 모델명, temperature, max_tokens 등이 포함됩니다.
+    """
+    raw = json.dumps([llm_string, prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache(BaseCache):
+    """프로세스 내 LRU 캐시 (Exact-Match). maxsize를 넘으면 가장 오래된 항목부터 제거합니다."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._store: "OrderedDict[str, RETURN_VAL_TYPE]" = OrderedDict()
+        self._lock = Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            value = self._store.get(key)
+            if value is not None:
+                self._store.move_to_end(key)
+        record_cache_lookup(value is not None)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            self._store[key] = return_val
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._store.clear()
+
+
+class SQLiteLLMCache(BaseCache):
+    """로컬 SQLite 파일 캐시. 평가(Evaluation) 재실행처럼 프로세스를 넘어 재사용할 때 사용합니다."""
+
+    def __init__(self, database_path: str):
+        import sqlite3
+
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.commit()
+        self._lock = Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        record_cache_lookup(row is not None)
+        return loads(row[0]) if row else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)",
+                (key, dumps(return_val)),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class RedisLLMCache(BaseCache):
+    """Redis 캐시. 여러 API 프로세스가 같은 캐시를 공유해야 할 때 사용합니다."""
+
+    def __init__(self, client, ttl: int = 86400, prefix: str = "llm_cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        data = self.client.get(self.prefix + make_cache_key(prompt, llm_string))
+        record_cache_lookup(data is not None)
+        return loads(data.decode("utf-8")) if data else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.client.set(
+            self.prefix + make_cache_key(prompt, llm_string),
+            dumps(return_val),
+            ex=self.ttl,
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+def build_llm_cache(backend: str) -> Optional[BaseCache]:
+    """Config.LLM_CACHE_BACKEND 값('memory' | 'sqlite' | 'redis' | 'none')에 맞는 캐시를 생성합니다."""
+    backend = (backend or "none").lower()
+
+    if backend == "memory":
+        return LRUCache(maxsize=Config.LLM_CACHE_MAXSIZE)
+
+    if backend == "sqlite":
+        return SQLiteLLMCache(Config.LLM_CACHE_SQLITE_PATH)
+
+    if backend == "redis":
+        try:
+            from common.redis_pool import get_redis
+
+            client = get_redis()
+            client.ping()
+            return RedisLLMCache(client, ttl=Config.LLM_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis LLM cache unavailable ({e}). Fallback to memory.")
+            return LRUCache(maxsize=Config.LLM_CACHE_MAXSIZE)
+
+    return None
+
+
+# --- Singleton ---
+_llm_cache_instance = None
+_llm_cache_initialized = False
+
+
+def get_llm_cache() -> Optional[BaseCache]:
+    global _llm_cache_instance, _llm_cache_initialized
+    if not _llm_cache_initialized:
+        _llm_cache_instance = build_llm_cache(Config.LLM_CACHE_BACKEND)
+        _llm_cache_initialized = True
+        logger.info(f"LLM Cache Backend: {Config.LLM_CACHE_BACKEND}")
+    return _llm_cache_instance
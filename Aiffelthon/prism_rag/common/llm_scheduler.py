@@ -0,0 +1,399 @@
+import asyncio
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("LLM_SCHEDULER")
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+# - interactive: 사용자 응답 경로 (Router, Generator, Rewriter ...)
+# - grading: 문서/답변 채점
+# - background: 대화 요약 등 응답 이후 작업
+# - eval: 오프라인 평가
+PRIORITIES = {"interactive": 0, "grading": 1, "background": 2, "eval": 3}
+
+# 대기 중 재확인 간격 상한 (초)
+POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """
+    프로세스 내 토큰 버킷.
+    - try_consume(n): 성공하면 0, 부족하면 기다려야 할 시간(초)을 반환합니다.
+    - debit(n): 실제 사용량을 사후 차감합니다 (잔량이 음수가 될 수 있음).
+    - deficit_wait(): 잔량이 음수면 회복까지 남은 시간(초)을 반환합니다.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._ts = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    def try_consume(self, n: float = 1) -> float:
+        with self._lock:
+            self._refill()
+            if self._tokens >= n:
+                self._tokens -= n
+                return 0.0
+            return (n - self._tokens) / self.rate
+
+    def debit(self, n: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens -= n
+
+    def deficit_wait(self) -> float:
+        with self._lock:
+            self._refill()
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def drain(self) -> None:
+        """429 응답 이후 잠시 호출을 멈추기 위해 버킷을 비웁니다."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+    # 비동기 경로 (메모리 버킷은 잠깐의 Lock만 잡으므로 그대로 호출합니다)
+    async def atry_consume(self, n: float = 1) -> float:
+        return self.try_consume(n)
+
+    async def adeficit_wait(self) -> float:
+        return self.deficit_wait()
+
+
+# mode: 'consume' | 'debit' | 'drain' | 'peek'
+_REDIS_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local cap = tonumber(ARGV[2])
+local n = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local mode = ARGV[5]
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or cap
+local ts = tonumber(data[2]) or now
+tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if mode == 'consume' then
+    if tokens >= n then tokens = tokens - n else wait = (n - tokens) / rate end
+elseif mode == 'debit' then
+    tokens = tokens - n
+elseif mode == 'drain' then
+    tokens = math.min(tokens, 0)
+elseif tokens < 0 then
+    wait = -tokens / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """
+    Redis 토큰 버킷 (Cross-Process). 여러 API 워커가 같은 CLOVA Studio 할당량을 나눠 쓸 때 사용합니다.
+    TokenBucket과 같은 인터페이스를 가지며, 갱신은 Lua 스크립트로 원자적으로 처리합니다.
+    비동기 경로(aacquire)는 이벤트 루프를 막지 않도록 공용 redis.asyncio 풀로 같은 스크립트를 실행합니다.
+    """
+
+    def __init__(self, client, key: str, rate: float, capacity: float):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self._script = client.register_script(_REDIS_BUCKET_LUA)
+        self._async_script = None
+
+    def _args(self, n: float, mode: str) -> list:
+        return [self.rate, self.capacity, n, time.time(), mode]
+
+    def _call(self, n: float, mode: str) -> float:
+        return float(self._script(keys=[self.key], args=self._args(n, mode)))
+
+    async def _acall(self, n: float, mode: str) -> float:
+        from common.redis_pool import get_async_redis
+
+        client = get_async_redis()
+        # 스크립트 객체는 클라이언트(이벤트 루프별 풀)에 묶이므로 클라이언트가 바뀌면 다시 등록합니다.
+        if self._async_script is None or self._async_script.registered_client is not client:
+            self._async_script = client.register_script(_REDIS_BUCKET_LUA)
+        return float(await self._async_script(keys=[self.key], args=self._args(n, mode)))
+
+    def try_consume(self, n: float = 1) -> float:
+        return self._call(n, "consume")
+
+    def debit(self, n: float) -> None:
+        self._call(n, "debit")
+
+    def deficit_wait(self) -> float:
+        return self._call(0, "peek")
+
+    def drain(self) -> None:
+        self._call(0, "drain")
+
+    async def atry_consume(self, n: float = 1) -> float:
+        return await self._acall(n, "consume")
+
+    async def adeficit_wait(self) -> float:
+        return await self._acall(0, "peek")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """SDK 예외가 429(rate limit) 응답인지 판별합니다. (임베딩 파이프라인의 적응형 QPS 조절용)"""
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    return status == 429 or "429" in str(error) or "rate limit" in str(error).lower()
+
+
+class LLMScheduler:
+    """
+    모델 하나에 대한 QPS/TPM 예산 + 우선순위 스케줄러.
+    - 호출 전: 자기보다 높은 우선순위의 대기자가 없고, TPM 잔량이 양수이고, QPS 토큰을 얻으면 통과합니다.
+    - 호출 후: 실제 토큰 사용량을 TPM 버킷에서 차감합니다 (UsageCallback).
+    - 429 응답: 버킷을 비워 잠시 모든 우선순위의 호출을 늦춥니다.
+    """
+
+    def __init__(self, name: str, qps: float, tpm: int, client=None):
+        self.name = name
+        if client is not None:
+            self.qps_bucket = RedisTokenBucket(
+                client, f"llm_rl:{name}:qps", qps, max(1.0, qps)
+            )
+            self.tpm_bucket = RedisTokenBucket(
+                client, f"llm_rl:{name}:tpm", tpm / 60.0, float(tpm)
+            )
+        else:
+            self.qps_bucket = TokenBucket(qps, max(1.0, qps))
+            self.tpm_bucket = TokenBucket(tpm / 60.0, float(tpm))
+
+        self._lock = Lock()
+        self._waiting = [0] * len(PRIORITIES)
+        self._stats = {
+            "acquired": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "rate_limited": 0,
+            "tokens_used": 0,
+        }
+
+    # --- 대기열 관리 ---
+    def _enter(self, priority: int) -> None:
+        with self._lock:
+            self._waiting[priority] += 1
+
+    def _leave(self, priority: int, waited: float, acquired: bool) -> None:
+        with self._lock:
+            self._waiting[priority] -= 1
+            if acquired:
+                self._stats["acquired"] += 1
+                self._stats["wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(
+                    self._stats["max_wait_seconds"], waited
+                )
+
+    def _try_acquire(self, priority: int) -> float:
+        """통과하면 0, 아니면 다시 시도하기까지의 대기 시간(초)."""
+        with self._lock:
+            higher_waiting = any(self._waiting[p] for p in range(priority))
+        if higher_waiting:
+            return POLL_INTERVAL
+        wait = self.tpm_bucket.deficit_wait()
+        if wait > 0:
+            return wait
+        return self.qps_bucket.try_consume(1)
+
+    async def _atry_acquire(self, priority: int) -> float:
+        """_try_acquire의 비동기 버전 (Redis 백엔드에서 이벤트 루프를 막지 않습니다)."""
+        with self._lock:
+            higher_waiting = any(self._waiting[p] for p in range(priority))
+        if higher_waiting:
+            return POLL_INTERVAL
+        wait = await self.tpm_bucket.adeficit_wait()
+        if wait > 0:
+            return wait
+        return await self.qps_bucket.atry_consume(1)
+
+    def acquire(self, priority: int, blocking: bool = True) -> bool:
+        start = time.monotonic()
+        self._enter(priority)
+        acquired = False
+        try:
+            while True:
+                wait = self._try_acquire(priority)
+                if wait <= 0:
+                    acquired = True
+                    return True
+                if not blocking:
+                    return False
+                time.sleep(min(wait, POLL_INTERVAL * 4))
+        finally:
+            self._leave(priority, time.monotonic() - start, acquired)
+
+    async def aacquire(self, priority: int, blocking: bool = True) -> bool:
+        start = time.monotonic()
+        self._enter(priority)
+        acquired = False
+        try:
+            while True:
+                wait = await self._atry_acquire(priority)
+                if wait <= 0:
+                    acquired = True
+                    return True
+                if not blocking:
+                    return False
+                await asyncio.sleep(min(wait, POLL_INTERVAL * 4))
+        finally:
+            self._leave(priority, time.monotonic() - start, acquired)
+
+    # --- 사후 피드백 ---
+    def record_usage(self, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        self.tpm_bucket.debit(tokens)
+        with self._lock:
+            self._stats["tokens_used"] += tokens
+
+    def record_rate_limited(self) -> None:
+        logger.warning(f"⚠️ [{self.name}] 429 Rate Limited. Cooling down.")
+        self.qps_bucket.drain()
+        self.tpm_bucket.drain()
+        self.tpm_bucket.debit(Config.LLM_RATE_LIMIT_COOLDOWN * self.tpm_bucket.rate)
+        with self._lock:
+            self._stats["rate_limited"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            depth = {name: self._waiting[p] for name, p in PRIORITIES.items()}
+        acquired = stats["acquired"] or 1
+        stats["avg_wait_seconds"] = round(stats["wait_seconds"] / acquired, 4)
+        stats["queue_depth"] = depth
+        return stats
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """LangChain rate_limiter 인터페이스 어댑터. 모델 인스턴스마다 고정 우선순위를 가집니다."""
+
+    def __init__(self, scheduler: LLMScheduler, priority: str = "interactive"):
+        self.scheduler = scheduler
+        self.priority = PRIORITIES.get(priority, PRIORITIES["interactive"])
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.scheduler.acquire(self.priority, blocking=blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        return await self.scheduler.aacquire(self.priority, blocking=blocking)
+
+
+class UsageCallback(BaseCallbackHandler):
+    """
+    LLM 응답의 실제 토큰 사용량을 TPM 버킷에 반영합니다.
+    429는 ModelFactory HTTP 풀의 응답 훅이 (SDK 재시도 중간 응답까지) 알리므로 여기서는 다시 알리지 않습니다.
+    """
+
+    def __init__(self, scheduler: LLMScheduler):
+        self.scheduler = scheduler
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        tokens = 0
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            tokens = usage.get("total_tokens", 0) or 0
+        else:
+            # Streaming 응답은 llm_output이 비어 있으므로 메시지의 usage_metadata를 확인합니다.
+            for gens in response.generations:
+                for gen in gens:
+                    meta = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                    if meta:
+                        tokens += meta.get("total_tokens", 0)
+        self.scheduler.record_usage(tokens)
+
+
+def retryable_errors() -> tuple:
+    """지수 백오프(Jitter)로 재시도할 예외 목록 (429, 5xx, 연결 오류)."""
+    errors = []
+    try:
+        import openai
+
+        errors += [openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError]
+    except ImportError:
+        pass
+    try:
+        import httpx
+
+        errors += [httpx.TransportError]
+    except ImportError:
+        pass
+    return tuple(errors) or (Exception,)
+
+
+# --- Registry (Singleton per model) ---
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = Lock()
+_redis_client = None
+
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        from common.redis_pool import get_redis
+
+        client = get_redis()
+        client.ping()
+        _redis_client = client
+    return _redis_client
+
+
+def get_scheduler(name: str, budget: str) -> Optional[LLMScheduler]:
+    """
+    모델 이름별 스케줄러를 반환합니다. budget은 Config.LLM_RATE_LIMITS의 키입니다.
+    LLM_RATE_LIMIT_BACKEND가 'none'이면 None을 반환합니다.
+    """
+    backend = (Config.LLM_RATE_LIMIT_BACKEND or "none").lower()
+    if backend == "none":
+        return None
+
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(name)
+            if scheduler is None:
+                limits = Config.LLM_RATE_LIMITS.get(budget, Config.LLM_RATE_LIMITS["light"])
+                client = None
+                if backend == "redis":
+                    try:
+                        client = _get_redis_client()
+                    except Exception as e:
+                        logger.warning(
+                            f"⚠️ Redis rate limiter unavailable ({e}). Fallback to memory."
+                        )
+                scheduler = LLMScheduler(name, limits["qps"], limits["tpm"], client=client)
+                _schedulers[name] = scheduler
+                logger.info(
+                    f"Scheduler Ready: {name} (qps={limits['qps']}, tpm={limits['tpm']}, backend={'redis' if client else 'memory'})"
+                )
+    return scheduler
+
+
+def report_rate_limited(name: Optional[str]) -> None:
+    """HTTP 응답 훅용: 모델 이름으로 스케줄러를 찾아 429를 알립니다 (스케줄러가 없으면 무시)."""
+    scheduler = _schedulers.get(name) if name else None
+    if scheduler is not None:
+        scheduler.record_rate_limited()
+
+
+def scheduler_metrics() -> Dict[str, Dict[str, Any]]:
+    """모든 모델 스케줄러의 대기열 깊이 / 대기 시간 / 429 횟수."""
+    return {name: s.metrics() for name, s in list(_schedulers.items())}
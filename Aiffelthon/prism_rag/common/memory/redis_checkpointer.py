@@ -1,30 +1,380 @@
-import pickle
-from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
     BaseCheckpointSaver,
+    ChannelVersions,
     Checkpoint,
     CheckpointMetadata,
     CheckpointTuple,
+    get_checkpoint_metadata,
 )
 from redis import Redis
 
+from common.logger_config import setup_logger
+from common.redis_pool import get_async_redis, get_redis
+from common.tracing import span
+
+logger = setup_logger("REDIS_CHECKPOINTER")
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 이보다 작은 payload는 압축하지 않습니다 (압축 헤더 비용 > 이득).
+COMPRESS_MIN_BYTES = 1024
+
+# Document 리스트를 담는 채널. 문서는 본문 대신 전역 문서 키(ckpt_doc:...)로 참조합니다.
+DOC_CHANNELS = {"documents", "persist_documents"}
+DOC_REF = "__doc_ref__"
+
+# 값이 비워진 채널의 blob 표시
+EMPTY_BLOB = b"empty\n"
+
+# 프로세스 내 문서 캐시 크기 (문서 키 -> Document)
+DOC_CACHE_SIZE = 4096
+
+# 최신(또는 지정된) 체크포인트 + 채널 blob + pending writes 조회와 TTL 갱신을 한 번의 왕복으로 처리합니다.
+# KEYS[1] = history ZSET
+# ARGV = [checkpoint key prefix, writes key prefix, blob key prefix, checkpoint_id or "", ttl]
+# 체크포인트 hash의 'versions' 필드는 "channel\tversion" 줄 목록입니다.
+_GET_TUPLE_LUA = """
+local id = ARGV[4]
+if id == '' then
+    local latest = redis.call('ZREVRANGEBYLEX', KEYS[1], '+', '-', 'LIMIT', 0, 1)
+    if #latest == 0 then return nil end
+    id = latest[1]
+end
+local ckey = ARGV[1] .. id
+local data = redis.call('HGETALL', ckey)
+if #data == 0 then return nil end
+local ttl = tonumber(ARGV[5])
+local versions = redis.call('HGET', ckey, 'versions') or ''
+local blobs = {}
+for line in string.gmatch(versions, '[^\\n]+') do
+    local tab = string.find(line, '\\t', 1, true)
+    local channel = string.sub(line, 1, tab - 1)
+    local bkey = ARGV[3] .. channel .. ':' .. string.sub(line, tab + 1)
+    local value = redis.call('GET', bkey)
+    if value then
+        redis.call('EXPIRE', bkey, ttl)
+        table.insert(blobs, channel)
+        table.insert(blobs, value)
+    end
+end
+local wkey = ARGV[2] .. id
+local writes = redis.call('HGETALL', wkey)
+redis.call('EXPIRE', ckey, ttl)
+redis.call('EXPIRE', KEYS[1], ttl)
+if #writes > 0 then redis.call('EXPIRE', wkey, ttl) end
+return {id, data, writes, blobs}
+"""
+
+
+def _pairs(flat: List[bytes]) -> Dict[str, bytes]:
+    """HGETALL의 [field, value, field, value, ...] 응답을 dict로 변환합니다."""
+    return {flat[i].decode(): flat[i + 1] for i in range(0, len(flat), 2)}
 
-class RedisSaver(BaseCheckpointSaver):
-    """A checkpoint saver that stores checkpoints in a Redis database."""
 
-    def __init__(self, client: Redis, ttl: int = 86400):
+class RedisSaver(BaseCheckpointSaver):
+    """
+    A checkpoint saver that stores checkpoints in a Redis database.
+
+    - 직렬화: LangGraph serde(msgpack) + zstd 압축 (pickle 미사용)
+    - Delta 저장: 채널 값은 (channel, version) 단위 blob으로 한 번만 저장하고,
+      체크포인트 hash에는 채널 값 없이 버전 목록만 기록합니다. (변경되지 않은 채널은 재전송하지 않음)
+    - 문서 채널(documents, persist_documents)의 Document는 내용 해시 기반 전역 키로 한 번만 저장하고 참조합니다.
+    - get_tuple: Lua 스크립트 1회 (최신 ID 조회 + 체크포인트 + 채널 blob + pending writes + TTL 갱신)
+    - put / put_writes: MULTI 파이프라인 1회
+    - async 메서드(aget_tuple, alist, aput, ...)는 redis.asyncio 공용 풀을 직접 사용합니다 (스레드 풀 미사용).
+    - Compaction: 스레드별 최근 keep_last개 체크포인트만 남기고, 더 이상 참조되지 않는 채널 blob과 함께 삭제합니다.
+    - 스레드별 ZSET(ckpt_history)로 list(before=, limit=) 지원
+    """
+
+    def __init__(
+        self,
+        client: Optional[Redis] = None,
+        aclient=None,
+        ttl: int = 86400,
+        compress: bool = True,
+        keep_last: int = 0,
+    ):
         super().__init__()
-        self.client = client
+        self.client = client if client is not None else get_redis()
+        # None이면 이벤트 루프별 공용 풀(common.redis_pool)을 사용합니다.
+        self._aclient = aclient
+        self._aget_script = None
         self.ttl = ttl
+        # 0이면 compaction을 하지 않습니다 (TTL로만 만료).
+        self.keep_last = keep_last
+        # 이 프로세스에서 put이 발생한 (thread_id, ns). 백그라운드 compactor가 비웁니다.
+        self._dirty: set = set()
+        self.compress = compress and zstandard is not None
+        self._compressor = zstandard.ZstdCompressor(level=3) if self.compress else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self._get_script = self.client.register_script(_GET_TUPLE_LUA)
+
+        # 문서 키 -> (Document, 마지막 저장 시각). 같은 문서를 TTL/2 안에 다시 보내지 않습니다.
+        self._doc_cache: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._doc_lock = Lock()
+        self.stats = {
+            "bytes_written": 0,
+            "blobs_written": 0,
+            "docs_written": 0,
+            "docs_deduplicated": 0,
+            "checkpoints_compacted": 0,
+        }
+
+    @property
+    def aclient(self):
+        return self._aclient if self._aclient is not None else get_async_redis()
+
+    # --- Key Schema ---
+    @staticmethod
+    def _ids(config: RunnableConfig) -> Tuple[str, str, Optional[str]]:
+        configurable = config["configurable"]
+        return (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable.get("checkpoint_id"),
+        )
+
+    @staticmethod
+    def _checkpoint_prefix(thread_id: str, ns: str) -> str:
+        return f"ckpt:{thread_id}:{ns}:"
+
+    @staticmethod
+    def _writes_prefix(thread_id: str, ns: str) -> str:
+        return f"ckpt_writes:{thread_id}:{ns}:"
+
+    @staticmethod
+    def _history_key(thread_id: str, ns: str) -> str:
+        return f"ckpt_history:{thread_id}:{ns}"
+
+    @staticmethod
+    def _blob_prefix(thread_id: str, ns: str) -> str:
+        return f"ckpt_blob:{thread_id}:{ns}:"
+
+    @staticmethod
+    def _doc_key(doc: Any) -> str:
+        """문서 내용 + 메타데이터 해시. idx를 앞에 붙여 사람이 읽을 수 있게 합니다."""
+        metadata = getattr(doc, "metadata", {}) or {}
+        raw = doc.page_content + "\x00" + repr(sorted(metadata.items()))
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+        return f"ckpt_doc:{metadata.get('idx', 'x')}:{digest}"
+
+    # --- Serialization ---
+    def _dump(self, obj: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(obj)
+        if self.compress and len(data) >= COMPRESS_MIN_BYTES:
+            data = self._compressor.compress(data)
+            type_ += "+zstd"
+        return type_.encode() + b"\n" + data
+
+    def _load(self, blob: bytes) -> Any:
+        type_, _, data = blob.partition(b"\n")
+        type_ = type_.decode()
+        if type_.endswith("+zstd"):
+            data = self._decompressor.decompress(data)
+            type_ = type_[: -len("+zstd")]
+        return self.serde.loads_typed((type_, data))
+
+    # --- Document References ---
+    def _externalize(self, channel: str, value: Any, pipe) -> Any:
+        """문서 채널의 Document를 참조로 바꾸고, 아직 보내지 않은 문서만 파이프라인에 추가합니다."""
+        if channel not in DOC_CHANNELS or not isinstance(value, list):
+            return value
+
+        now = time.monotonic()
+        refs = []
+        for item in value:
+            if not hasattr(item, "page_content"):
+                refs.append(item)
+                continue
+            key = self._doc_key(item)
+            with self._doc_lock:
+                cached = self._doc_cache.get(key)
+                fresh = cached is not None and now - cached[1] < self.ttl / 2
+                self._doc_cache[key] = (item, now if not fresh else cached[1])
+                self._doc_cache.move_to_end(key)
+                while len(self._doc_cache) > DOC_CACHE_SIZE:
+                    self._doc_cache.popitem(last=False)
+            if fresh:
+                # 본문은 다시 보내지 않지만, 참조하는 체크포인트보다 먼저 만료되지 않도록 TTL은 갱신합니다.
+                pipe.expire(key, self.ttl)
+                self.stats["docs_deduplicated"] += 1
+            else:
+                blob = self._dump(item)
+                pipe.set(key, blob, ex=self.ttl)
+                self.stats["docs_written"] += 1
+                self.stats["bytes_written"] += len(blob)
+            refs.append({DOC_REF: key})
+        return refs
+
+    def _collect_refs(self, value: Any, refs: set) -> None:
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict) and DOC_REF in item:
+                    refs.add(item[DOC_REF])
+
+    def _cached_docs(self, refs: set) -> Tuple[Dict[str, Any], List[str]]:
+        """프로세스 캐시에서 찾은 문서와, Redis에서 가져와야 할 문서 키 목록."""
+        resolved = {}
+        with self._doc_lock:
+            for key in refs:
+                cached = self._doc_cache.get(key)
+                if cached is not None:
+                    resolved[key] = cached[0]
+        return resolved, [key for key in refs if key not in resolved]
+
+    def _cache_fetched(
+        self, resolved: Dict[str, Any], missing: List[str], blobs: List[Optional[bytes]]
+    ) -> Dict[str, Any]:
+        now = time.monotonic()
+        for key, blob in zip(missing, blobs):
+            if blob is None:
+                continue
+            doc = self._load(blob)
+            resolved[key] = doc
+            with self._doc_lock:
+                self._doc_cache[key] = (doc, now)
+        return resolved
+
+    def _refs_pipeline(self, pipe, refs: set, missing: List[str]):
+        """
+        프로세스 캐시에 없는 문서의 MGET과 참조된 모든 문서 키의 TTL 갱신을 한 파이프라인에 담습니다.
+        (체크포인트 / blob TTL은 _GET_TUPLE_LUA가 갱신하므로 문서 키도 읽을 때 함께 연장합니다.)
+        """
+        if missing:
+            pipe.mget(missing)
+        for key in refs:
+            pipe.expire(key, self.ttl)
+        return pipe
+
+    def _resolve_refs(self, refs: set) -> Dict[str, Any]:
+        """문서 참조를 Document로 바꿉니다. 프로세스 캐시에 없는 것만 가져오며, 왕복은 1회입니다."""
+        resolved, missing = self._cached_docs(refs)
+        if refs:
+            pipe = self._refs_pipeline(self.client.pipeline(transaction=False), refs, missing)
+            results = pipe.execute()
+            if missing:
+                self._cache_fetched(resolved, missing, results[0])
+        return resolved
+
+    async def _aresolve_refs(self, refs: set) -> Dict[str, Any]:
+        resolved, missing = self._cached_docs(refs)
+        if refs:
+            pipe = self._refs_pipeline(self.aclient.pipeline(transaction=False), refs, missing)
+            results = await pipe.execute()
+            if missing:
+                self._cache_fetched(resolved, missing, results[0])
+        return resolved
+
+    @staticmethod
+    def _internalize(value: Any, docs: Dict[str, Any]) -> Any:
+        if not isinstance(value, list):
+            return value
+        return [
+            docs[item[DOC_REF]] if isinstance(item, dict) and DOC_REF in item else item
+            for item in value
+            if not (isinstance(item, dict) and DOC_REF in item and item[DOC_REF] not in docs)
+        ]
+
+    def _decode(
+        self, writes: Dict[str, bytes], blobs: Dict[str, bytes]
+    ) -> Tuple[Dict[str, Any], List[Tuple[str, str, Any]], set]:
+        """채널 blob / pending writes를 역직렬화하고, 풀어야 할 문서 참조를 모읍니다."""
+        channel_values = {
+            channel: self._load(blob)
+            for channel, blob in blobs.items()
+            if blob != EMPTY_BLOB
+        }
+        raw_writes = []
+        for field in sorted(writes, key=lambda f: (f.rsplit(":", 1)[0], int(f.rsplit(":", 1)[1]))):
+            task_id = field.rsplit(":", 1)[0]
+            channel, value = self._load(writes[field])
+            raw_writes.append((task_id, channel, value))
+
+        refs = set()
+        for channel in DOC_CHANNELS:
+            self._collect_refs(channel_values.get(channel), refs)
+        for _, channel, value in raw_writes:
+            if channel in DOC_CHANNELS:
+                self._collect_refs(value, refs)
+        return channel_values, raw_writes, refs
+
+    def _to_tuple(
+        self,
+        thread_id: str,
+        ns: str,
+        checkpoint_id: str,
+        fields: Dict[str, bytes],
+        channel_values: Dict[str, Any],
+        raw_writes: List[Tuple[str, str, Any]],
+        docs: Dict[str, Any],
+    ) -> CheckpointTuple:
+        parent_id = fields.get("parent", b"").decode()
+
+        for channel in DOC_CHANNELS:
+            if channel in channel_values:
+                channel_values[channel] = self._internalize(channel_values[channel], docs)
+        pending_writes = [
+            (task_id, channel, self._internalize(value, docs) if channel in DOC_CHANNELS else value)
+            for task_id, channel, value in raw_writes
+        ]
+
+        checkpoint = self._load(fields["checkpoint"])
+        checkpoint["channel_values"] = channel_values
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self._load(fields["metadata"]),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    # --- Read ---
+    def _get_args(self, config: RunnableConfig) -> Tuple[str, str, List[str], List[Any]]:
+        thread_id, ns, checkpoint_id = self._ids(config)
+        keys = [self._history_key(thread_id, ns)]
+        args = [
+            self._checkpoint_prefix(thread_id, ns),
+            self._writes_prefix(thread_id, ns),
+            self._blob_prefix(thread_id, ns),
+            checkpoint_id or "",
+            self.ttl,
+        ]
+        return thread_id, ns, keys, args
 
     def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         """Get a checkpoint tuple from the database.
 
-        This method retrieves a checkpoint tuple from the Redis database based on the
-        provided config. If the config contains a "checkpoint_id", the checkpoint with
-        the matching thread ID and checkpoint ID is retrieved. Otherwise, the latest
-        checkpoint for the given thread ID is retrieved.
+        If the config contains a "checkpoint_id", that checkpoint is retrieved.
+        Otherwise, the latest checkpoint for the thread (last member of the history ZSET)
+        is retrieved. Lookup, pending writes and TTL refresh happen in a single Lua call.
 
         Args:
             config (RunnableConfig): The config to use for retrieving the checkpoint.
@@ -33,68 +383,86 @@ class RedisSaver(BaseCheckpointSaver):
             Optional[CheckpointTuple]: The retrieved checkpoint tuple, or None if no
             matching checkpoint is found.
         """
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_id = config["configurable"].get("checkpoint_id")
+        thread_id, ns, keys, args = self._get_args(config)
 
-        if checkpoint_id:
-            key = f"checkpoint:{thread_id}:{checkpoint_id}"
-            data = self.client.get(key)
-        else:
-            # Get latest
-            # We store the latest checkpoint ID in a separate key or use a sorted set.
-            # Simple approach: We track the "latest" ID for a thread.
-            latest_key = f"checkpoint_latest:{thread_id}"
-            latest_id = self.client.get(latest_key)
-            if not latest_id:
+        with span("checkpoint", "get_tuple"):
+            result = self._get_script(keys=keys, args=args)
+            if not result:
                 return None
-            key = f"checkpoint:{thread_id}:{latest_id.decode()}"
-            data = self.client.get(key)
-
-            # Refresh TTL for latest pointer on read
-            if latest_id:
-                self.client.expire(latest_key, self.ttl)
-                self.client.expire(key, self.ttl)
-
-        if not data:
-            return None
-
-        # Deserialize
-        checkpoint, metadata, parent_config = pickle.loads(data)
-
-        # Construct config for this checkpoint
-        checkpoint_config = {
-            "configurable": {
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint["id"],
-            }
-        }
 
-        return CheckpointTuple(
-            config=checkpoint_config,
-            checkpoint=checkpoint,
-            metadata=metadata,
-            parent_config=parent_config,
-        )
+            found_id, data, writes, blobs = result
+            fields = _pairs(data)
+            channel_values, raw_writes, refs = self._decode(_pairs(writes), _pairs(blobs))
+            docs = self._resolve_refs(refs) if refs else {}
+            return self._to_tuple(
+                thread_id, ns, found_id.decode(), fields, channel_values, raw_writes, docs
+            )
 
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
-        """Async version of get_tuple."""
-        import asyncio
-
-        return await asyncio.to_thread(self.get_tuple, config)
-
-    async def aput(
-        self,
-        config: RunnableConfig,
-        checkpoint: Checkpoint,
-        metadata: CheckpointMetadata,
-        new_versions: Dict[str, Any],
-    ) -> RunnableConfig:
-        """Async version of put."""
-        import asyncio
+        """Async version of get_tuple (redis.asyncio, no executor thread)."""
+        thread_id, ns, keys, args = self._get_args(config)
+        aclient = self.aclient
+        if self._aget_script is None:
+            self._aget_script = aclient.register_script(_GET_TUPLE_LUA)
+
+        with span("checkpoint", "get_tuple"):
+            result = await self._aget_script(keys=keys, args=args, client=aclient)
+            if not result:
+                return None
 
-        return await asyncio.to_thread(
-            self.put, config, checkpoint, metadata, new_versions
-        )
+            found_id, data, writes, blobs = result
+            fields = _pairs(data)
+            channel_values, raw_writes, refs = self._decode(_pairs(writes), _pairs(blobs))
+            docs = await self._aresolve_refs(refs) if refs else {}
+            return self._to_tuple(
+                thread_id, ns, found_id.decode(), fields, channel_values, raw_writes, docs
+            )
+
+    @staticmethod
+    def _list_range(before: Optional[RunnableConfig], filter, remaining) -> Tuple[str, Dict]:
+        upper = "+"
+        if before is not None:
+            upper = "(" + before["configurable"]["checkpoint_id"]
+        # metadata 필터가 있으면 필터 후 limit을 적용해야 하므로 전체를 읽습니다.
+        fetch = None if filter else remaining
+        return upper, ({"start": 0, "num": fetch} if fetch is not None else {})
+
+    @staticmethod
+    def _history_target(key: bytes) -> Tuple[str, str]:
+        parts = key.decode().split(":", 2)[1:]
+        return parts[0], parts[1] if len(parts) > 1 else ""
+
+    def _queue_rows(self, pipe, thread_id: str, ns: str, ids: List[bytes]) -> None:
+        for cid in ids:
+            pipe.hgetall(self._checkpoint_prefix(thread_id, ns) + cid.decode())
+            pipe.hgetall(self._writes_prefix(thread_id, ns) + cid.decode())
+
+    def _queue_blobs(self, pipe, thread_id: str, ns: str, rows: List[Dict]) -> List[List[str]]:
+        """체크포인트별 버전 목록으로 채널 blob MGET을 파이프라인에 넣고, 채널 이름 목록을 반환합니다."""
+        blob_channels = []
+        for i in range(len(rows) // 2):
+            channels = self._versions(rows[2 * i].get(b"versions", b""))
+            blob_channels.append([ch for ch, _ in channels])
+            pipe.mget(
+                [self._blob_prefix(thread_id, ns) + f"{ch}:{ver}" for ch, ver in channels]
+                or [self._blob_prefix(thread_id, ns)]
+            )
+        return blob_channels
+
+    def _decode_rows(
+        self, ids: List[bytes], rows: List[Dict], blob_channels: List[List[str]], blob_rows: List
+    ) -> Iterator[Tuple[str, Dict[str, bytes], Tuple]]:
+        for i, cid in enumerate(ids):
+            fields = {k.decode(): v for k, v in rows[2 * i].items()}
+            if not fields:
+                continue
+            writes = {k.decode(): v for k, v in rows[2 * i + 1].items()}
+            blobs = {
+                ch: blob
+                for ch, blob in zip(blob_channels[i], blob_rows[i])
+                if blob is not None
+            }
+            yield cid.decode(), fields, self._decode(writes, blobs)
 
     def list(
         self,
@@ -104,98 +472,375 @@ class RedisSaver(BaseCheckpointSaver):
         before: Optional[RunnableConfig] = None,
         limit: Optional[int] = None,
     ) -> Iterator[CheckpointTuple]:
-        """List checkpoints from the database.
+        """List checkpoints from the database, newest first.
 
-        For simplicity in this PoC, we might just return empty or recent.
-        Full implementation requires Sorted Sets in Redis (ZSET).
+        Checkpoint IDs are time-ordered (UUIDv6), so the history ZSET is kept with a
+        constant score and traversed lexicographically (ZREVRANGEBYLEX).
         """
-        # Placeholder for full history listing
-        # If we need history, we should implement ZRANGE logic.
-        # For now, we focus on get/put for basic persistence.
-        yield from []
+        if config is None:
+            targets = [
+                self._history_target(key)
+                for key in self.client.scan_iter(match="ckpt_history:*")
+            ]
+        else:
+            thread_id, ns, _ = self._ids(config)
+            targets = [(thread_id, ns)]
+
+        remaining = limit
+        for thread_id, ns in targets:
+            upper, args = self._list_range(before, filter, remaining)
+            ids = self.client.zrevrangebylex(
+                self._history_key(thread_id, ns), upper, "-", **args
+            )
+            if not ids:
+                continue
+
+            pipe = self.client.pipeline(transaction=False)
+            self._queue_rows(pipe, thread_id, ns, ids)
+            rows = pipe.execute()
+
+            # 채널 blob은 체크포인트의 버전 목록을 읽은 뒤 한 번의 파이프라인으로 가져옵니다.
+            blob_pipe = self.client.pipeline(transaction=False)
+            blob_channels = self._queue_blobs(blob_pipe, thread_id, ns, rows)
+            blob_rows = blob_pipe.execute()
+
+            for cid, fields, (channel_values, raw_writes, refs) in self._decode_rows(
+                ids, rows, blob_channels, blob_rows
+            ):
+                docs = self._resolve_refs(refs) if refs else {}
+                item = self._to_tuple(
+                    thread_id, ns, cid, fields, channel_values, raw_writes, docs
+                )
+                if filter and not all(
+                    item.metadata.get(k) == v for k, v in filter.items()
+                ):
+                    continue
+                yield item
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining <= 0:
+                        return
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async version of list. Checkpoints are streamed as they are decoded."""
+        aclient = self.aclient
+        if config is None:
+            targets = [
+                self._history_target(key)
+                async for key in aclient.scan_iter(match="ckpt_history:*")
+            ]
+        else:
+            thread_id, ns, _ = self._ids(config)
+            targets = [(thread_id, ns)]
+
+        remaining = limit
+        for thread_id, ns in targets:
+            upper, args = self._list_range(before, filter, remaining)
+            ids = await aclient.zrevrangebylex(
+                self._history_key(thread_id, ns), upper, "-", **args
+            )
+            if not ids:
+                continue
+
+            pipe = aclient.pipeline(transaction=False)
+            self._queue_rows(pipe, thread_id, ns, ids)
+            rows = await pipe.execute()
+
+            blob_pipe = aclient.pipeline(transaction=False)
+            blob_channels = self._queue_blobs(blob_pipe, thread_id, ns, rows)
+            blob_rows = await blob_pipe.execute()
+
+            for cid, fields, (channel_values, raw_writes, refs) in self._decode_rows(
+                ids, rows, blob_channels, blob_rows
+            ):
+                docs = await self._aresolve_refs(refs) if refs else {}
+                item = self._to_tuple(
+                    thread_id, ns, cid, fields, channel_values, raw_writes, docs
+                )
+                if filter and not all(
+                    item.metadata.get(k) == v for k, v in filter.items()
+                ):
+                    continue
+                yield item
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining <= 0:
+                        return
+
+    # --- Write ---
+    @staticmethod
+    def _versions(raw: bytes) -> List[Tuple[str, str]]:
+        text = raw.decode() if isinstance(raw, bytes) else (raw or "")
+        return [tuple(line.split("\t", 1)) for line in text.split("\n") if line]
+
+    def _queue_put(
+        self,
+        pipe,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """put / aput 공통: 채널 blob, 체크포인트 hash, history ZSET 명령을 파이프라인에 넣습니다."""
+        thread_id, ns, parent_id = self._ids(config)
+        checkpoint_id = checkpoint["id"]
+        key = self._checkpoint_prefix(thread_id, ns) + checkpoint_id
+        history_key = self._history_key(thread_id, ns)
+        blob_prefix = self._blob_prefix(thread_id, ns)
+        values = checkpoint["channel_values"]
+
+        for channel, version in new_versions.items():
+            if channel in values:
+                blob = self._dump(self._externalize(channel, values[channel], pipe))
+            else:
+                blob = EMPTY_BLOB
+            pipe.set(blob_prefix + f"{channel}:{version}", blob, ex=self.ttl)
+            self.stats["blobs_written"] += 1
+            self.stats["bytes_written"] += len(blob)
+
+        skeleton = {**checkpoint, "channel_values": {}}
+        versions = "\n".join(
+            f"{channel}\t{version}"
+            for channel, version in checkpoint["channel_versions"].items()
+        )
+        mapping = {
+            "checkpoint": self._dump(skeleton),
+            "metadata": self._dump(get_checkpoint_metadata(config, metadata)),
+            "parent": parent_id or "",
+            "versions": versions,
+        }
+        self.stats["bytes_written"] += sum(len(v) for v in mapping.values())
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.ttl)
+        pipe.zadd(history_key, {checkpoint_id: 0})
+        pipe.expire(history_key, self.ttl)
+        if self.keep_last > 0:
+            self._dirty.add((thread_id, ns))
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
 
     def put(
         self,
         config: RunnableConfig,
         checkpoint: Checkpoint,
         metadata: CheckpointMetadata,
-        new_versions: Dict[str, Any],
+        new_versions: ChannelVersions,
     ) -> RunnableConfig:
         """Save a checkpoint to the database.
 
-        This method saves a checkpoint to the Redis database. The checkpoint is associated
-        with the provided config and strictly monotonically increasing checkpoint ID.
+        Only channels listed in new_versions are written, each as an immutable
+        (channel, version) blob; the checkpoint hash itself carries no channel values,
+        just the version list used to reassemble them. Everything goes out in a single
+        MULTI/EXEC pipeline. Only the parent checkpoint ID is stored (not the runtime config),
+        so non-serializable objects injected into config never reach Redis.
 
         Args:
             config (RunnableConfig): The config to associate with the checkpoint.
             checkpoint (Checkpoint): The checkpoint to save.
             metadata (CheckpointMetadata): The metadata to associate with the checkpoint.
-            new_versions (Dict[str, Any]): New versions of the state keys.
+            new_versions (ChannelVersions): New versions of the state keys.
 
         Returns:
             RunnableConfig: The updated config containing the saved checkpoint ID.
         """
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_id = checkpoint["id"]
-
-        # Filter config to remove unpicklable objects (like callbacks, streams)
-        # We only strictly need 'configurable' to restore context.
-        # STRIOT FILTERING: Only keep known safe keys.
-        safe_keys = {"thread_id", "checkpoint_ns", "checkpoint_id"}
-        safe_configurable = {
-            k: v for k, v in config.get("configurable", {}).items() if k in safe_keys
-        }
-        saved_config = {"configurable": safe_configurable}
-
-        # Serialize everything using the sanitized config
-        try:
-            data = pickle.dumps((checkpoint, metadata, saved_config))
-        except TypeError as e:
-            print(f"❌ Pickle Error: {e}")
-            # Fallback: Try saving without config if it still fails (though unlikely)
-            # Or inspect checkpoint for issues.
-            # For now, just re-raise with context
-            raise e
-
-        # Save exact checkpoint
-        key = f"checkpoint:{thread_id}:{checkpoint_id}"
-        self.client.set(key, data, ex=self.ttl)
-
-        # Update latest pointer
-        latest_key = f"checkpoint_latest:{thread_id}"
-        self.client.set(latest_key, checkpoint_id, ex=self.ttl)
+        with span("checkpoint", "put"):
+            pipe = self.client.pipeline(transaction=True)
+            next_config = self._queue_put(pipe, config, checkpoint, metadata, new_versions)
+            pipe.execute()
+        return next_config
 
-        return {
-            "configurable": {
-                "thread_id": thread_id,
-                "checkpoint_id": checkpoint_id,
-            }
-        }
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async version of put."""
+        with span("checkpoint", "put"):
+            pipe = self.aclient.pipeline(transaction=True)
+            next_config = self._queue_put(pipe, config, checkpoint, metadata, new_versions)
+            await pipe.execute()
+        return next_config
+
+    def _queue_writes(
+        self, pipe, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str
+    ) -> None:
+        thread_id, ns, checkpoint_id = self._ids(config)
+        key = self._writes_prefix(thread_id, ns) + checkpoint_id
+
+        for idx, (channel, value) in enumerate(writes):
+            field = f"{task_id}:{WRITES_IDX_MAP.get(channel, idx)}"
+            blob = self._dump((channel, self._externalize(channel, value, pipe)))
+            self.stats["bytes_written"] += len(blob)
+            if channel in WRITES_IDX_MAP:
+                pipe.hset(key, field, blob)
+            else:
+                pipe.hsetnx(key, field, blob)
+        pipe.expire(key, self.ttl)
 
     def put_writes(
         self,
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
         task_id: str,
+        task_path: str = "",
     ) -> None:
-        """Save intermediate writes to the database."""
-        thread_id = config["configurable"]["thread_id"]
-        checkpoint_id = config["configurable"]["checkpoint_id"]
+        """Save intermediate writes to the database.
 
-        # Serialize writes
-        data = pickle.dumps(writes)
-
-        # Key: writes:thread_id:checkpoint_id:task_id
-        key = f"writes:{thread_id}:{checkpoint_id}:{task_id}"
-        self.client.set(key, data, ex=self.ttl)
+        Writes are stored in one hash per checkpoint (field = "{task_id}:{idx}").
+        Special channels (errors, interrupts) overwrite; regular writes are kept first-wins
+        so that a retried task does not duplicate its output.
+        """
+        with span("checkpoint", "put_writes"):
+            pipe = self.client.pipeline(transaction=True)
+            self._queue_writes(pipe, config, writes, task_id)
+            pipe.execute()
 
     async def aput_writes(
         self,
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
         task_id: str,
+        task_path: str = "",
     ) -> None:
         """Async version of put_writes."""
-        import asyncio
+        with span("checkpoint", "put_writes"):
+            pipe = self.aclient.pipeline(transaction=True)
+            self._queue_writes(pipe, config, writes, task_id)
+            await pipe.execute()
+
+    # --- Delete ---
+    @staticmethod
+    def _thread_patterns(thread_id: str) -> Tuple[str, ...]:
+        # 문서(ckpt_doc:*)는 여러 스레드가 공유하므로 TTL로만 만료됩니다.
+        return (
+            f"ckpt:{thread_id}:*",
+            f"ckpt_writes:{thread_id}:*",
+            f"ckpt_blob:{thread_id}:*",
+            f"ckpt_history:{thread_id}:*",
+        )
 
-        return await asyncio.to_thread(self.put_writes, config, writes, task_id)
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes for a thread."""
+        pipe = self.client.pipeline(transaction=False)
+        for pattern in self._thread_patterns(thread_id):
+            for key in self.client.scan_iter(match=pattern):
+                pipe.delete(key)
+        pipe.execute()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async version of delete_thread."""
+        aclient = self.aclient
+        pipe = aclient.pipeline(transaction=False)
+        for pattern in self._thread_patterns(thread_id):
+            async for key in aclient.scan_iter(match=pattern):
+                pipe.delete(key)
+        await pipe.execute()
+
+    # --- Compaction ---
+    def _compact_plan(
+        self, thread_id: str, ns: str, ids: List[bytes], versions: List[Optional[bytes]], keep: int
+    ) -> Tuple[List[str], List[str]]:
+        """
+        삭제할 체크포인트 ID와 키 목록을 계산합니다.
+        채널 blob은 남는 체크포인트 중 하나라도 같은 (channel, version)을 참조하면 지우지 않습니다.
+        (unchanged 채널은 부모와 같은 버전을 가리키므로, 최신 체크포인트가 남아 있는 한 새 put과 충돌하지 않습니다.)
+        """
+        kept_blobs = set()
+        for raw in versions[:keep]:
+            kept_blobs.update(self._versions(raw or b""))
+
+        dropped_ids = [cid.decode() for cid in ids[keep:]]
+        blob_prefix = self._blob_prefix(thread_id, ns)
+        keys = []
+        for cid, raw in zip(dropped_ids, versions[keep:]):
+            keys.append(self._checkpoint_prefix(thread_id, ns) + cid)
+            keys.append(self._writes_prefix(thread_id, ns) + cid)
+            for channel, version in self._versions(raw or b""):
+                if (channel, version) not in kept_blobs:
+                    keys.append(blob_prefix + f"{channel}:{version}")
+        return dropped_ids, list(dict.fromkeys(keys))
+
+    def compact(self, thread_id: str, ns: str = "", keep: Optional[int] = None) -> int:
+        """스레드의 최근 keep개(기본 keep_last) 체크포인트만 남깁니다. 삭제한 체크포인트 수를 반환합니다."""
+        keep = self.keep_last if keep is None else keep
+        if keep <= 0:
+            return 0
+
+        with span("checkpoint", "compact"):
+            history_key = self._history_key(thread_id, ns)
+            ids = self.client.zrevrangebylex(history_key, "+", "-")
+            if len(ids) <= keep:
+                return 0
+
+            pipe = self.client.pipeline(transaction=False)
+            for cid in ids:
+                pipe.hget(self._checkpoint_prefix(thread_id, ns) + cid.decode(), "versions")
+            versions = pipe.execute()
+
+            dropped_ids, keys = self._compact_plan(thread_id, ns, ids, versions, keep)
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrem(history_key, *dropped_ids)
+            pipe.delete(*keys)
+            pipe.execute()
+
+        self.stats["checkpoints_compacted"] += len(dropped_ids)
+        return len(dropped_ids)
+
+    async def acompact(self, thread_id: str, ns: str = "", keep: Optional[int] = None) -> int:
+        """Async version of compact."""
+        keep = self.keep_last if keep is None else keep
+        if keep <= 0:
+            return 0
+
+        aclient = self.aclient
+        with span("checkpoint", "compact"):
+            history_key = self._history_key(thread_id, ns)
+            ids = await aclient.zrevrangebylex(history_key, "+", "-")
+            if len(ids) <= keep:
+                return 0
+
+            pipe = aclient.pipeline(transaction=False)
+            for cid in ids:
+                pipe.hget(self._checkpoint_prefix(thread_id, ns) + cid.decode(), "versions")
+            versions = await pipe.execute()
+
+            dropped_ids, keys = self._compact_plan(thread_id, ns, ids, versions, keep)
+            pipe = aclient.pipeline(transaction=True)
+            pipe.zrem(history_key, *dropped_ids)
+            pipe.delete(*keys)
+            await pipe.execute()
+
+        self.stats["checkpoints_compacted"] += len(dropped_ids)
+        return len(dropped_ids)
+
+    async def arun_compactor(self, interval: float = 60.0) -> None:
+        """
+        백그라운드 compactor. interval초마다 이 프로세스에서 put이 있었던 스레드만 정리합니다.
+        FastAPI startup에서 asyncio task로 띄우고, shutdown에서 cancel 합니다.
+        """
+        if self.keep_last <= 0:
+            return
+        logger.info(f"Checkpoint compactor started (keep_last={self.keep_last}, every {interval}s)")
+        while True:
+            await asyncio.sleep(interval)
+            dirty, self._dirty = self._dirty, set()
+            for thread_id, ns in dirty:
+                try:
+                    await self.acompact(thread_id, ns)
+                except Exception as e:
+                    logger.warning(f"⚠️ Checkpoint compaction failed ({thread_id}): {e}")
@@ -0,0 +1,219 @@
+"""
+audit_metadata.db (SQLRetriever용 감사 메타데이터 DB) 스키마와 검색 인덱스.
+
+- audits: 감사 사례 1건 = 1행 (날짜는 YYYY-MM-DD로 정규화)
+- B-tree 인덱스: date, company, site
+- audits_fts: title / problem / action / cat / sub_cat 에 대한 FTS5 (trigram tokenizer)
+  한국어는 형태소 경계가 아닌 부분 문자열로 검색하므로 trigram을 사용합니다.
+  trigram은 3글자 이상 검색어만 인덱스로 찾을 수 있습니다 (2글자 이하는 LIKE 스캔).
+- audit_stats: 통계 큐브. 차원 조합(최대 CUBE_MAX_DIMS개)별 건수 / 처분금액 합계 / 처분강도 평균을
+  미리 집계해 둡니다. 집계에서 빠진 차원은 '*'(전체)로 저장됩니다.
+"""
+
+import itertools
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List
+
+AUDIT_COLUMNS = [
+    ("id", "INTEGER PRIMARY KEY"),
+    ("idx", "INTEGER"),
+    ("date", "TEXT"),
+    ("title", "TEXT"),
+    ("site", "TEXT"),
+    ("company", "TEXT"),
+    ("company_code", "TEXT"),
+    ("category", "TEXT"),
+    ("cat", "TEXT"),
+    ("sub_cat", "TEXT"),
+    ("file_path", "TEXT"),
+    ("download_url", "TEXT"),
+    ("problem", "TEXT"),
+    ("action", "TEXT"),
+    ("agency_category", "TEXT"),
+    ("audit_report_type", "TEXT"),
+    ("risk_category", "TEXT"),
+    ("disposition_level", "TEXT"),
+    ("disposition_severity", "REAL"),
+    ("penalty_amount", "REAL"),
+]
+
+# 대시보드(app_final.py)와 같은 분류 기준
+UNCLASSIFIED = "미분류"
+RISK_CATEGORIES = (
+    "재무/회계/계약", "인사/채용/복무", "시설/안전/환경", "정보보안/IT", "윤리/부패/비위", "사업/운영/성과",
+)
+DEFAULT_RISK_CATEGORY = "사업/운영/성과"
+DISPOSITION_SEVERITY = {"중징계": 10, "경징계": 9, "시정": 8, "경고/주의": 7, "통보": 6, "현지조치": 5}
+DEFAULT_DISPOSITION = "기타"
+
+FTS_TABLE = "audits_fts"
+FTS_COLUMNS = ("title", "problem", "action", "cat", "sub_cat")
+
+# trigram tokenizer가 인덱스로 처리할 수 있는 최소 검색어 길이
+FTS_MIN_CHARS = 3
+
+BTREE_INDEXES = {
+    "idx_audits_date": "date",
+    "idx_audits_company": "company",
+    "idx_audits_site": "site",
+}
+
+CUBE_TABLE = "audit_stats"
+CUBE_ALL = "*"
+# 한 행에서 동시에 값을 갖는 최대 차원 수 (8개 차원 기준 93개 조합). 더 세밀한 질문은 audits에서 집계합니다.
+CUBE_MAX_DIMS = 3
+YEAR_EXPR = "substr(date, 1, 4)"
+QUARTER_EXPR = "CASE WHEN date = '' THEN '' ELSE CAST((CAST(substr(date, 6, 2) AS INTEGER) + 2) / 3 AS TEXT) END"
+CUBE_DIMENSIONS = {
+    "year": YEAR_EXPR,
+    "quarter": QUARTER_EXPR,
+    "site": "site",
+    "company": "company",
+    "agency_category": "agency_category",
+    "audit_report_type": "audit_report_type",
+    "risk_category": "risk_category",
+    "disposition_level": "disposition_level",
+}
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    columns = ", ".join(f"{name} {ddl}" for name, ddl in AUDIT_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS audits ({columns})")
+
+
+def create_search_index(conn: sqlite3.Connection) -> None:
+    """B-tree 인덱스와 FTS5 trigram 인덱스를 만들고 현재 audits 내용으로 채웁니다 (기존 DB 업그레이드 포함)."""
+    for name, column in BTREE_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON audits({column})")
+
+    # External content 테이블: 본문은 audits에만 저장하고 FTS에는 인덱스만 둡니다.
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{', '.join(FTS_COLUMNS)}, content='audits', content_rowid='id', tokenize='trigram')"
+    )
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+    conn.execute("ANALYZE")
+
+
+def create_stats_cube(conn: sqlite3.Connection) -> int:
+    """
+    audits -> audit_stats 통계 큐브를 (다시) 만듭니다. 반환값은 큐브 행 수.
+    차원 값이 모두 정해진 조회(집계에서 빠진 차원은 '*')는 PRIMARY KEY 조회 한 번으로 끝납니다.
+    """
+    dims = list(CUBE_DIMENSIONS)
+    conn.execute(f"DROP TABLE IF EXISTS {CUBE_TABLE}")
+    conn.execute(
+        f"CREATE TABLE {CUBE_TABLE} ("
+        + ", ".join(f"{dim} TEXT NOT NULL" for dim in dims)
+        + ", count INTEGER NOT NULL, penalty_sum REAL, severity_avg REAL, "
+        + f"PRIMARY KEY ({', '.join(dims)})) WITHOUT ROWID"
+    )
+    # 전체 차원 조합별로 한 번 접어둔(collapse) 임시 테이블에서 나머지 조합을 합산합니다.
+    # (원본 행을 조합 수만큼 반복해서 읽지 않음. 평균은 합계 / 건수로 다시 계산)
+    conn.execute("DROP TABLE IF EXISTS temp.cube_source")
+    conn.execute(
+        "CREATE TEMP TABLE cube_source AS SELECT "
+        + ", ".join(f"COALESCE({expr}, '') AS {dim}" for dim, expr in CUBE_DIMENSIONS.items())
+        + ", COUNT(*) AS n, SUM(penalty_amount) AS penalty_sum, "
+        + "SUM(disposition_severity) AS severity_sum, COUNT(disposition_severity) AS severity_n "
+        + f"FROM audits GROUP BY {', '.join(str(i + 1) for i in range(len(dims)))}"
+    )
+    for n in range(CUBE_MAX_DIMS + 1):
+        for group in itertools.combinations(dims, n):
+            select = [dim if dim in group else f"'{CUBE_ALL}'" for dim in dims]
+            sql = (
+                f"INSERT INTO {CUBE_TABLE} SELECT {', '.join(select)}, SUM(n), SUM(penalty_sum), "
+                "SUM(severity_sum) / NULLIF(SUM(severity_n), 0) FROM cube_source"
+            )
+            if group:
+                sql += f" GROUP BY {', '.join(group)}"
+            conn.execute(sql)
+    conn.execute("DROP TABLE temp.cube_source")
+    return conn.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return _has_table(conn, FTS_TABLE)
+
+
+def has_cube(conn: sqlite3.Connection) -> bool:
+    return _has_table(conn, CUBE_TABLE)
+
+
+def audit_columns(conn: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in conn.execute("PRAGMA table_info(audits)").fetchall()]
+
+
+def normalize_date(value: Any) -> str:
+    """'2024.06.28', '2024/6/28', '2024-06-28 00:00' -> '2024-06-28'."""
+    match = re.match(r"\s*(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})", str(value or ""))
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def normalize_risk_category(value: Any) -> str:
+    value = str(value or "").replace("\\/", "/")
+    return value if value in RISK_CATEGORIES else DEFAULT_RISK_CATEGORY
+
+
+def normalize_disposition(value: Any) -> str:
+    value = str(value or "").replace("\\/", "/")
+    return value if value in DISPOSITION_SEVERITY else DEFAULT_DISPOSITION
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def row_from_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """audit_v10.json 항목 -> audits 행."""
+    summary = item.get("contents_summary")
+    summary = summary if isinstance(summary, dict) else {}
+    disposition = normalize_disposition(item.get("disposition_level"))
+    return {
+        "idx": item.get("idx"),
+        "date": normalize_date(item.get("date")),
+        "title": item.get("title") or "",
+        "site": item.get("site") or "",
+        "company": item.get("company") or "",
+        "company_code": str(item.get("company_code") or ""),
+        "category": item.get("category") or "",
+        "cat": item.get("cat") or "",
+        "sub_cat": item.get("sub_cat") or "",
+        "file_path": item.get("file_path") or "",
+        "download_url": item.get("download_url") or "",
+        "problem": item.get("problem") or summary.get("problems", ""),
+        "action": item.get("action") or summary.get("action", ""),
+        "agency_category": item.get("agency_category") or item.get("sub_category") or UNCLASSIFIED,
+        "audit_report_type": item.get("audit_report_type") or item.get("audit_type") or UNCLASSIFIED,
+        "risk_category": normalize_risk_category(item.get("risk_category")),
+        "disposition_level": disposition,
+        "disposition_severity": DISPOSITION_SEVERITY.get(disposition, 0),
+        "penalty_amount": _to_float(item.get("penalty_amount")),
+    }
+
+
+def insert_rows(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> int:
+    names = [name for name, _ in AUDIT_COLUMNS if name != "id"]
+    sql = f"INSERT INTO audits ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+    cursor = conn.executemany(sql, ([row.get(name) for name in names] for row in rows))
+    return cursor.rowcount
+
+
+def fts_match(keywords: List[str]) -> str:
+    """키워드 목록 -> FTS5 MATCH 식 ('"레일바이크" AND "안전사고"')."""
+    return " AND ".join('"' + kw.replace('"', '""') + '"' for kw in keywords)
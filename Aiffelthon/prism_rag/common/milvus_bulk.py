@@ -0,0 +1,186 @@
+"""
+Milvus 전체 재적재용 Bulk Import.
+
+- 스키마: langchain_milvus 기본 필드명(pk / text / vector) + 메타데이터 VARCHAR 필드를 명시적으로 선언합니다.
+  (vector_retriever의 Milvus(...)가 그대로 읽을 수 있는 형태)
+- Milvus 서버: RemoteBulkWriter가 행을 NumPy/Parquet 파일로 써서 MinIO에 올리고, do_bulk_insert로 한 번에 가져옵니다.
+- Milvus Lite (MILVUS_URI가 .db 파일): Bulk Import를 지원하지 않으므로 큰 배치 insert로 대신합니다.
+- 두 경우 모두 인덱스는 적재가 끝난 뒤 한 번만 만듭니다.
+"""
+
+import time
+import uuid
+from typing import Any, Dict, List, Sequence
+
+from pymilvus import CollectionSchema, DataType, MilvusClient, connections, utility
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("MILVUS_BULK")
+
+PRIMARY_FIELD = "pk"
+TEXT_FIELD = "text"
+VECTOR_FIELD = "vector"
+VARCHAR_MAX_BYTES = 65535
+PK_MAX_LENGTH = 256
+
+# Milvus Lite에서 insert 한 번에 보낼 행 수
+LITE_INSERT_BATCH = 2000
+IMPORT_POLL_INTERVAL = 2.0
+IMPORT_TIMEOUT = 3600
+
+
+def is_milvus_lite(uri: str) -> bool:
+    return uri.endswith(".db")
+
+
+def check_bulk_support(uri: str) -> None:
+    """
+    Bulk Import 사전 점검 (기존 컬렉션을 지우기 전에 호출).
+    Milvus 서버에 필요한 bulk_writer 의존성(minio 등)과 MinIO 버킷 접근을 확인하고, 안 되면 RuntimeError를 냅니다.
+    """
+    if is_milvus_lite(uri):
+        return
+    try:
+        from pymilvus.bulk_writer import RemoteBulkWriter  # noqa: F401
+        from minio import Minio
+    except ImportError as e:
+        raise RuntimeError(
+            f"Bulk Import requires pymilvus bulk_writer extras ({e}). "
+            'Install them with: pip install "pymilvus[bulk_writer]==2.6.3"'
+        ) from e
+    try:
+        client = Minio(
+            Config.MINIO_ENDPOINT,
+            access_key=Config.MINIO_ACCESS_KEY,
+            secret_key=Config.MINIO_SECRET_KEY,
+            secure=Config.MINIO_SECURE,
+        )
+        client.bucket_exists(Config.MINIO_BUCKET)
+    except Exception as e:
+        raise RuntimeError(
+            f"MinIO is not reachable at {Config.MINIO_ENDPOINT} (bucket '{Config.MINIO_BUCKET}'): {e}. "
+            "Check MINIO_ENDPOINT / MINIO_ACCESS_KEY / MINIO_SECRET_KEY (docker-compose exposes port 9000)."
+        ) from e
+
+
+def fit_varchar(value: Any, max_bytes: int = VARCHAR_MAX_BYTES) -> str:
+    """VARCHAR max_length(바이트)를 넘는 값을 UTF-8 문자 경계에서 자릅니다."""
+    encoded = str(value if value is not None else "").encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return encoded.decode("utf-8")
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def build_schema(dim: int, metadata_fields: Sequence[str]) -> CollectionSchema:
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field(PRIMARY_FIELD, DataType.VARCHAR, is_primary=True, max_length=PK_MAX_LENGTH)
+    schema.add_field(TEXT_FIELD, DataType.VARCHAR, max_length=VARCHAR_MAX_BYTES)
+    schema.add_field(VECTOR_FIELD, DataType.FLOAT_VECTOR, dim=dim)
+    for name in metadata_fields:
+        schema.add_field(name, DataType.VARCHAR, max_length=VARCHAR_MAX_BYTES)
+    return schema
+
+
+def build_row(pk: str, text: str, vector: Sequence[float], metadata: Dict[str, Any], metadata_fields: Sequence[str]) -> Dict[str, Any]:
+    row = {PRIMARY_FIELD: pk, TEXT_FIELD: fit_varchar(text), VECTOR_FIELD: list(vector)}
+    for name in metadata_fields:
+        row[name] = fit_varchar(metadata.get(name, ""))
+    return row
+
+
+def index_params(uri: str):
+    # langchain_milvus 기본값과 같은 L2 거리. Lite는 HNSW를 지원하지 않으므로 AUTOINDEX를 사용합니다.
+    params = MilvusClient.prepare_index_params()
+    if is_milvus_lite(uri):
+        params.add_index(field_name=VECTOR_FIELD, index_type="AUTOINDEX", metric_type="L2")
+    else:
+        params.add_index(
+            field_name=VECTOR_FIELD, index_type="HNSW", metric_type="L2", params={"M": 8, "efConstruction": 64}
+        )
+    return params
+
+
+class BulkLoader:
+    """
+    append(row)로 행을 모은 뒤 finish()에서 컬렉션에 적재하고 인덱스를 만듭니다.
+    컬렉션은 인덱스 없이 미리 만들어져 있어야 합니다 (create_collection(schema=...)).
+    """
+
+    def __init__(self, client: MilvusClient, collection_name: str, schema: CollectionSchema, uri: str, token: str = ""):
+        self.client = client
+        self.collection_name = collection_name
+        self.uri = uri
+        self.token = token
+        self.lite = is_milvus_lite(uri)
+        self.rows = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = None
+        if not self.lite:
+            from pymilvus.bulk_writer import BulkFileType, RemoteBulkWriter
+
+            file_type = BulkFileType.PARQUET if Config.MILVUS_BULK_FILE_TYPE == "parquet" else BulkFileType.NUMPY
+            self._writer = RemoteBulkWriter(
+                schema=schema,
+                remote_path=f"bulk/{collection_name}",
+                connect_param=RemoteBulkWriter.S3ConnectParam(
+                    endpoint=Config.MINIO_ENDPOINT,
+                    access_key=Config.MINIO_ACCESS_KEY,
+                    secret_key=Config.MINIO_SECRET_KEY,
+                    bucket_name=Config.MINIO_BUCKET,
+                    secure=Config.MINIO_SECURE,
+                ),
+                file_type=file_type,
+            )
+
+    def append(self, row: Dict[str, Any]) -> None:
+        self.rows += 1
+        if self._writer is not None:
+            self._writer.append_row(row)
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= LITE_INSERT_BATCH:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self.client.insert(self.collection_name, self._buffer)
+            self._buffer = []
+
+    def _import(self) -> None:
+        self._writer.commit()
+        alias = f"bulk-{uuid.uuid4().hex[:8]}"
+        connections.connect(alias=alias, uri=self.uri, token=self.token)
+        try:
+            tasks = [
+                utility.do_bulk_insert(self.collection_name, files=files, using=alias)
+                for files in self._writer.batch_files
+            ]
+            logger.info(f"Bulk insert: {len(tasks)} task(s) for {self.rows} rows")
+            deadline = time.monotonic() + IMPORT_TIMEOUT
+            pending = set(tasks)
+            while pending:
+                for task_id in list(pending):
+                    state = utility.get_bulk_insert_state(task_id, using=alias)
+                    if state.state == state.ImportCompleted:
+                        pending.discard(task_id)
+                    elif state.state in (state.ImportFailed, state.ImportFailedAndCleaned):
+                        raise RuntimeError(f"Bulk insert task {task_id} failed: {state.failed_reason}")
+                if pending:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Bulk insert did not finish in {IMPORT_TIMEOUT}s: {sorted(pending)}")
+                    time.sleep(IMPORT_POLL_INTERVAL)
+        finally:
+            connections.disconnect(alias)
+
+    def finish(self) -> int:
+        """남은 행을 적재하고 인덱스를 만든 뒤 컬렉션을 로드합니다. 반환값은 적재한 행 수."""
+        if self._writer is not None:
+            self._import()
+        else:
+            self._flush()
+        self.client.flush(self.collection_name)
+        self.client.create_index(self.collection_name, index_params(self.uri))
+        self.client.load_collection(self.collection_name)
+        return self.rows
@@ -1,3 +1,9 @@
+import asyncio
+import json
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
 from langchain_naver import ChatClovaX
 
 try:
@@ -6,39 +12,186 @@ except ImportError:
     pass
 from langchain_openai import ChatOpenAI
 from common.config import Config
+from common.llm_cache import get_llm_cache
+from common.llm_scheduler import (
+    PriorityRateLimiter,
+    UsageCallback,
+    get_scheduler,
+    report_rate_limited,
+)
+from common.tracing import TracingCallback, record_llm_retry
 from common.logger_config import setup_logger
 
 logger = setup_logger("ModelFactory")
 
+# --- 공유 HTTP 커넥션 풀 & 클라이언트 풀 (Shared Pools) ---
+# 노드 호출마다 ChatClovaX를 새로 만들면 HTTP 세션/TLS 핸드셰이크가 매번 발생하므로,
+# (level, temperature, max_tokens) 단위로 클라이언트를 재사용하고 keep-alive 풀을 공유합니다.
+_http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_model_pool: Dict[Tuple, Any] = {}
+_pool_lock = Lock()
+
+
+def _request_model(request: httpx.Request) -> Optional[str]:
+    try:
+        return json.loads(request.content).get("model")
+    except (ValueError, AttributeError, httpx.RequestNotRead):
+        return None
+
+
+def _record_retry(response: httpx.Response) -> Optional[str]:
+    """SDK가 재시도하는 429/5xx 응답을 재시도 지표에 기록하고 요청의 모델명을 반환합니다 (그 외 응답은 None)."""
+    status = response.status_code
+    if status != 429 and status < 500:
+        return None
+    model = _request_model(response.request)
+    record_llm_retry(model, status)
+    return model
+
+
+def _on_response(response: httpx.Response) -> None:
+    # SDK 재시도 중간의 429도 스케줄러에 알려, 같은 모델의 다른 호출이 함께 쉬도록 합니다.
+    model = _record_retry(response)
+    if response.status_code == 429:
+        report_rate_limited(model)
+
+
+async def _aon_response(response: httpx.Response) -> None:
+    model = _record_retry(response)
+    if response.status_code == 429:
+        await asyncio.to_thread(report_rate_limited, model)
+
+
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_clients
+    if _http_clients is None:
+        limits = httpx.Limits(
+            max_connections=Config.LLM_HTTP_POOL_SIZE,
+            max_keepalive_connections=Config.LLM_HTTP_POOL_SIZE,
+            keepalive_expiry=Config.LLM_HTTP_KEEPALIVE,
+        )
+        timeout = httpx.Timeout(Config.LLM_HTTP_TIMEOUT)
+        _http_clients = (
+            httpx.Client(
+                limits=limits, timeout=timeout, event_hooks={"response": [_on_response]}
+            ),
+            httpx.AsyncClient(
+                limits=limits, timeout=timeout, event_hooks={"response": [_aon_response]}
+            ),
+        )
+        logger.info(f"HTTP Pool Ready (size={Config.LLM_HTTP_POOL_SIZE})")
+    return _http_clients
+
 
 class ModelFactory:
     """
     Centralized Model Factory for Agentic RAG.
     - RAG Agents (SOP, Adversarial) -> HyperCLOVA X
     - Evaluation -> Configurable (Gemini vs OpenAI)
+    - temperature=0 호출은 공유 LLM 캐시(Exact-Match)를 사용합니다.
+    - 클라이언트는 (level, temperature, max_tokens) 단위로 풀링되어 HTTP 커넥션을 공유합니다.
+    - 모든 호출은 모델별 QPS/TPM 스케줄러를 거치며, priority가 높은(interactive) 호출이 먼저 나갑니다.
+    - 429/5xx/연결 오류는 클라이언트 SDK가 지수 백오프(Jitter)로 재시도하고 (max_retries=LLM_MAX_RETRIES),
+      429 응답은 HTTP 풀의 응답 훅이 스케줄러에 알려 같은 모델의 호출을 잠시 늦춥니다.
+      (같은 훅이 429/5xx 응답을 rag_llm_retries_total로 집계합니다)
+    - 반환값은 항상 BaseChatModel입니다 (ragas 등 언어 모델 인스턴스를 요구하는 호출자용).
     """
 
     @staticmethod
-    def get_rag_model(level: str = "light", temperature: float = 0.1):
+    def _cache_for(temperature: float):
+        """결정적(temperature=0) 호출에만 공유 캐시를 붙이고, 그 외에는 캐시를 끕니다."""
+        if temperature == 0:
+            cache = get_llm_cache()
+            if cache is not None:
+                return cache
+        return False
+
+    @staticmethod
+    def _pooled(key: Tuple, build):
+        """key에 해당하는 클라이언트가 없을 때만 생성하고, 이후에는 같은 인스턴스를 반환합니다."""
+        model = _model_pool.get(key)
+        if model is None:
+            with _pool_lock:
+                model = _model_pool.get(key)
+                if model is None:
+                    model = build()
+                    _model_pool[key] = model
+        return model
+
+    @staticmethod
+    def _scheduling(model_name: str, budget: str, priority: str) -> Dict[str, Any]:
+        """
+        모델 생성자에 넘길 rate_limiter / callbacks 인자.
+        TracingCallback은 항상 붙이고, 스케줄러가 켜져 있으면 rate_limiter와 사용량 콜백을 추가합니다.
+        """
+        callbacks = [TracingCallback(model_name)]
+        kwargs = {"callbacks": callbacks}
+        scheduler = get_scheduler(model_name, budget)
+        if scheduler is not None:
+            kwargs["rate_limiter"] = PriorityRateLimiter(scheduler, priority)
+            callbacks.append(UsageCallback(scheduler))
+        return kwargs
+
+    @staticmethod
+    def get_rag_model(
+        level: str = "light",
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None,
+        priority: str = "interactive",
+    ):
         """
         Returns HyperCLOVA X model for RAG tasks.
+        같은 (level, temperature, max_tokens, priority) 조합은 프로세스 내에서 하나의 클라이언트를 공유합니다.
         :param level: 'light' (HCX-DASH) or 'heavy' (HCX-003)
+        :param priority: 'interactive' | 'grading' | 'background' (스케줄러 우선순위)
         """
+        if level == "reasoning":
+            # Slight creativity for complex analysis (temperature fixed at 0.2)
+            temperature = 0.2
+            max_tokens = max_tokens or 4096  # Higher limit for deep thinking output
+        elif level == "heavy":
+            max_tokens = max_tokens or 2048
+        else:
+            level = "light"
+            max_tokens = max_tokens or 1024
+
+        key = ("rag", level, temperature, max_tokens, priority)
+        return ModelFactory._pooled(
+            key,
+            lambda: ModelFactory._build_rag_model(level, temperature, max_tokens, priority),
+        )
+
+    @staticmethod
+    def _build_rag_model(level: str, temperature: float, max_tokens: int, priority: str):
+        http_client, http_async_client = _get_http_clients()
+        common = {
+            "http_client": http_client,
+            "http_async_client": http_async_client,
+            "max_retries": Config.LLM_MAX_RETRIES,
+        }
+
         if level == "reasoning":
             model_name = Config.HCX_MODEL_REASONING
             logger.info(f"RAG Agent using {model_name} (Level: {level})")
             return ChatClovaX(
                 model=model_name,
-                max_tokens=4096,  # Higher limit for deep thinking output
-                temperature=0.2,  # Slight creativity for complex analysis
+                max_tokens=max_tokens,
+                temperature=temperature,
+                cache=False,
+                **common,
+                **ModelFactory._scheduling(model_name, level, priority),
             )
         elif level == "heavy":
             model_name = Config.HCX_MODEL_HEAVY  # Defaults to STANDARD (003)
             logger.info(f"RAG Agent using {model_name} (Level: {level})")
             return ChatClovaX(
                 model=model_name,
-                max_tokens=2048,
+                max_tokens=max_tokens,
                 # temperature parameter omitted for safety with HCX-003
+                # (서버 기본 temperature로 샘플링하므로 temperature=0 요청이어도 캐시하지 않습니다)
+                cache=False,
+                **common,
+                **ModelFactory._scheduling(model_name, level, priority),
             )
         else:
             model_name = Config.HCX_MODEL_LIGHT
@@ -46,17 +199,28 @@ class ModelFactory:
             return ChatClovaX(
                 model=model_name,
                 temperature=temperature,
-                max_tokens=1024,
+                max_tokens=max_tokens,
+                cache=ModelFactory._cache_for(temperature),
+                **common,
+                **ModelFactory._scheduling(model_name, level, priority),
             )
 
     @staticmethod
     def get_eval_model(level: str = "light", temperature: float = 0.0):
         """
         Returns Evaluation model based on Config.EVAL_PROVIDER.
+        긴 평가 실행에서도 같은 조합은 하나의 클라이언트를 재사용합니다.
+        평가 호출은 가장 낮은 우선순위('eval')로 스케줄링됩니다.
         :param level: 'light' (Flash/Mini) or 'heavy' (Pro/GPT-4o)
         """
         provider = Config.EVAL_PROVIDER.lower()
+        key = ("eval", provider, level, temperature)
+        return ModelFactory._pooled(
+            key, lambda: ModelFactory._build_eval_model(provider, level, temperature)
+        )
 
+    @staticmethod
+    def _build_eval_model(provider: str, level: str, temperature: float):
         if provider == "gemini":
             model_name = (
                 Config.GEMINI_MODEL_HEAVY
@@ -64,7 +228,13 @@ class ModelFactory:
                 else Config.GEMINI_MODEL_LIGHT
             )
             logger.info(f"Evaluation using Gemini: {model_name}")
-            return ChatGoogleGenerativeAI(model=model_name, temperature=temperature)
+            return ChatGoogleGenerativeAI(
+                model=model_name,
+                temperature=temperature,
+                cache=ModelFactory._cache_for(temperature),
+                max_retries=Config.LLM_MAX_RETRIES,
+                **ModelFactory._scheduling(model_name, "eval", "eval"),
+            )
 
         elif provider == "openai":
             model_name = (
@@ -73,7 +243,16 @@ class ModelFactory:
                 else Config.OPENAI_MODEL_LIGHT
             )
             logger.info(f"Evaluation using OpenAI: {model_name}")
-            return ChatOpenAI(model=model_name, temperature=temperature)
+            http_client, http_async_client = _get_http_clients()
+            return ChatOpenAI(
+                model=model_name,
+                temperature=temperature,
+                cache=ModelFactory._cache_for(temperature),
+                http_client=http_client,
+                http_async_client=http_async_client,
+                max_retries=Config.LLM_MAX_RETRIES,
+                **ModelFactory._scheduling(model_name, "eval", "eval"),
+            )
 
         else:
             raise ValueError(f"Unknown EVAL_PROVIDER: {provider}")
@@ -0,0 +1,80 @@
+import asyncio
+import weakref
+from threading import Lock
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("REDIS_POOL")
+
+try:
+    from redis import ConnectionPool, Redis
+    from redis.asyncio import ConnectionPool as AsyncConnectionPool
+    from redis.asyncio import Redis as AsyncRedis
+except ImportError:
+    ConnectionPool = Redis = AsyncConnectionPool = AsyncRedis = None
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "host": Config.REDIS_HOST,
+        "port": Config.REDIS_PORT,
+        "db": Config.REDIS_DB,
+        "max_connections": Config.REDIS_MAX_CONNECTIONS,
+        "socket_timeout": Config.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": Config.REDIS_SOCKET_TIMEOUT,
+        "health_check_interval": 30,
+    }
+
+
+# --- Sync Client (Singleton) ---
+_sync_client = None
+_sync_lock = Lock()
+
+
+def get_redis():
+    """
+    프로세스 공용 동기 Redis 클라이언트 (ConnectionPool 공유).
+    LLM 캐시, Rate Limiter, 체크포인터의 동기 경로가 같은 풀을 사용합니다.
+    """
+    global _sync_client
+    if Redis is None:
+        raise ImportError("redis package is not installed")
+    with _sync_lock:
+        if _sync_client is None:
+            _sync_client = Redis(connection_pool=ConnectionPool(**_pool_kwargs()))
+            logger.info(
+                f"Redis pool: {Config.REDIS_HOST}:{Config.REDIS_PORT}/{Config.REDIS_DB} "
+                f"(max {Config.REDIS_MAX_CONNECTIONS})"
+            )
+    return _sync_client
+
+
+# --- Async Client (Singleton per event loop) ---
+# redis.asyncio 연결은 생성된 이벤트 루프에 묶이므로, 루프별로 풀을 하나씩 둡니다.
+# (FastAPI는 루프 1개 → 풀 1개. 루프가 종료되면 항목도 함께 사라집니다.)
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_async_redis():
+    """현재 이벤트 루프의 공용 redis.asyncio 클라이언트 (ConnectionPool 공유)."""
+    if AsyncRedis is None:
+        raise ImportError("redis package is not installed")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncRedis(connection_pool=AsyncConnectionPool(**_pool_kwargs()))
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_redis() -> None:
+    """현재 루프의 async 풀을 닫습니다 (FastAPI shutdown 훅에서 호출)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+        await client.connection_pool.disconnect()
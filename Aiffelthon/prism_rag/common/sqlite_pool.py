@@ -0,0 +1,157 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("SQLITE_POOL")
+
+
+class _PooledConnection(sqlite3.Connection):
+    # 어느 refresh() 세대에 열렸는지 표시 (sqlite3.Connection에는 속성을 추가할 수 없음)
+    generation = 0
+
+
+class SQLiteReadPool:
+    """
+    읽기 전용 SQLite 커넥션 풀 (Thread-safe).
+
+    - URI `mode=ro` (+ 선택적으로 `immutable=1`)로 열어 쓰기/잠금 비용을 없앱니다.
+    - 커넥션을 재사용하므로 sqlite3의 prepared statement 캐시(cached_statements)가 요청 간에 유지됩니다.
+    - mmap_size / cache_size / temp_store pragma로 페이지 읽기를 메모리에서 처리합니다.
+
+    immutable=1은 파일이 절대 바뀌지 않는다고 가정하므로(변경 감지/잠금 없음),
+    DB를 다시 생성하는 배포에서는 끄고(mode=ro만) 사용하십시오.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        immutable: bool = False,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kb: int = 65536,
+    ):
+        self.db_path = db_path
+        self.size = size
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _uri(self) -> str:
+        path = os.path.abspath(self.db_path).replace("\\", "/")
+        params = "mode=ro&immutable=1" if self.immutable else "mode=ro"
+        return f"file:{path}?{params}"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            check_same_thread=False,
+            cached_statements=256,
+            factory=_PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.generation = self._generation
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """풀에서 커넥션을 빌립니다. 모두 사용 중이면 반납될 때까지 기다립니다."""
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._created -= 1
+                        raise
+        if conn is None:
+            conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            if conn.generation != self._generation:
+                # refresh() 이전에 열린 커넥션 (교체되기 전 DB 파일을 가리킴)은 새 커넥션으로 바꿔 반납합니다.
+                conn.close()
+                try:
+                    with self._lock:
+                        conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                self._idle.put(conn)
+            else:
+                # LLM이 만든 잘못된 SQL로 인한 오류는 커넥션 상태와 무관하므로 그대로 반납합니다.
+                self._idle.put(conn)
+
+    def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def refresh(self) -> None:
+        """
+        DB 파일이 교체/수정된 뒤 호출합니다. 유휴 커넥션은 바로 닫고,
+        사용 중인 커넥션은 반납될 때 닫아서 이후 요청은 새 파일로 연결됩니다.
+        """
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+# --- Singleton per DB path ---
+_pools: Dict[str, SQLiteReadPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_read_pool(db_path: str, size: Optional[int] = None) -> SQLiteReadPool:
+    """DB 파일별 프로세스 공용 읽기 전용 풀."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SQLiteReadPool(
+                key,
+                size=size or Config.SQLITE_POOL_SIZE,
+                immutable=Config.SQLITE_IMMUTABLE,
+                mmap_size=Config.SQLITE_MMAP_SIZE,
+                cache_size_kb=Config.SQLITE_CACHE_SIZE_KB,
+            )
+            logger.info(
+                f"SQLite read pool: {key} (size={_pools[key].size}, "
+                f"immutable={Config.SQLITE_IMMUTABLE})"
+            )
+        return _pools[key]
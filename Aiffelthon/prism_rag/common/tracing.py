@@ -0,0 +1,319 @@
+import asyncio
+import functools
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("TRACING")
+
+# --- Optional Exporters ---
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:
+    Counter = Histogram = None
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+except ImportError:
+    trace = None
+
+# LLM 호출 / 노드 / 검색 단계 모두 커버하도록 수 ms ~ 2분 구간
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 120)
+
+# 프로세스 내 분위수 계산용 최근 샘플 수 (kind, name 당)
+RECENT_SAMPLES = 1000
+
+if Histogram is not None:
+    SPAN_SECONDS = Histogram(
+        "rag_span_seconds",
+        "Wall time of graph nodes, LLM calls and retrieval steps",
+        ["kind", "name"],
+        buckets=LATENCY_BUCKETS,
+    )
+    LLM_TOKENS = Counter(
+        "rag_llm_tokens_total", "LLM tokens by model and type", ["model", "type"]
+    )
+    LLM_CACHE = Counter(
+        "rag_llm_cache_lookups_total", "LLM response cache lookups", ["result"]
+    )
+    LLM_ERRORS = Counter(
+        "rag_llm_errors_total",
+        "LLM call errors after client retries (retryable: 429/5xx/connection)",
+        ["model", "retryable"],
+    )
+    LLM_RETRIES = Counter(
+        "rag_llm_retries_total",
+        "Retryable LLM HTTP responses (429/5xx) seen by the shared HTTP pool, including SDK retries",
+        ["model", "status"],
+    )
+    SQL_ROUTES = Counter(
+        "rag_sql_route_total",
+        "SQLRetriever route (stats cube, template fast path, cached SQL or NL2SQL)",
+        ["route"],
+    )
+    SQL_CACHE = Counter(
+        "rag_sql_cache_lookups_total", "SQLRetriever cache lookups", ["level", "result"]
+    )
+else:
+    SPAN_SECONDS = LLM_TOKENS = LLM_CACHE = LLM_ERRORS = LLM_RETRIES = SQL_ROUTES = SQL_CACHE = None
+
+_recent: Dict[tuple, deque] = defaultdict(lambda: deque(maxlen=RECENT_SAMPLES))
+_recent_lock = Lock()
+_sql_routes: Dict[str, int] = defaultdict(int)
+_sql_cache: Dict[tuple, int] = defaultdict(int)
+_tracer = None
+_tracer_initialized = False
+
+
+def get_tracer():
+    """Config.OTEL_EXPORTER('none' | 'console' | 'file' | 'otlp')에 맞는 OpenTelemetry tracer."""
+    global _tracer, _tracer_initialized
+    if _tracer_initialized:
+        return _tracer
+    _tracer_initialized = True
+
+    exporter_name = (Config.OTEL_EXPORTER or "none").lower()
+    if exporter_name == "none" or trace is None:
+        return None
+
+    try:
+        if exporter_name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            exporter = OTLPSpanExporter(endpoint=Config.OTEL_ENDPOINT)
+        elif exporter_name == "file":
+            exporter = ConsoleSpanExporter(
+                out=open(Config.OTEL_FILE_PATH, "a", encoding="utf-8")
+            )
+        else:
+            exporter = ConsoleSpanExporter()
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": Config.OTEL_SERVICE_NAME})
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        _tracer = trace.get_tracer("prism_rag")
+        logger.info(f"OpenTelemetry Exporter: {exporter_name}")
+    except Exception as e:
+        logger.warning(f"⚠️ OpenTelemetry setup failed ({e}). Tracing disabled.")
+        _tracer = None
+    return _tracer
+
+
+def record(kind: str, name: str, seconds: float) -> None:
+    """Prometheus 히스토그램과 프로세스 내 분위수 버퍼에 기록합니다."""
+    if SPAN_SECONDS is not None:
+        SPAN_SECONDS.labels(kind=kind, name=name).observe(seconds)
+    with _recent_lock:
+        _recent[(kind, name)].append(seconds)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: Any):
+    """
+    구간 측정 (Wall Time). sync / async 코드 모두에서 사용할 수 있습니다.
+        with span("retrieval", "milvus.search", k=50):
+            ...
+    OTel span은 현재 컨텍스트의 span으로 설정되므로, 안쪽의 span / LLM 호출이 자식으로 중첩됩니다.
+    (예외 기록과 ERROR 상태 설정은 start_as_current_span이 처리합니다)
+    """
+    tracer = get_tracer()
+    otel_context = (
+        tracer.start_as_current_span(f"{kind}.{name}", attributes=attributes)
+        if tracer is not None
+        else nullcontext()
+    )
+
+    with otel_context as otel_span:
+        start = time.perf_counter()
+        try:
+            yield otel_span
+        finally:
+            record(kind, name, time.perf_counter() - start)
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """함수 전체를 span으로 감싸는 데코레이터 (async 함수 지원)."""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_cache_lookup(hit: bool) -> None:
+    if LLM_CACHE is not None:
+        LLM_CACHE.labels(result="hit" if hit else "miss").inc()
+
+
+def record_llm_retry(model: Optional[str], status: int) -> None:
+    """SDK가 재시도하는 429/5xx 응답 (ModelFactory HTTP 풀의 응답 훅이 호출)."""
+    if LLM_RETRIES is not None:
+        LLM_RETRIES.labels(model=model or "unknown", status=str(status)).inc()
+
+
+def record_sql_route(route: str) -> None:
+    """SQLRetriever가 질문을 처리한 경로 ('cube' | 'template' | 'cache' | 'llm')."""
+    if SQL_ROUTES is not None:
+        SQL_ROUTES.labels(route=route).inc()
+    with _recent_lock:
+        _sql_routes[route] += 1
+
+
+def record_sql_cache(level: str, hit: bool) -> None:
+    """SQLRetriever 캐시 조회 ('sql': 질문 -> SQL, 'rows': SQL -> 결과 행)."""
+    result = "hit" if hit else "miss"
+    if SQL_CACHE is not None:
+        SQL_CACHE.labels(level=level, result=result).inc()
+    with _recent_lock:
+        _sql_cache[(level, result)] += 1
+
+
+def sql_route_summary() -> Dict[str, Any]:
+    """프로세스 시작 후 경로별 처리 횟수, 템플릿 적중률, 캐시 단계별 hit rate."""
+    with _recent_lock:
+        counts = dict(_sql_routes)
+        cache = dict(_sql_cache)
+    total = sum(counts.values())
+    cache_summary = {}
+    for level in ("sql", "rows"):
+        hits, misses = cache.get((level, "hit"), 0), cache.get((level, "miss"), 0)
+        cache_summary[level] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return {
+        "cube": counts.get("cube", 0),
+        "template": counts.get("template", 0),
+        "cache": counts.get("cache", 0),
+        "llm": counts.get("llm", 0),
+        # LLM 없이 처리한 비율 (통계 큐브 + 템플릿)
+        "template_ratio": (
+            round((counts.get("cube", 0) + counts.get("template", 0)) / total, 3) if total else None
+        ),
+        "cache_levels": cache_summary,
+    }
+
+
+def _percentile(values: list, p: float) -> float:
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def reset_latency_samples() -> None:
+    """프로세스 내 분위수 버퍼를 비웁니다 (벤치마크 구간 분리용, Prometheus 누적값은 유지)."""
+    with _recent_lock:
+        _recent.clear()
+
+
+def latency_summary() -> Dict[str, Dict[str, Any]]:
+    """최근 샘플 기준 (kind.name) 별 count / p50 / p95 / p99 (초)."""
+    with _recent_lock:
+        snapshot = {key: sorted(values) for key, values in _recent.items() if values}
+    return {
+        f"{kind}.{name}": {
+            "count": len(values),
+            "p50": round(_percentile(values, 50), 4),
+            "p95": round(_percentile(values, 95), 4),
+            "p99": round(_percentile(values, 99), 4),
+        }
+        for (kind, name), values in sorted(snapshot.items())
+    }
+
+
+class TracingCallback(BaseCallbackHandler):
+    """LLM 호출별 wall time / 토큰 사용량 / 오류를 기록합니다 (ModelFactory가 모델마다 붙임)."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._starts: Dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID) -> None:
+        tracer = get_tracer()
+        otel_span = None
+        if tracer is not None:
+            otel_span = tracer.start_span(
+                f"llm.{self.model_name}", attributes={"llm.model": self.model_name}
+            )
+        self._starts[run_id] = (time.perf_counter(), otel_span)
+
+    def _end(self, run_id: UUID, **attributes: Any) -> None:
+        start, otel_span = self._starts.pop(run_id, (None, None))
+        if start is None:
+            return
+        record("llm", self.model_name, time.perf_counter() - start)
+        if otel_span is not None:
+            for k, v in attributes.items():
+                otel_span.set_attribute(k, v)
+            otel_span.end()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = dict((response.llm_output or {}).get("token_usage") or {})
+        if not usage:
+            for gens in response.generations:
+                for gen in gens:
+                    meta = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                    if meta:
+                        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + meta.get("input_tokens", 0)
+                        usage["completion_tokens"] = usage.get("completion_tokens", 0) + meta.get("output_tokens", 0)
+
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        if LLM_TOKENS is not None:
+            LLM_TOKENS.labels(model=self.model_name, type="prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(model=self.model_name, type="completion").inc(completion_tokens)
+
+        self._end(
+            run_id,
+            **{
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+            },
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        from common.llm_scheduler import retryable_errors
+
+        retryable = isinstance(error, retryable_errors())
+        if LLM_ERRORS is not None:
+            LLM_ERRORS.labels(
+                model=self.model_name, retryable="yes" if retryable else "no"
+            ).inc()
+        self._end(run_id, **{"llm.error": type(error).__name__})
@@ -1,35 +1,45 @@
+import asyncio
+
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
 
 # Conditional Imports for Redis
 try:
-    from redis import Redis
     from common.memory.redis_checkpointer import RedisSaver
+    from common.redis_pool import get_redis
 except ImportError:
-    Redis = None
     RedisSaver = None
 
 from state import AgentState
 from common.config import Config
 from common.model_factory import ModelFactory
 from common.logger_config import setup_logger
+from common.tracing import traced
 
 # --- 모듈형 RAG 컴포넌트 임포트 (Modular RAG Components) ---
-from modules.generator import generate_answer
-from modules.retriever import retrieve_documents
-from modules.grader import grade_documents, grade_hallucination, grade_answer
-from modules.rewriter import rewrite_query
-from modules.field_selector import field_selector
-from modules.sop_retriever import sop_retriever
-from modules.memory import summarize_conversation
-from modules.sql_retriever import SQLRetriever
+from modules.generator import generate_answer, agenerate_answer
+from modules.retriever import retrieve_documents, aretrieve_documents
+from modules.grader import (
+    grade_documents,
+    grade_hallucination,
+    grade_answer,
+    agrade_documents,
+    agrade_hallucination,
+    agrade_answer,
+)
+from modules.rewriter import rewrite_query, arewrite_query
+from modules.field_selector import field_selector, afield_selector
+from modules.sop_retriever import sop_retriever, asop_retriever
+from modules.memory import answer_update, summarize_conversation
+from modules.sql_retriever import get_sql_retriever
 from modules.drafting_agent import DraftingAgent
 
 # Fallback / Simple Chat
-from modules.chat_worker import chat_worker
+from modules.chat_worker import chat_worker, achat_worker
 
 logger = setup_logger("GRAPH")
 
@@ -40,16 +50,16 @@ class RouterOutput(BaseModel):
     )
 
 
-def node_router(state: AgentState):
+ROUTER_GREETINGS = ["안녕", "반가워", "누구니", "hello", "hi", "하이", "ㅎㅇ"]
+
+
+def _router_prepare(state: AgentState):
     """
-    [Node] Router
-    사용자의 의도를 'chat', 'fast', 'deep', 'report' 중 하나로 분류합니다.
-    새로운 주제(Context Pivot) 여부를 판단하여 이전 맥락을 관리합니다.
+    [컨텍스트 관리] 이전 턴 문서를 persist 후보로 등록하고 턴 상태를 초기화합니다.
+    Returns: (persist_docs, keyword_hit)
     """
-    logger.info("--- [Router] Routing ---")
     query = state.get("query", "")
 
-    # [컨텍스트 관리]
     # 이전 턴의 문서는 일단 유지하지만, Router 판단에 따라 persist 여부 결정
     prev_docs = state.get("documents", [])
     persist_docs = state.get("persist_documents", [])
@@ -72,18 +82,18 @@ def node_router(state: AgentState):
     state["feedback"] = ""
 
     # 1. 빠른 키워드 체크 (Optimization)
-    greetings = ["안녕", "반가워", "누구니", "hello", "hi", "하이", "ㅎㅇ"]
-    if any(query.strip().startswith(x) for x in greetings) and len(query) < 10:
-        logger.info(" -> [Router] Keyword Hit: Chat")
-        return {"mode": "chat", "category": "chat"}
+    keyword_hit = (
+        any(query.strip().startswith(x) for x in ROUTER_GREETINGS) and len(query) < 10
+    )
+    return persist_docs, keyword_hit
 
-    # 2. 의도 분류 (Intent Classification)
-    try:
-        # [HyperCLOVA X] Heavy 모델로 의도 분석 (Reasoning Optimized)
-        llm = ModelFactory.get_rag_model(level="heavy", temperature=0)
 
-        # [Note] HCX 안정성을 위해 문자열 출력 파싱 방식 사용
-        system_prompt = """당신은 감사 RAG 시스템의 의도 분류기(Intent Classifier)입니다.
+def _router_chain():
+    # [HyperCLOVA X] Heavy 모델로 의도 분석 (Reasoning Optimized)
+    llm = ModelFactory.get_rag_model(level="heavy", temperature=0)
+
+    # [Note] HCX 안정성을 위해 문자열 출력 파싱 방식 사용
+    system_prompt = """당신은 감사 RAG 시스템의 의도 분류기(Intent Classifier)입니다.
         
         사용자의 질문을 다음 4가지 카테고리 중 하나로 분류하십시오:
         1. 'chat': 일상 대화, 인사, 자기소개 또는 감사와 무관한 질문.
@@ -110,82 +120,118 @@ def node_router(state: AgentState):
         예시 3: report | False
         """
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_prompt),
-                ("human", "Query: {query}"),
-            ]
-        )
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            ("human", "Query: {query}"),
+        ]
+    )
+
+    return prompt | llm | StrOutputParser()
+
+
+def _router_decision(state: AgentState, result_text: str, persist_docs: list) -> dict:
+    """Router LLM 출력('Category | NewTopic')을 파싱하여 상태 업데이트를 만듭니다."""
+    # 결과 파싱
+    cleaned_text = result_text.strip().lower()
+
+    # 안전한 파싱 (Pipe 구분 또는 줄바꿈 처리)
+    parts = cleaned_text.split("|")
+    category_part = parts[0].strip()
+    new_topic_part = parts[1].strip() if len(parts) > 1 else ""
 
-        chain = prompt | llm | StrOutputParser()
-        result_text = chain.invoke({"query": query})
-
-        # 결과 파싱
-        cleaned_text = result_text.strip().lower()
-
-        # 안전한 파싱 (Pipe 구분 또는 줄바꿈 처리)
-        parts = cleaned_text.split("|")
-        category_part = parts[0].strip()
-        new_topic_part = parts[1].strip() if len(parts) > 1 else ""
-
-        # Category 결정
-        if "report" in category_part:
-            category = "report"
-        elif "fast" in category_part:
-            category = "fast"
-        elif "chat" in category_part:
-            category = "chat"
-        else:
+    # Category 결정
+    if "report" in category_part:
+        category = "report"
+    elif "fast" in category_part:
+        category = "fast"
+    elif "chat" in category_part:
+        category = "chat"
+    else:
+        category = "deep"
+
+    # NewTopic 결정
+    is_new_topic = True
+    if "false" in new_topic_part or "no" in new_topic_part:
+        is_new_topic = False
+
+    # [Safety Net] Context 없이 Report 요청 시 Deep으로 전환
+    if category == "report":
+        has_context = len(persist_docs) > 0 or len(state.get("messages", [])) > 2
+        if not has_context:
+            logger.info(
+                " -> [Router] Report requested without context. Fallback to 'deep'."
+            )
             category = "deep"
+            is_new_topic = True
 
-        # NewTopic 결정
-        is_new_topic = True
-        if "false" in new_topic_part or "no" in new_topic_part:
-            is_new_topic = False
-
-        # [Safety Net] Context 없이 Report 요청 시 Deep으로 전환
-        if category == "report":
-            has_context = len(persist_docs) > 0 or len(state["messages"]) > 2
-            if not has_context:
-                logger.info(
-                    " -> [Router] Report requested without context. Fallback to 'deep'."
-                )
-                category = "deep"
-                is_new_topic = True
-
-        mode = category  # category 이름이 곧 mode 키
-
-        logger.info(
-            f" -> [Router] Decision: {mode.upper()} | New Topic: {is_new_topic}"
-        )
+    mode = category  # category 이름이 곧 mode 키
 
-        # [컨텍스트 관리]
-        final_persist_docs = []
-        if not is_new_topic:
-            final_persist_docs = persist_docs
-            if final_persist_docs:
-                logger.info(
-                    f" -> [Router] Persistence: KEEPING {len(final_persist_docs)} docs (Follow-up)"
-                )
-        else:
-            logger.info(" -> [Router] Persistence: CLEARED (New Topic)")
-
-        return {
-            "mode": mode,
-            "category": category,
-            "search_query": "",
-            "persist_documents": final_persist_docs,
-            "documents": [],
-            "command": "",
-        }
+    logger.info(f" -> [Router] Decision: {mode.upper()} | New Topic: {is_new_topic}")
+
+    # [컨텍스트 관리]
+    final_persist_docs = []
+    if not is_new_topic:
+        final_persist_docs = persist_docs
+        if final_persist_docs:
+            logger.info(
+                f" -> [Router] Persistence: KEEPING {len(final_persist_docs)} docs (Follow-up)"
+            )
+    else:
+        logger.info(" -> [Router] Persistence: CLEARED (New Topic)")
 
+    return {
+        "mode": mode,
+        "category": category,
+        "search_query": "",
+        "persist_documents": final_persist_docs,
+        "documents": [],
+        "command": "",
+    }
+
+
+ROUTER_FALLBACK = {
+    "mode": "deep",
+    "category": "deep",
+    "persist_documents": [],
+}
+
+
+def node_router(state: AgentState):
+    """
+    [Node] Router
+    사용자의 의도를 'chat', 'fast', 'deep', 'report' 중 하나로 분류합니다.
+    새로운 주제(Context Pivot) 여부를 판단하여 이전 맥락을 관리합니다.
+    """
+    logger.info("--- [Router] Routing ---")
+    persist_docs, keyword_hit = _router_prepare(state)
+    if keyword_hit:
+        logger.info(" -> [Router] Keyword Hit: Chat")
+        return {"mode": "chat", "category": "chat"}
+
+    # 2. 의도 분류 (Intent Classification)
+    try:
+        result_text = _router_chain().invoke({"query": state.get("query", "")})
+        return _router_decision(state, result_text, persist_docs)
     except Exception as e:
         logger.error(f" -> [Router] Error ({e}), Defaulting to Deep RAG")
-        return {
-            "mode": "deep",
-            "category": "deep",
-            "persist_documents": [],
-        }
+        return dict(ROUTER_FALLBACK)
+
+
+async def anode_router(state: AgentState):
+    """[Node] Router (async)"""
+    logger.info("--- [Router] Routing (async) ---")
+    persist_docs, keyword_hit = _router_prepare(state)
+    if keyword_hit:
+        logger.info(" -> [Router] Keyword Hit: Chat")
+        return {"mode": "chat", "category": "chat"}
+
+    try:
+        result_text = await _router_chain().ainvoke({"query": state.get("query", "")})
+        return _router_decision(state, result_text, persist_docs)
+    except Exception as e:
+        logger.error(f" -> [Router] Error ({e}), Defaulting to Deep RAG")
+        return dict(ROUTER_FALLBACK)
 
 
 # --- 조건부 엣지 (Conditional Edges) ---
@@ -265,6 +311,8 @@ def route_verification(state: AgentState):
 
 
 # --- 노드 래퍼 (Wrapper) ---
+# 각 노드는 sync/async 두 버전을 가집니다.
+# app.invoke()는 sync 함수를, app.astream()/ainvoke()는 async 함수를 사용합니다.
 
 
 def node_retrieve(state: AgentState):
@@ -272,6 +320,10 @@ def node_retrieve(state: AgentState):
     return retrieve_documents(state)
 
 
+async def anode_retrieve(state: AgentState):
+    return await aretrieve_documents(state)
+
+
 def node_grade_documents(state: AgentState):
     """문서 평가 노드."""
     q = state.get("search_query") or state["query"]
@@ -283,6 +335,16 @@ def node_grade_documents(state: AgentState):
     }
 
 
+async def anode_grade_documents(state: AgentState):
+    q = state.get("search_query") or state["query"]
+    docs = state.get("documents", [])
+    result = await agrade_documents(q, docs)
+    return {
+        "documents": result["documents"],
+        "grade_status": result["is_retrieval_success"],
+    }
+
+
 def node_rewrite(state: AgentState):
     """쿼리 재작성 노드."""
     q = state.get("search_query") or state["query"]
@@ -293,31 +355,68 @@ def node_rewrite(state: AgentState):
     }
 
 
+async def anode_rewrite(state: AgentState):
+    q = state.get("search_query") or state["query"]
+    new_q = await arewrite_query(q)
+    return {
+        "search_query": new_q,
+        "retrieval_count": state.get("retrieval_count", 0) + 1,
+    }
+
+
 def node_generate(state: AgentState):
     """답변 생성 노드."""
     return generate_answer(state)
 
 
+async def anode_generate(state: AgentState):
+    return await agenerate_answer(state)
+
+
+def _has_grounding_docs(docs) -> bool:
+    return bool(docs) and docs != ["검색 결과가 없습니다."]
+
+
+def _consistency_result(state: AgentState, is_grounded: str, is_useful: str):
+    is_hallucinated = "no" if is_grounded == "yes" else "yes"
+    return {
+        "is_hallucinated": is_hallucinated,
+        "is_useful": is_useful,
+        "reflection_count": state.get("reflection_count", 0) + 1,
+    }
+
+
 def node_consistency_check(state: AgentState):
     """환각(Hallucination) 및 유용성(Utility) 검증 노드."""
     ans = state.get("answer", "")
     docs = state.get("documents", [])
 
     # 문서가 없으면 환각 아님(Grounding 불가), 유용성은 낮음으로 처리
-    if not docs or docs == ["검색 결과가 없습니다."]:
+    if not _has_grounding_docs(docs):
         return {"is_hallucinated": "no", "is_useful": "no"}
 
     is_grounded = grade_hallucination(ans, docs)  # 'yes' or 'no'
-    is_hallucinated = "no" if is_grounded == "yes" else "yes"
 
     q = state.get("search_query") or state["query"]
     is_useful = grade_answer(q, ans)
 
-    return {
-        "is_hallucinated": is_hallucinated,
-        "is_useful": is_useful,
-        "reflection_count": state.get("reflection_count", 0) + 1,
-    }
+    return _consistency_result(state, is_grounded, is_useful)
+
+
+async def anode_consistency_check(state: AgentState):
+    """환각/유용성 검증을 동시에 수행합니다 (두 채점은 서로 독립적)."""
+    ans = state.get("answer", "")
+    docs = state.get("documents", [])
+
+    if not _has_grounding_docs(docs):
+        return {"is_hallucinated": "no", "is_useful": "no"}
+
+    q = state.get("search_query") or state["query"]
+    is_grounded, is_useful = await asyncio.gather(
+        agrade_hallucination(ans, docs), agrade_answer(q, ans)
+    )
+
+    return _consistency_result(state, is_grounded, is_useful)
 
 
 def node_retrieve_sql(state: AgentState):
@@ -326,50 +425,84 @@ def node_retrieve_sql(state: AgentState):
     query = state["query"]
     context = state.get("persist_documents", []) or state.get("documents", [])
 
-    retriever = SQLRetriever()
+    retriever = get_sql_retriever()
     documents = retriever.retrieve(query, context=context)
     return {"documents": documents, "retrieval_count": 1}
 
 
-def node_report_manager(state: AgentState):
-    """[Node] Report Manager (Drafting Agent)"""
-    logger.info("--- [Node] Report Manager ---")
-    agent = DraftingAgent()
-    result = agent.analyze_requirements(state["messages"])
+async def anode_retrieve_sql(state: AgentState):
+    logger.info("--- [Node] SQL Retrieve (async) ---")
+    query = state["query"]
+    context = state.get("persist_documents", []) or state.get("documents", [])
+
+    retriever = get_sql_retriever()
+    documents = await retriever.aretrieve(query, context=context)
+    return {"documents": documents, "retrieval_count": 1}
 
+
+def _report_manager_result(result: dict) -> dict:
     if result.get("status") == "ready":
         logger.info(" -> [Report Manager] Ready. Triggering Frontend.")
-        return {
-            "answer": "보고서 작성을 위한 정보가 충분합니다. 작성을 시작합니다...",
-            "command": "open_report",
-        }
+        return answer_update(
+            "보고서 작성을 위한 정보가 충분합니다. 작성을 시작합니다...",
+            command="open_report",
+        )
     else:
         missing = result.get("missing_fields", [])
         logger.info(f" -> [Report Manager] Missing: {missing}")
         missing_str = ", ".join(missing)
-        return {
-            "answer": f"보고서 작성을 위해 다음 정보가 더 필요합니다: {missing_str}. \n해당 정보를 말씀해 주시면 바로 초안을 작성해 드리겠습니다.",
-            "command": "",
-        }
+        return answer_update(
+            f"보고서 작성을 위해 다음 정보가 더 필요합니다: {missing_str}. \n해당 정보를 말씀해 주시면 바로 초안을 작성해 드리겠습니다.",
+            command="",
+        )
+
+
+def node_report_manager(state: AgentState):
+    """[Node] Report Manager (Drafting Agent)"""
+    logger.info("--- [Node] Report Manager ---")
+    agent = DraftingAgent()
+    result = agent.analyze_requirements(state["messages"])
+    return _report_manager_result(result)
+
+
+async def anode_report_manager(state: AgentState):
+    logger.info("--- [Node] Report Manager (async) ---")
+    agent = DraftingAgent()
+    result = await agent.aanalyze_requirements(state["messages"])
+    return _report_manager_result(result)
+
+
+def _node(name: str, func, afunc=None):
+    """sync/async 구현을 하나의 노드로 묶고, 노드 단위 wall time을 기록합니다."""
+    return RunnableLambda(
+        traced("node", name)(func),
+        afunc=traced("node", name)(afunc) if afunc else None,
+        name=name,
+    )
 
 
 # --- 그래프 구성 (Graph Construction) ---
 
 workflow = StateGraph(AgentState)
 
+
+def _add_node(name: str, func, afunc=None):
+    workflow.add_node(name, _node(name, func, afunc))
+
+
 # Nodes
-workflow.add_node("router", node_router)
-workflow.add_node("chat_worker", chat_worker)
-workflow.add_node("report_manager", node_report_manager)
-workflow.add_node("retrieve_sql", node_retrieve_sql)
-workflow.add_node("field_selector", field_selector)
-workflow.add_node("hybrid_retriever", node_retrieve)
-workflow.add_node("grade_documents", node_grade_documents)
-workflow.add_node("sop_retriever", sop_retriever)
-workflow.add_node("rewrite_query", node_rewrite)
-workflow.add_node("generate", node_generate)
-workflow.add_node("verify_answer", node_consistency_check)
-workflow.add_node("summarize_conversation", summarize_conversation)
+_add_node("router", node_router, anode_router)
+_add_node("chat_worker", chat_worker, achat_worker)
+_add_node("report_manager", node_report_manager, anode_report_manager)
+_add_node("retrieve_sql", node_retrieve_sql, anode_retrieve_sql)
+_add_node("field_selector", field_selector, afield_selector)
+_add_node("hybrid_retriever", node_retrieve, anode_retrieve)
+_add_node("grade_documents", node_grade_documents, anode_grade_documents)
+_add_node("sop_retriever", sop_retriever, asop_retriever)
+_add_node("rewrite_query", node_rewrite, anode_rewrite)
+_add_node("generate", node_generate, anode_generate)
+_add_node("verify_answer", node_consistency_check, anode_consistency_check)
+_add_node("summarize_conversation", summarize_conversation)
 
 # Edges
 workflow.set_entry_point("router")
@@ -436,11 +569,17 @@ workflow.add_conditional_edges(
 workflow.add_edge("summarize_conversation", END)
 
 # Checkpointer
-if Config.ENABLE_REDIS and Redis is not None:
+if Config.ENABLE_REDIS and RedisSaver is not None:
     try:
-        redis_client = Redis(host="localhost", port=6379, db=0)
+        redis_client = get_redis()
         redis_client.ping()
-        checkpointer = RedisSaver(redis_client)
+        # async 경로(astream)는 이벤트 루프별 redis.asyncio 공용 풀을 사용합니다.
+        checkpointer = RedisSaver(
+            redis_client,
+            ttl=Config.CHECKPOINT_TTL,
+            compress=Config.CHECKPOINT_COMPRESSION == "zstd",
+            keep_last=Config.CHECKPOINT_KEEP_LAST,
+        )
         logger.info("✅ Redis Memory Enabled")
     except Exception as e:
         logger.warning(f"⚠️ Redis connection failed ({e}). Fallback to In-Memory.")
@@ -3,15 +3,13 @@ from langchain_core.output_parsers import StrOutputParser
 
 from common.model_factory import ModelFactory
 from state import AgentState
+from modules.memory import answer_update
 from common.logger_config import setup_logger
 
 logger = setup_logger("CHAT_WORKER")
 
 
-def chat_worker(state: AgentState):
-    logger.info("--- [ChatWorker] Handling Chit-Chat ---")
-    query = state["query"]
-
+def _chat_chain():
     # 단순 대화 프롬프트 정의 (Simple Chat Prompt)
     prompt = ChatPromptTemplate.from_template(
         """
@@ -48,11 +46,29 @@ def chat_worker(state: AgentState):
     )
 
     llm = ModelFactory.get_rag_model(level="light")  # 채팅용 경량 모델 사용
-    chain = prompt | llm | StrOutputParser()
+    return prompt | llm | StrOutputParser()
+
+
+def chat_worker(state: AgentState):
+    logger.info("--- [ChatWorker] Handling Chit-Chat ---")
+    query = state["query"]
+
+    try:
+        response = _chat_chain().invoke({"query": query})
+        return answer_update(response)
+    except Exception as e:
+        logger.error(f"[ChatWorker] 오류 발생: {e}")
+        return answer_update("죄송합니다. 일시적인 오류가 발생했습니다.")
+
+
+async def achat_worker(state: AgentState):
+    """chat_worker의 비동기 버전 (ainvoke)."""
+    logger.info("--- [ChatWorker] Handling Chit-Chat (async) ---")
+    query = state["query"]
 
     try:
-        response = chain.invoke({"query": query})
-        return {"answer": response}
+        response = await _chat_chain().ainvoke({"query": query})
+        return answer_update(response)
     except Exception as e:
         logger.error(f"[ChatWorker] 오류 발생: {e}")
-        return {"answer": "죄송합니다. 일시적인 오류가 발생했습니다."}
+        return answer_update("죄송합니다. 일시적인 오류가 발생했습니다.")
@@ -0,0 +1,108 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from common.chunking import count_tokens, split_sections as _split_sections
+from common.config import Config
+from common.logger_config import setup_logger
+
+logger = setup_logger("CONTEXT_PACKER")
+
+WORD_PATTERN = re.compile(r"[가-힣A-Za-z0-9]{2,}")
+
+# 트리밍 후 남은 예산이 이보다 작으면 더 이상 문서를 넣지 않습니다.
+MIN_DOC_TOKENS = 80
+
+
+def budget_for(level: str) -> int:
+    """모델 레벨별 컨텍스트 토큰 예산."""
+    return Config.CONTEXT_TOKEN_BUDGET.get(level, Config.CONTEXT_TOKEN_BUDGET["light"])
+
+
+def _query_terms(query: str) -> set:
+    return set(WORD_PATTERN.findall(query or ""))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """토큰 예산에 맞게 텍스트 뒷부분을 자릅니다 (이진 탐색)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + "..."
+
+
+def trim_to_relevant(text: str, query: str, max_tokens: int) -> str:
+    """
+    문서 본문을 질문과 관련성이 높은 섹션 위주로 max_tokens 이내로 줄입니다.
+    [Title] 섹션은 항상 유지하고, 나머지는 질문 키워드 겹침 점수 순으로 채운 뒤 원래 순서로 재배열합니다.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    terms = _query_terms(query)
+    sections = _split_sections(text)
+
+    scored = []
+    for i, sec in enumerate(sections):
+        if sec.startswith("[Title]:"):
+            score = float("inf")
+        else:
+            score = sum(1 for t in terms if t in sec)
+        scored.append((score, i, sec))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+
+    kept = []
+    used = 0
+    for score, i, sec in scored:
+        sec_tokens = count_tokens(sec)
+        remaining = max_tokens - used
+        if sec_tokens <= remaining:
+            kept.append((i, sec))
+            used += sec_tokens
+        elif remaining >= MIN_DOC_TOKENS:
+            kept.append((i, _truncate_to_tokens(sec, remaining)))
+            used = max_tokens
+            break
+
+    kept.sort(key=lambda x: x[0])
+    return "\n".join(sec for _, sec in kept)
+
+
+def pack_context(
+    items: List[Tuple[str, str]],
+    query: str,
+    budget: int,
+) -> Dict[str, Any]:
+    """
+    (header, body) 목록을 랭킹 순서대로 토큰 예산 안에 채웁니다.
+    - header(메타데이터 블록)는 그대로 두고 body만 트리밍합니다.
+    - 각 문서는 Config.CONTEXT_PER_DOC_TOKENS 이내로 먼저 줄인 뒤 예산을 채웁니다.
+    Returns: {"texts": [...], "tokens": 사용 토큰, "dropped": 제외된 문서 수}
+    """
+    texts = []
+    used = 0
+    dropped = 0
+
+    for header, body in items:
+        header_tokens = count_tokens(header)
+        remaining = budget - used - header_tokens
+        if remaining < MIN_DOC_TOKENS:
+            dropped += 1
+            continue
+
+        body_budget = min(Config.CONTEXT_PER_DOC_TOKENS, remaining)
+        trimmed = trim_to_relevant(body, query, body_budget)
+        text = f"{header}{trimmed}" if header else trimmed
+
+        texts.append(text)
+        used += header_tokens + count_tokens(trimmed)
+
+    logger.info(
+        f" -> Context Packed: {len(texts)} docs, {used}/{budget} tokens (dropped {dropped})"
+    )
+    return {"texts": texts, "tokens": used, "dropped": dropped}
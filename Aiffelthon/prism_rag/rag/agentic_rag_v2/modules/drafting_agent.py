@@ -20,18 +20,7 @@ class DraftingAgent:
             level="reasoning", temperature=0.0
         )
 
-    def analyze_requirements(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
-        """
-        Analyzes conversation history to check for missing report requirements.
-        """
-        logger.info("--- [DraftingAgent] Analyzing Requirements ---")
-
-        # Format history
-        formatted_history = ""
-        for msg in messages:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            formatted_history += f"[{role}]: {msg['content']}\n\n"
-
+    def _requirements_chain(self):
         system_prompt = """
         당신은 "깐깐한" 보고서 요건 분석가(Request Analyst)입니다.
         대화 내역을 분석하여 감사 보고서 작성에 필요한 필수 정보가 포함되어 있는지 확인하십시오.
@@ -78,17 +67,51 @@ class DraftingAgent:
             ]
         )
 
-        chain = prompt | self.checker_llm | JsonOutputParser()
+        return prompt | self.checker_llm | JsonOutputParser()
+
+
+    @staticmethod
+    def _format_history(messages: List[Dict[str, str]]) -> str:
+        # Format history
+        formatted_history = ""
+        for msg in messages:
+            role = "User" if msg["role"] == "user" else "Assistant"
+            formatted_history += f"[{role}]: {msg['content']}\n\n"
+        return formatted_history
+
+    @staticmethod
+    def _requirements_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        if result.get("status") == "missing_info" and not result.get("missing_fields"):
+            result["missing_fields"] = ["사건 개요", "감사 기간", "대상 기관"]
+        return result
+
+    def analyze_requirements(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Analyzes conversation history to check for missing report requirements.
+        """
+        logger.info("--- [DraftingAgent] Analyzing Requirements ---")
 
         try:
-            result = chain.invoke({"history": formatted_history})
+            chain = self._requirements_chain()
+            result = chain.invoke({"history": self._format_history(messages)})
+            return self._requirements_result(result)
+        except Exception as e:
+            logger.error(f"Error analyzing requirements: {e}")
+            return {
+                "status": "ready",
+                "missing_fields": [],
+            }  # Fallback to ready to not block
 
-            if result.get("status") == "missing_info" and not result.get(
-                "missing_fields"
-            ):
-                result["missing_fields"] = ["사건 개요", "감사 기간", "대상 기관"]
+    async def aanalyze_requirements(
+        self, messages: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Async version of analyze_requirements."""
+        logger.info("--- [DraftingAgent] Analyzing Requirements (async) ---")
 
-            return result
+        try:
+            chain = self._requirements_chain()
+            result = await chain.ainvoke({"history": self._format_history(messages)})
+            return self._requirements_result(result)
         except Exception as e:
             logger.error(f"Error analyzing requirements: {e}")
             return {
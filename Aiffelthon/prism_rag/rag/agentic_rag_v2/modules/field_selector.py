@@ -94,13 +94,7 @@ FIELD_SELECTOR_USER = """
 """
 
 
-def field_selector(state: AgentState) -> dict:
-    """
-    [Node] 필드 선택기 (Field Selector):
-    사용자의 질문을 분석하여 메타데이터 필터를 추출하고,
-    CoT(Chain-of-Thought) 추론을 통해 검색에 필요한 관련 필드를 선택합니다.
-    """
-    logger.info("--- [Node] Field Selector (CoT) ---")
+def _field_selector_inputs(state: AgentState) -> dict:
     # 우선순위: 원본 질문(Original Query)을 사용하여 "최신", "2개" 같은 의도를 파악합니다.
     # 'search_query'는 키워드 위주로 최적화되어 수식어가 제거되었을 수 있기 때문입니다.
     question = state["query"]
@@ -114,7 +108,10 @@ def field_selector(state: AgentState) -> dict:
         history_text = "\n".join(
             [f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in recent]
         )
+    return {"question": question, "history": history_text}
 
+
+def _field_selector_chain():
     # 1. LLM 초기화
     llm = ModelFactory.get_rag_model(level="heavy", temperature=0)
     parser = JsonOutputParser(pydantic_object=FieldSelectorOutput)
@@ -129,51 +126,79 @@ def field_selector(state: AgentState) -> dict:
     # 포맷 지침 주입 (Inject format instructions)
     prompt = prompt.partial(format_instructions=parser.get_format_instructions())
 
-    # 2. 체인 실행 (Invoke Chain)
-    chain = prompt | llm | parser
+    # 2. 체인 구성 (Build Chain)
+    return prompt | llm | parser
+
+
+def _field_selector_output(result: dict) -> dict:
+    # 3. 결과 후처리 (Post-process Results)
+    selected_fields = result.get("selected_fields", [])
+    cot = result.get("selected_fields_cot", [])
+
+    # 중복 제거 및 필수 필드(mandatory fields) 강제 포함
+    merged_fields = list(set(selected_fields))
+    if "outline" not in merged_fields:
+        merged_fields.append("outline")
+    if "problems" not in merged_fields:
+        merged_fields.append("problems")
+
+    # 메타데이터 로직 (Metadata Extraction Logic)
+    # 현재는 필드/키워드 기반의 매핑을 수행하며, 추후 고도화 가능
+    extracted_filters = {}
+
+    # limit(문서 개수) 추출
+    limit = result.get("limit", 5)
+    if limit and limit != 5:  # 명시적으로 지정된 경우에만 추가
+        extracted_filters["k"] = limit
+
+    # 정렬 기준(Sort) 추출
+    sort_order = result.get("sort", "relevance")
+    if sort_order and sort_order != "relevance":
+        extracted_filters["sort"] = sort_order
+
+    logger.info(f" -> CoT: {cot}")
+    logger.info(f" -> Fields: {merged_fields}")
+    logger.info(f" -> Filters: {extracted_filters}")
+
+    return {
+        "selected_fields": merged_fields,
+        "selected_fields_cot": cot,
+        "metadata_filters": extracted_filters,
+    }
+
+
+def _field_selector_fallback(e: Exception) -> dict:
+    logger.error(f" -> Field Selector Failed: {e}")
+    return {
+        "selected_fields": ["outline", "problems"],
+        "selected_fields_cot": [f"Error: {str(e)}"],
+        "metadata_filters": {},
+    }
+
+
+def field_selector(state: AgentState) -> dict:
+    """
+    [Node] 필드 선택기 (Field Selector):
+    사용자의 질문을 분석하여 메타데이터 필터를 추출하고,
+    CoT(Chain-of-Thought) 추론을 통해 검색에 필요한 관련 필드를 선택합니다.
+    """
+    logger.info("--- [Node] Field Selector (CoT) ---")
 
     try:
-        result = chain.invoke({"question": question, "history": history_text})
-
-        # 3. 결과 후처리 (Post-process Results)
-        selected_fields = result.get("selected_fields", [])
-        cot = result.get("selected_fields_cot", [])
-
-        # 중복 제거 및 필수 필드(mandatory fields) 강제 포함
-        merged_fields = list(set(selected_fields))
-        if "outline" not in merged_fields:
-            merged_fields.append("outline")
-        if "problems" not in merged_fields:
-            merged_fields.append("problems")
-
-        # 메타데이터 로직 (Metadata Extraction Logic)
-        # 현재는 필드/키워드 기반의 매핑을 수행하며, 추후 고도화 가능
-        extracted_filters = {}
-
-        # limit(문서 개수) 추출
-        limit = result.get("limit", 5)
-        if limit and limit != 5:  # 명시적으로 지정된 경우에만 추가
-            extracted_filters["k"] = limit
-
-        # 정렬 기준(Sort) 추출
-        sort_order = result.get("sort", "relevance")
-        if sort_order and sort_order != "relevance":
-            extracted_filters["sort"] = sort_order
-
-        logger.info(f" -> CoT: {cot}")
-        logger.info(f" -> Fields: {merged_fields}")
-        logger.info(f" -> Filters: {extracted_filters}")
-
-        return {
-            "selected_fields": merged_fields,
-            "selected_fields_cot": cot,
-            "metadata_filters": extracted_filters,
-        }
+        result = _field_selector_chain().invoke(_field_selector_inputs(state))
+        return _field_selector_output(result)
+    except Exception as e:
+        return _field_selector_fallback(e)
+
 
+async def afield_selector(state: AgentState) -> dict:
+    """
+    [Node] field_selector의 비동기 버전 (ainvoke).
+    """
+    logger.info("--- [Node] Field Selector (CoT, async) ---")
+
+    try:
+        result = await _field_selector_chain().ainvoke(_field_selector_inputs(state))
+        return _field_selector_output(result)
     except Exception as e:
-        logger.error(f" -> Field Selector Failed: {e}")
-        return {
-            "selected_fields": ["outline", "problems"],
-            "selected_fields_cot": [f"Error: {str(e)}"],
-            "metadata_filters": {},
-        }
+        return _field_selector_fallback(e)
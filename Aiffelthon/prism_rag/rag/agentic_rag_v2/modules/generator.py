@@ -1,9 +1,11 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langgraph.config import get_stream_writer
 
 from common.model_factory import ModelFactory
 from common.logger_config import setup_logger
 from state import AgentState
+from .context_packer import pack_context, budget_for
 
 logger = setup_logger("GENERATOR")
 
@@ -11,15 +13,23 @@ logger = setup_logger("GENERATOR")
 generator_llm = ModelFactory.get_rag_model(level="reasoning", temperature=0.1)
 
 
-def generate_answer(state: AgentState) -> AgentState:
+def _get_stream_writer():
     """
-    [Node] 검색된 문서 또는 통계 결과를 바탕으로 최종 답변을 생성합니다.
-    페르소나에 따라 적절한 프롬프트를 사용하여 응답을 구성합니다.
+    LangGraph 실행 중이면 custom 스트림 writer를, 그래프 밖에서 직접 호출되면 no-op을 반환합니다.
+    """
+    try:
+        return get_stream_writer()
+    except Exception:
+        return lambda chunk: None
+
+
+def _prepare_generation(state: AgentState):
+    """
+    생성 프롬프트와 입력값을 구성합니다 (동기/비동기 노드 공용).
+    Returns: (prompt, inputs, documents, updates) - updates는 노드가 함께 반환할 상태 키
     """
-    logger.info("generate_answer: 답변 생성 중...")
     # 0. Reflection Count 증가
-    current_count = state.get("reflection_count", 0)
-    state["reflection_count"] = current_count + 1
+    updates = {"reflection_count": state.get("reflection_count", 0) + 1}
 
     # 1. 단일 시스템 프롬프트 정의 (Audit Assistant)
     system_msg = """
@@ -78,7 +88,8 @@ PRISM은 Public Risk Intelligence & Smart Management의 약자로, 단편적인
 
     # 컨텍스트 형식화 (Context Format)
     # 문자열과 Document 객체를 모두 처리합니다.
-    docs_text = []
+    # 메타데이터 블록(header)은 유지하고, 본문은 토큰 예산에 맞게 질문 관련 섹션 위주로 압축합니다.
+    doc_items = []
     documents = state.get("documents", [])
     for d in documents:
         if hasattr(d, "page_content"):
@@ -107,12 +118,15 @@ PRISM은 Public Risk Intelligence & Smart Management의 약자로, 단편적인
             if download_url:
                 meta_block += f"\n- 다운로드: {download_url}"
 
-            doc_str = f"{meta_block}\n\n[[내용]]\n{d.page_content}"
-            docs_text.append(doc_str)
+            doc_items.append((f"{meta_block}\n\n[[내용]]\n", d.page_content))
         else:
-            docs_text.append(str(d))
+            doc_items.append(("", str(d)))
 
-    context_text = "\n\n---\n\n".join(docs_text)
+    query_for_packing = state.get("search_query") or state["query"]
+    packed = pack_context(doc_items, query_for_packing, budget_for("reasoning"))
+    updates["context_tokens"] = packed["tokens"]
+
+    context_text = "\n\n---\n\n".join(packed["texts"])
 
     # [Safety] 컨텍스트가 비어있을 경우, 명시적인 플레이스홀더를 제공하여
     # API 400 에러나 환각(Hallucination)을 방지합니다.
@@ -192,15 +206,15 @@ PRISM은 Public Risk Intelligence & Smart Management의 약자로, 단편적인
         ]
     )
 
-    chain = prompt | generator_llm | StrOutputParser()
-    answer = chain.invoke(
-        {
-            "context": context_text,
-            "chat_history": chat_history_str,
-            "query": state["query"],
-        }
-    )
+    inputs = {
+        "context": context_text,
+        "chat_history": chat_history_str,
+        "query": state["query"],
+    }
+    return prompt, inputs, documents, updates
+
 
+def _append_sources(answer: str, documents: list) -> str:
     # [Source Citation Auto-Append]
     # 답변 하단에 [참고 문서] 섹션을 자동으로 추가하여 신뢰도를 높입니다.
     if documents:
@@ -239,5 +253,62 @@ PRISM은 Public Risk Intelligence & Smart Management의 약자로, 단편적인
                 else:
                     answer += f"- {display_title}\n"
 
-    state["answer"] = answer
-    return state
+    return answer
+
+
+def generate_answer(state: AgentState) -> dict:
+    """
+    [Node] 검색된 문서 또는 통계 결과를 바탕으로 최종 답변을 생성합니다.
+    페르소나에 따라 적절한 프롬프트를 사용하여 응답을 구성합니다.
+    변경한 키만 반환합니다 (assistant 메시지는 summarize_conversation에서 한 번만 덧붙입니다).
+    """
+    logger.info("generate_answer: 답변 생성 중...")
+    prompt, inputs, documents, updates = _prepare_generation(state)
+
+    # [Streaming] 토큰 단위로 custom 스트림 채널에 전달합니다.
+    # 백엔드(event_generator)는 이를 'token' SSE 이벤트로 즉시 전송하고,
+    # 검증 후 재생성되면 'generation_start'를 보고 'revision' 이벤트를 보냅니다.
+    writer = _get_stream_writer()
+    writer({"type": "generation_start"})
+
+    chain = prompt | generator_llm | StrOutputParser()
+    answer_parts = []
+    for token in chain.stream(inputs):
+        answer_parts.append(token)
+        writer({"type": "token", "content": token})
+    answer = "".join(answer_parts)
+    streamed_len = len(answer)
+
+    answer = _append_sources(answer, documents)
+
+    # 자동 추가된 참고 문서 섹션도 스트림으로 이어서 전송합니다.
+    if len(answer) > streamed_len:
+        writer({"type": "token", "content": answer[streamed_len:]})
+
+    return {"answer": answer, **updates}
+
+
+async def agenerate_answer(state: AgentState) -> dict:
+    """
+    [Node] generate_answer의 비동기 버전 (astream).
+    """
+    logger.info("generate_answer: 답변 생성 중... (async)")
+    prompt, inputs, documents, updates = _prepare_generation(state)
+
+    writer = _get_stream_writer()
+    writer({"type": "generation_start"})
+
+    chain = prompt | generator_llm | StrOutputParser()
+    answer_parts = []
+    async for token in chain.astream(inputs):
+        answer_parts.append(token)
+        writer({"type": "token", "content": token})
+    answer = "".join(answer_parts)
+    streamed_len = len(answer)
+
+    answer = _append_sources(answer, documents)
+
+    if len(answer) > streamed_len:
+        writer({"type": "token", "content": answer[streamed_len:]})
+
+    return {"answer": answer, **updates}
@@ -4,14 +4,17 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import List
 
+from common.config import Config
 from common.model_factory import ModelFactory
 from common.logger_config import setup_logger
+from .context_packer import pack_context, budget_for
 
 logger = setup_logger("GRADER")
 
 
 # --- LLM 초기화 (Initialization) ---
-llm = ModelFactory.get_rag_model(level="light", temperature=0)
+# 채점은 사용자 응답 생성보다 낮은 우선순위로 스케줄링됩니다.
+llm = ModelFactory.get_rag_model(level="light", temperature=0, priority="grading")
 
 
 # --- 1. 문서 평가기 (Retrieval Grader) ---
@@ -49,28 +52,44 @@ retrieval_grader_prompt = ChatPromptTemplate.from_messages(
 retrieval_grader_chain = retrieval_grader_prompt | llm | JsonOutputParser()
 
 
+def _doc_content_and_id(d) -> tuple:
+    # Compatibility handling
+    if isinstance(d, str):
+        return d, "unknown"
+    content = d.page_content
+    # Try to get meaningful ID or snippet
+    doc_id = d.metadata.get("source") or d.metadata.get("doc_id") or content[:30] + "..."
+    return content, doc_id
+
+
+def _collect_relevant(documents: List[Document], grades: List[str]) -> dict:
+    filtered_docs = []
+    relevant_found = False
+
+    for d, grade in zip(documents, grades):
+        _, doc_id = _doc_content_and_id(d)
+        if grade == "yes":
+            logger.info(f" -> Document Relevant: {doc_id}")
+            filtered_docs.append(d)
+            relevant_found = True
+        else:
+            logger.info(f" -> Document Irrelevant: {doc_id}")
+
+    return {
+        "documents": filtered_docs,
+        "is_retrieval_success": "yes" if relevant_found else "no",
+    }
+
+
 def grade_documents(question: str, documents: List[Document]) -> dict:
     """
     검색된 문서의 관련성(Relevance)을 평가합니다.
     """
     logger.info("--- [Modular RAG] Grading Documents ---")
 
-    filtered_docs = []
-    relevant_found = False
-
+    grades = []
     for d in documents:
-        # Compatibility handling
-        if isinstance(d, str):
-            content = d
-            doc_id = "unknown"
-        else:
-            content = d.page_content
-            # Try to get meaningful ID or snippet
-            doc_id = (
-                d.metadata.get("source")
-                or d.metadata.get("doc_id")
-                or content[:30] + "..."
-            )
+        content, doc_id = _doc_content_and_id(d)
 
         try:
             score = retrieval_grader_chain.invoke(
@@ -83,18 +102,40 @@ def grade_documents(question: str, documents: List[Document]) -> dict:
                 f"Grading failed for doc {doc_id} ({e}). Defaulting to 'no'."
             )
             grade = "no"
+        grades.append(grade)
 
-        if grade == "yes":
-            logger.info(f" -> Document Relevant: {doc_id}")
-            filtered_docs.append(d)
-            relevant_found = True
+    return _collect_relevant(documents, grades)
+
+
+async def agrade_documents(question: str, documents: List[Document]) -> dict:
+    """
+    grade_documents의 비동기 버전.
+    문서별 채점을 abatch로 동시에 수행합니다 (문서 수만큼의 순차 LLM 호출 제거).
+    """
+    logger.info("--- [Modular RAG] Grading Documents (async batch) ---")
+
+    inputs = [
+        {"question": question, "document": _doc_content_and_id(d)[0]}
+        for d in documents
+    ]
+    scores = await retrieval_grader_chain.abatch(
+        inputs,
+        config={"max_concurrency": Config.GRADER_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    grades = []
+    for d, score in zip(documents, scores):
+        if isinstance(score, Exception) or not isinstance(score, dict):
+            _, doc_id = _doc_content_and_id(d)
+            logger.warning(
+                f"Grading failed for doc {doc_id} ({score}). Defaulting to 'no'."
+            )
+            grades.append("no")
         else:
-            logger.info(f" -> Document Irrelevant: {doc_id}")
+            grades.append(score.get("binary_score", "no"))
 
-    return {
-        "documents": filtered_docs,
-        "is_retrieval_success": "yes" if relevant_found else "no",
-    }
+    return _collect_relevant(documents, grades)
 
 
 # --- 2. 환각 평가기 (Hallucination Grader) ---
@@ -137,16 +178,7 @@ def grade_hallucination(generation: str, documents: List[Document]) -> str:
     """
     logger.info("--- [Modular RAG] Grading Hallucination ---")
 
-    # Context format
-    # Handle both string and Document objects
-    docs_text = []
-    for d in documents:
-        if isinstance(d, str):
-            docs_text.append(d)
-        else:
-            docs_text.append(d.page_content)
-
-    context = "\n\n".join(docs_text)
+    context = _hallucination_context(generation, documents)
 
     try:
         score = hallucination_grader_chain.invoke(
@@ -160,6 +192,41 @@ def grade_hallucination(generation: str, documents: List[Document]) -> str:
         return "no"
 
 
+async def agrade_hallucination(generation: str, documents: List[Document]) -> str:
+    """
+    grade_hallucination의 비동기 버전 (ainvoke).
+    """
+    logger.info("--- [Modular RAG] Grading Hallucination (async) ---")
+
+    context = _hallucination_context(generation, documents)
+
+    try:
+        score = await hallucination_grader_chain.ainvoke(
+            {"documents": context, "generation": generation}
+        )
+        return score.get("binary_score", "no")
+    except Exception as e:
+        logger.warning(
+            f"Hallucination grading failed ({e}). Defaulting to 'no' (hallucinated)."
+        )
+        return "no"
+
+
+def _hallucination_context(generation: str, documents: List[Document]) -> str:
+    # Context format
+    # Handle both string and Document objects
+    # 전체 page_content 대신, 답변과 관련된 섹션 위주로 light 모델 예산 안에 채웁니다.
+    doc_items = []
+    for d in documents:
+        if isinstance(d, str):
+            doc_items.append(("", d))
+        else:
+            doc_items.append(("", d.page_content))
+
+    packed = pack_context(doc_items, generation, budget_for("light"))
+    return "\n\n".join(packed["texts"])
+
+
 # --- 3. 답변 유용성 평가기 (Answer Grader) ---
 class GradeAnswer(BaseModel):
     """답변이 질문을 해결했는지(Utility) 점수."""
@@ -206,3 +273,19 @@ def grade_answer(question: str, generation: str) -> str:
     except Exception as e:
         logger.warning(f"Answer utility grading failed ({e}). Defaulting to 'no'.")
         return "no"
+
+
+async def agrade_answer(question: str, generation: str) -> str:
+    """
+    grade_answer의 비동기 버전 (ainvoke).
+    """
+    logger.info("--- [Modular RAG] Grading Answer Utility (async) ---")
+
+    try:
+        score = await answer_grader_chain.ainvoke(
+            {"question": question, "generation": generation}
+        )
+        return score.get("binary_score", "no")
+    except Exception as e:
+        logger.warning(f"Answer utility grading failed ({e}). Defaulting to 'no'.")
+        return "no"
@@ -1,8 +1,10 @@
+from contextlib import nullcontext
 from typing import List, Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import SystemMessage, HumanMessage
-from state import AgentState
+from state import AgentState, TRIM_KEY
+from common.config import Config
 from common.model_factory import ModelFactory
 from common.logger_config import setup_logger
 
@@ -27,76 +29,125 @@ Update the 'Current Summary' by incorporating the key information from 'New Line
 """
 
 
+def answer_update(answer: str, **extra) -> dict:
+    """종료 노드용 상태 업데이트: 답변을 설정하고 대화 기록에 assistant 메시지로 덧붙입니다."""
+    return {
+        "answer": answer,
+        "messages": [{"role": "assistant", "content": answer}],
+        **extra,
+    }
+
+
+def check_turn_messages(before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> bool:
+    """
+    한 턴이 대화 기록에 user 메시지 1개와 assistant 메시지 1개만 덧붙였는지 확인합니다.
+    노드가 messages를 포함한 전체 state를 반환하면 Append Reducer 때문에 기록이 턴마다 두 배로 늘어나므로 이를 감지합니다.
+    (요약 후 앞부분 정리(TRIM)는 세션 Lock 안의 백그라운드 작업에서만 일어나므로 턴 실행 중에는 고려하지 않습니다.)
+    """
+    added = after[len(before):] if after[: len(before)] == before else None
+    roles = [m.get("role") for m in added] if added is not None else None
+    if roles == ["user", "assistant"]:
+        return True
+    logger.error(
+        f" -> [Memory] Unexpected message delta for one turn: "
+        f"{len(before)} -> {len(after)} messages (added roles: {roles})"
+    )
+    return False
+
+
 def summarize_conversation(state: AgentState) -> dict:
     """
-    [Node] 대화 기록을 요약하여 토큰을 절약합니다.
-    대화의 가장 최근 부분(마지막 요약 이후 추가된 내용)을 가져와 요약을 업데이트합니다.
+    [Node] 대화 종료 노드 (Critical Path).
+    LLM을 호출하지 않고 답변을 전달하고 대화 기록에 추가합니다.
+    실제 요약은 응답 전송 후 summarize_in_background()가 비동기로 수행하여 체크포인트에 기록합니다.
     """
-    logger.info("--- [Node] Summarize Conversation (Memory) ---")
+    logger.info("--- [Node] Summarize Conversation (Deferred) ---")
+
+    # [UX Fix] State Passthrough for answer
+    return answer_update(state.get("answer", ""))
 
-    current_summary = state.get("summary", "")
+
+def pending_messages(state: AgentState) -> List[Dict[str, Any]]:
+    """
+    아직 요약에 반영되지 않은 메시지를 반환합니다.
+    마지막 2개 메시지(현재 턴)는 즉각적인 컨텍스트로 남겨두고 요약 대상에서 제외합니다.
+    """
     messages = state.get("messages", [])
+    last_idx = state.get("last_summarized_index", 0) or 0
 
-    # 1. 요약 필요 여부 확인 (Check if summarization is needed)
-    # 전략: 기록이 길어지면(> 6), 마지막 2개 메시지(현재 턴)를 제외한 모든 내용을 요약합니다.
-    # 이는 최근 컨텍스트는 그대로 유지하면서 나머지를 압축하기 위함입니다.
-    if len(messages) <= 6:
-        logger.info(" -> History short, skipping summary.")
-        # [UX Fix] State Passthrough for answer
-        return {"summary": current_summary, "answer": state.get("answer", "")}
-
-    # 2. 요약할 메시지 슬라이싱 (Slice messages to summarize)
-    # 마지막 2개는 즉각적인 컨텍스트를 위해 남겨두고 나머지를 요약합니다.
-    # 참고: 실제 시스템에서는 'last_summarized_index' 포인터가 필요할 수 있습니다.
-    # 여기서는 매번 처음부터 다시 요약하거나 업데이트하는 방식을 사용합니다.
-    # 업데이트 방식이 좋지만, 프론트엔드 입력에 의해 'messages' 리스트가 리셋될 수 있으므로 주의가 필요합니다.
-
-    # 견고한 접근법 (Robust Approach):
-    # 마지막 2개를 제외한 모든 메시지를 요약합니다.
-    to_summarize = messages[:-2]
-
-    text_to_summarize = "\n".join(
-        [f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in to_summarize]
-    )
+    # 기록이 포인터보다 짧아졌다면(세션 초기화 등) 처음으로 되돌립니다.
+    if last_idx > len(messages):
+        last_idx = 0
 
-    # 3. LLM 호출 (Invoke LLM)
-    llm = ModelFactory.get_rag_model(level="heavy", temperature=0)
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SUMMARY_SYSTEM_PROMPT),
-            (
-                "human",
-                "Current Summary: {current_summary}\n\nNew Lines to Add: {new_lines}",
-            ),
-        ]
-    )
+    return messages[last_idx:-2]
 
-    chain = prompt | llm | StrOutputParser()
 
+def should_summarize(state: AgentState) -> bool:
+    """
+    [Debounce] 기록이 충분히 길고(> SUMMARY_TRIGGER_MESSAGES),
+    마지막 요약 이후 N턴(= 2N 메시지) 이상 쌓였을 때만 요약합니다.
+    """
+    messages = state.get("messages", [])
+    if len(messages) <= Config.SUMMARY_TRIGGER_MESSAGES:
+        return False
+    return len(pending_messages(state)) >= Config.SUMMARY_EVERY_N_TURNS * 2
+
+
+async def summarize_in_background(app, config: dict, lock=None) -> None:
+    """
+    [Background Task] 응답이 끝난 뒤 실행되어 다음 턴을 위한 요약을 갱신합니다.
+    'last_summarized_index' 이후의 새 메시지만 기존 요약에 점진적으로(incremental) 합칩니다.
+    lock: 세션 Lock(async context manager). 체크포인트 반영(aupdate_state) 구간에만 사용합니다.
+    """
     try:
-        # 참고: 매번 전체 'to_summarize' 블록을 다시 요약한다면,
-        # 점진적(incremental) 방식이 아닌 이상 'current_summary'를 재귀적으로 전달할 필요가 없습니다.
-        # 이미 요약된 부분을 알 수 없으므로(포인터 부재),
-        # 그냥 'to_summarize' 블록에 대해 새로운 요약을 생성합니다.
-        # 이 방식이 중복 방지에 더 안전합니다.
-
-        # 'Fresh Summary' 모드를 위해 프롬프트 재정의
-        fresh_prompt = ChatPromptTemplate.from_messages(
+        snapshot = await app.aget_state(config)
+        state = snapshot.values if snapshot else {}
+        if not state or not should_summarize(state):
+            return
+
+        messages = state.get("messages", [])
+        to_summarize = pending_messages(state)
+        current_summary = state.get("summary", "")
+
+        text_to_summarize = "\n".join(
+            [f"{m.get('role', 'unknown')}: {m.get('content', '')}" for m in to_summarize]
+        )
+
+        llm = ModelFactory.get_rag_model(
+            level="heavy", temperature=0, priority="background"
+        )
+
+        prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", SUMMARY_SYSTEM_PROMPT),
-                ("human", "Summarize this conversation:\n{new_lines}"),
+                (
+                    "human",
+                    "Current Summary: {current_summary}\n\nNew Lines to Add: {new_lines}",
+                ),
             ]
         )
 
-        chain = fresh_prompt | llm | StrOutputParser()
-        new_summary = chain.invoke({"new_lines": text_to_summarize})
-
-        logger.info(f" -> Summary Updated: {new_summary[:50]}...")
+        chain = prompt | llm | StrOutputParser()
+        new_summary = await chain.ainvoke(
+            {"current_summary": current_summary, "new_lines": text_to_summarize}
+        )
 
-        # [UX Fix] Return answer for frontend streaming
-        return {"summary": new_summary, "answer": state.get("answer", "")}
+        # 요약된 지점까지 포인터 이동 (현재 턴 2개 메시지는 제외)
+        new_index = max(len(messages) - 2, 0)
+
+        # 요약에 반영된 메시지는 최근 HISTORY_WINDOW_MESSAGES개만 남기고 버립니다.
+        # (체크포인트 크기와 노드별 프롬프트 조립 비용이 대화 길이에 비례해 커지지 않도록)
+        trim = max(new_index - Config.HISTORY_WINDOW_MESSAGES, 0)
+        update = {"summary": new_summary, "last_summarized_index": new_index - trim}
+        if trim:
+            update["messages"] = [{TRIM_KEY: trim}]
+
+        # 요약 중 다음 턴이 끝났어도 포인터/trim은 기록 앞쪽 기준이므로 최신 상태에 그대로 적용됩니다.
+        async with lock or nullcontext():
+            await app.aupdate_state(config, update, as_node="summarize_conversation")
+        logger.info(
+            f" -> [Background] Summary Updated (index={new_index}): {new_summary[:50]}..."
+        )
 
     except Exception as e:
-        logger.error(f" -> Summary Generation Failed: {e}")
-        return {"summary": current_summary, "answer": state.get("answer", "")}
+        logger.error(f" -> [Background] Summary Generation Failed: {e}")
@@ -67,3 +67,15 @@ def rewrite_query(question: str) -> str:
     logger.info(f" -> Optimized Query: '{better_query}'")
 
     return better_query
+
+
+async def arewrite_query(question: str) -> str:
+    """
+    Async version of rewrite_query (ainvoke).
+    """
+    logger.info(f"--- [Modular RAG] Rewriting Query (async): '{question}' ---")
+
+    better_query = await rewriter_chain.ainvoke({"question": question})
+    logger.info(f" -> Optimized Query: '{better_query}'")
+
+    return better_query
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from state import AgentState
 from common.model_factory import ModelFactory
 from common.logger_config import setup_logger
+from .context_packer import pack_context, budget_for
 
 logger = setup_logger("SOP_RETRIEVER")
 
@@ -84,48 +85,46 @@ class SOPOutput(BaseModel):
     disposition: dict
 
 
-def sop_retriever(state: AgentState) -> dict:
-    """
-    SOP 실행 노드 (Optimized):
-    4단계 체인을 단일 LLM 호출로 통합하여 속도를 개선함.
-    """
-    logger.info("--- [Node] SOP Generator (Optimized Single-Call) ---")
+def _sop_inputs(state: AgentState) -> dict:
     query = state.get("search_query") or state["query"]
     docs = state.get("documents", [])
 
     # Document 객체 처리
-    docs_text = []
+    # 글자 수 자르기([:15000]) 대신 토큰 예산 내에서 랭킹 순으로 관련 섹션을 채웁니다.
+    doc_items = []
     for d in docs:
         if hasattr(d, "page_content"):
-            docs_text.append(d.page_content)
+            doc_items.append(("", d.page_content))
         else:
-            docs_text.append(str(d))
+            doc_items.append(("", str(d)))
+
+    packed = pack_context(doc_items, query, budget_for("heavy"))
+    context_text = "\n\n".join(packed["texts"])
+    return {"query": query, "context": context_text}
 
-    context_text = "\n\n".join(docs_text)[:15000]  # 충분한 컨텍스트 제공
 
+def _sop_chain():
     # [Optimization] Use 'heavy' model but only ONCE
     llm = ModelFactory.get_rag_model(level="heavy", temperature=0)
 
     # Single Chain
-    sop_chain = (
+    return (
         ChatPromptTemplate.from_template(SOP_MASTER_PROMPT)
         | llm
         | JsonOutputParser(pydantic_object=SOPOutput)
     )
 
-    try:
-        logger.info(" -> Analyzing SOP (Consolidated)...")
-        result = sop_chain.invoke({"query": query, "context": context_text})
 
+def _sop_output(result: dict = None, error: Exception = None) -> dict:
+    if error is None:
         # Parse Result
         facts = result.get("facts", {})
         comp = result.get("compliance", {})
         disp = result.get("disposition", {})
-
-    except Exception as e:
-        logger.error(f" -> SOP Analysis Failed: {e}")
+    else:
+        logger.error(f" -> SOP Analysis Failed: {error}")
         facts = {"subject": "Error", "action": "Analysis Failed"}
-        comp = {"status": "Unknown", "reasoning": str(e), "matched_regulation": "-"}
+        comp = {"status": "Unknown", "reasoning": str(error), "matched_regulation": "-"}
         disp = {"type": "Manual Review", "detail": "System Error"}
 
     # Format Output
@@ -139,3 +138,36 @@ def sop_retriever(state: AgentState) -> dict:
     logger.info(f" -> SOP Result: {comp.get('status')} / {disp.get('type')}")
 
     return {"sop_context": sop_result}
+
+
+def sop_retriever(state: AgentState) -> dict:
+    """
+    SOP 실행 노드 (Optimized):
+    4단계 체인을 단일 LLM 호출로 통합하여 속도를 개선함.
+    """
+    logger.info("--- [Node] SOP Generator (Optimized Single-Call) ---")
+    inputs = _sop_inputs(state)
+
+    try:
+        logger.info(" -> Analyzing SOP (Consolidated)...")
+        result = _sop_chain().invoke(inputs)
+    except Exception as e:
+        return _sop_output(error=e)
+
+    return _sop_output(result)
+
+
+async def asop_retriever(state: AgentState) -> dict:
+    """
+    SOP 실행 노드의 비동기 버전 (ainvoke).
+    """
+    logger.info("--- [Node] SOP Generator (Optimized Single-Call, async) ---")
+    inputs = _sop_inputs(state)
+
+    try:
+        logger.info(" -> Analyzing SOP (Consolidated)...")
+        result = await _sop_chain().ainvoke(inputs)
+    except Exception as e:
+        return _sop_output(error=e)
+
+    return _sop_output(result)
@@ -1,16 +1,25 @@
-import sqlite3
+import asyncio
+import hashlib
+import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_naver import ChatClovaX
 
 from common.config import Config
 from common.logger_config import setup_logger
+from common.model_factory import ModelFactory
+from common.metadata_db import CUBE_ALL, CUBE_TABLE, FTS_TABLE, audit_columns, has_cube, has_fts
+from common.sqlite_pool import get_read_pool
+from common.tracing import record_sql_cache, record_sql_route, span
+from modules.sql_templates import StatsQueryParser, build_cube_sql, build_sql, keyword_miss, vocabulary
 
 # Get project root for db path resolution
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +32,87 @@ load_dotenv()
 
 logger = setup_logger("SQL_RETRIEVER")
 
+# 키워드 필터 규칙 (FTS5 인덱스가 없는 DB용: 컬럼별 LIKE 스캔)
+LIKE_KEYWORD_RULE = """2. "키워드 추출 및 필터링 (필수)":
+   - 사용자의 질문에서 '기관명'이 아닌 모든 핵심 명사(예: 횡령, 레일바이크, 안전, 계약 등)는 검색 키워드로 간주합니다.
+   - 키워드가 발견되면 반드시 `WHERE` 절을 사용하여 `title`, `problem`, `cat`, `sub_cat` 컬럼에서 `LIKE` 검색을 수행하십시오.
+   - 예: "레일바이크 관련 3개" -> `WHERE (title LIKE '%레일바이크%' OR problem LIKE '%레일바이크%' OR cat LIKE '%레일바이크%' OR sub_cat LIKE '%레일바이크%')`"""
+
+# 키워드 필터 규칙 (FTS5 trigram 인덱스 사용: build_metadata_db.py로 만든 DB)
+FTS_KEYWORD_RULE = """2. "키워드 추출 및 필터링 (필수)":
+   - 사용자의 질문에서 '기관명'이 아닌 모든 핵심 명사(예: 횡령, 레일바이크, 안전, 계약 등)는 검색 키워드로 간주합니다.
+   - 3글자 이상 키워드는 반드시 전문 검색 인덱스 `audits_fts`를 사용하십시오. (`LIKE '%...%'` 사용 금지)
+     예: "레일바이크 관련 3개" -> `WHERE id IN (SELECT rowid FROM audits_fts WHERE audits_fts MATCH '"레일바이크"')`
+   - 3글자 이상 키워드가 여러 개면 하나의 MATCH 안에서 AND로 연결하십시오.
+     예: `id IN (SELECT rowid FROM audits_fts WHERE audits_fts MATCH '"레일바이크" AND "안전사고"')`
+   - 2글자 이하 키워드(예: 횡령, 안전)는 인덱스로 찾을 수 없으므로 LIKE를 사용하십시오.
+     예: `(title LIKE '%횡령%' OR problem LIKE '%횡령%' OR cat LIKE '%횡령%' OR sub_cat LIKE '%횡령%')`
+   - 기관명은 `company = '인천국제공항공사'`처럼 정확히 일치로 비교하십시오 (인덱스 사용)."""
+
+FTS_SCHEMA_INFO = """
+Full-Text Index: audits_fts (FTS5, trigram) over title, problem, action, cat, sub_cat
+- rowid = audits.id
+- Usage: id IN (SELECT rowid FROM audits_fts WHERE audits_fts MATCH '"keyword"')
+Indexes: date, company, site
+"""
+
+CUBE_SCHEMA_INFO = f"""
+Additional audits columns: agency_category, audit_report_type, risk_category, disposition_level
+(중징계/경징계/시정/경고/주의/통보/현지조치/기타), disposition_severity (REAL), penalty_amount (REAL)
+
+Table: {CUBE_TABLE} (pre-aggregated statistics cube, use it FIRST for counts / trends)
+Dimensions (TEXT): year ('2024'), quarter ('1'~'4'), site, company, agency_category, audit_report_type,
+risk_category, disposition_level. A dimension that is not grouped is stored as '{CUBE_ALL}' (= all).
+Measures: count (INTEGER), penalty_sum (REAL), severity_avg (REAL)
+- Every dimension must be constrained: `= value`, `= '{CUBE_ALL}'` (not grouped) or `!= '{CUBE_ALL}'` (group by it).
+  예: 2024년 기관별 건수 -> SELECT company, count FROM {CUBE_TABLE} WHERE year = '2024' AND company != '{CUBE_ALL}'
+      AND quarter = '{CUBE_ALL}' AND site = '{CUBE_ALL}' AND agency_category = '{CUBE_ALL}'
+      AND audit_report_type = '{CUBE_ALL}' AND risk_category = '{CUBE_ALL}' AND disposition_level = '{CUBE_ALL}'
+      ORDER BY count DESC
+- At most 3 dimensions can have values other than '{CUBE_ALL}'. Keyword / cat / sub_cat conditions need the audits table.
+"""
+
+
+class SQLCache:
+    """
+    NL2SQL 2단계 캐시 (Thread-safe, 두 단계가 하나의 LRU 한도를 공유).
+    - "sql":  정규화된 질문 + 컨텍스트 지문 -> 실행에 성공한(검증된) SQL
+    - "rows": SQL + 파라미터 -> 결과 행
+    모든 키에 DB 버전이 들어가므로, DB가 다시 만들어지면 이전 항목은 더 이상 조회되지 않습니다.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._store: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, level: str, version: str, key: Any) -> Optional[Any]:
+        with self._lock:
+            value = self._store.get((level, version, key))
+            if value is not None:
+                self._store.move_to_end((level, version, key))
+        record_sql_cache(level, value is not None)
+        return value
+
+    def put(self, level: str, version: str, key: Any, value: Any) -> None:
+        with self._lock:
+            self._store[(level, version, key)] = value
+            self._store.move_to_end((level, version, key))
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+def normalize_question(query: str) -> str:
+    """캐시 키용 질문 정규화 (공백 / 대소문자 / 끝 문장부호 차이 무시)."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower()).rstrip("?.! ")
+
 
 class SQLRetriever:
     def __init__(self, db_path: Optional[str] = None):
@@ -31,6 +121,11 @@ class SQLRetriever:
             self.db_path = os.path.join(project_root, "common", "audit_metadata.db")
         else:
             self.db_path = db_path
+        self.pool = get_read_pool(self.db_path)
+        self.cache = SQLCache(Config.SQL_CACHE_MAXSIZE) if Config.SQL_CACHE_MAXSIZE > 0 else None
+        self.db_version = self._db_version()
+        self._version_lock = Lock()
+        self._load_db_features()
 
         # Check API Key
         if not os.getenv("CLOVASTUDIO_API_KEY") and not os.getenv(
@@ -41,8 +136,8 @@ class SQLRetriever:
             keys = [k for k in os.environ.keys() if "CLOVA" in k]
             logger.info(f"Current CLOVA related env vars: {keys}")
 
-        # ChatClovaX 초기화
-        self.llm = ChatClovaX(model=Config.LLM_MODEL, temperature=0.05, max_tokens=2048)
+        # NL2SQL용 LLM (ModelFactory 공유 HTTP 풀 / 스케줄러 / 트레이싱 경유)
+        self.llm = ModelFactory.get_rag_model(level="light", temperature=0.05, max_tokens=2048)
 
         # Schema definition for the LLM
         self.schema_info = """
@@ -79,10 +174,7 @@ Data Range: 2021-01-04 to 2024-06-28
    - 연도 검색 시 반드시 `strftime('%Y', date) = '2024'` 또는 `date LIKE '2024-%'` 형식을 사용하십시오.
    - 예: `AND year(date) = 2024` (X) -> `AND date LIKE '2024-%'` (O)
 
-2. "키워드 추출 및 필터링 (필수)":
-   - 사용자의 질문에서 '기관명'이 아닌 모든 핵심 명사(예: 횡령, 레일바이크, 안전, 계약 등)는 검색 키워드로 간주합니다.
-   - 키워드가 발견되면 반드시 `WHERE` 절을 사용하여 `title`, `problem`, `cat`, `sub_cat` 컬럼에서 `LIKE` 검색을 수행하십시오.
-   - 예: "레일바이크 관련 3개" -> `WHERE (title LIKE '%레일바이크%' OR problem LIKE '%레일바이크%' OR cat LIKE '%레일바이크%' OR sub_cat LIKE '%레일바이크%')`
+{keyword_rule}
 
 3. "최신/최근(latest/recent) 정렬":
    - "최신", "최근", 혹은 단순히 결과의 순서가 중요해 보이는 경우 `ORDER BY date DESC`를 추가하십시오.
@@ -106,19 +198,134 @@ SQL Query:
 """)
         self.chain = self.prompt | self.llm | StrOutputParser()
 
-    def _execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Executes the SQL query and returns list of dicts."""
+    def _load_db_features(self) -> None:
+        """현재 DB 파일 기준으로 FTS / 통계 큐브 사용 여부와 템플릿 파서 사전을 (다시) 읽습니다."""
+        self.use_fts, self.use_cube = self._check_indexes()
+        self.template_parser = (
+            self._load_template_parser() if Config.SQL_TEMPLATE_ENABLED else None
+        )
+
+    def _db_version(self) -> Optional[str]:
+        """
+        DB 내용 버전 (파일 inode / mtime / size).
+        build_metadata_db.py는 새 파일로 교체하고 --upgrade는 파일을 수정하므로 둘 다 버전이 바뀝니다.
+        """
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            return None
+        return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _current_version(self) -> Optional[str]:
+        """DB 버전을 확인하고, 바뀌었으면 캐시를 비우고 풀 커넥션과 DB 기반 설정을 새로 고칩니다."""
+        version = self._db_version()
+        if version != self.db_version:
+            with self._version_lock:
+                if version != self.db_version:
+                    logger.info(f"♻️ {self.db_path} changed ({self.db_version} -> {version}). Refreshing.")
+                    self.pool.refresh()
+                    if self.cache is not None:
+                        self.cache.clear()
+                    self._load_db_features()
+                    self.db_version = version
+        return version
+
+    def _check_indexes(self) -> Tuple[bool, bool]:
+        """
+        DB에 FTS5 인덱스(audits_fts)가 있으면 SQL 생성 규칙을 MATCH 기반으로 바꾸고,
+        통계 큐브(audit_stats)가 있으면 집계 질문을 큐브에서 먼저 찾습니다.
+        """
+        try:
+            with self.pool.connection() as conn:
+                fts, cube = has_fts(conn), has_cube(conn)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not inspect {self.db_path} ({e}).")
+            return False, False
+        if not fts:
+            logger.info(
+                f"{FTS_TABLE} not found. Using LIKE scans (run build_metadata_db.py --upgrade)."
+            )
+        if not cube:
+            logger.info(f"{CUBE_TABLE} not found. Aggregating over audits (rebuild with build_metadata_db.py).")
+        return fts, cube
+
+    def _distinct(self, column: str) -> List[str]:
+        return [row[column] for row in self.pool.fetchall(f"SELECT DISTINCT {column} FROM audits")]
+
+    def _load_template_parser(self) -> Optional[StatsQueryParser]:
+        """
+        Fast Path 파서에 DB의 기관명 / 분류(cat, sub_cat) / 리스크 분야 / 처분 수준 사전과
+        검색 키워드 어휘(제목 / 분류 단어)를 채웁니다.
+        """
+        try:
+            with self.pool.connection() as conn:
+                columns = set(audit_columns(conn))
+            categories = self._distinct("cat") + self._distinct("sub_cat")
+            parser = StatsQueryParser(
+                self._distinct("company"),
+                categories,
+                # 이전 빌드의 DB에는 없는 컬럼 (없으면 해당 슬롯을 쓰지 않음)
+                self._distinct("risk_category") if "risk_category" in columns else [],
+                self._distinct("disposition_level") if "disposition_level" in columns else [],
+                vocabulary=vocabulary(self._distinct("title") + categories),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ SQL template fast path disabled ({e}).")
+            return None
+        logger.info(
+            f"SQL template fast path: {len(parser.companies)} companies, "
+            f"{len(parser.categories)} categories, {len(parser.vocabulary)} keyword terms"
+        )
+        return parser
+
+    def _template_sql(self, query: str) -> Optional[Tuple[str, str, List[Any], Dict[str, Any]]]:
+        """
+        템플릿으로 처리할 수 있는 질문이면 (경로, SQL, params, 슬롯), 아니면 None (-> NL2SQL).
+        집계 질문은 통계 큐브("cube"), 나머지는 audits("template")에서 처리합니다.
+        """
+        if self.template_parser is None:
+            return None
+        slots = self.template_parser.parse(query)
+        if slots is None:
+            return None
+        logger.info(f"Template Slots: {slots}")
+        cube = build_cube_sql(slots) if self.use_cube else None
+        if cube is not None:
+            return ("cube", *cube, slots)
+        return ("template", *build_sql(slots, self.use_fts), slots)
+
+    def _execute_query(
+        self, query: str, params: Sequence[Any] = (), version: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Executes the SQL query (pooled read-only connection) and returns list of dicts.
+        version이 주어지면 결과 캐시("rows")를 사용합니다. 실행에 실패하면 None.
+        """
+        key = (query, tuple(params))
+        if self.cache is not None and version is not None:
+            cached = self.cache.get("rows", version, key)
+            if cached is not None:
+                return cached
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            conn.close()
-            return [dict(row) for row in rows]
+            results = self.pool.fetchall(query, params)
         except Exception as e:
             logger.error(f"Error executing SQL: {e}")
-            return []
+            return None
+        if self.cache is not None and version is not None:
+            self.cache.put("rows", version, key, results)
+        return results
+
+    def _question_key(self, query: str, context: Optional[List[Document]]) -> str:
+        """질문 + 컨텍스트 지문 (+ 날짜: '올해' 같은 상대 표현이 날짜에 따라 다른 SQL이 되므로)."""
+        context_ids = [
+            (doc.metadata.get("idx"), doc.metadata.get("title")) for doc in context or []
+        ]
+        raw = json.dumps(
+            [normalize_question(query), context_ids, datetime.now().strftime("%Y-%m-%d")],
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
     def _clean_sql(self, sql: str) -> str:
         sql = sql.strip()
@@ -152,14 +359,7 @@ SQL Query:
 
         return sql
 
-    def retrieve(
-        self, query: str, context: Optional[List[Document]] = None
-    ) -> List[Document]:
-        """
-        자연어 질문(NL)을 SQL로 변환하여 실행하고, 결과를 Document 리스트로 반환합니다.
-        """
-        logger.info(f"Processing Query: {query}")
-
+    def _format_context(self, context: Optional[List[Document]]) -> str:
         # Context Formatting
         context_str = "No context available."
         if context:
@@ -170,27 +370,31 @@ SQL Query:
                 formatted.append(f"Item #{i}: IDX={idx}, Title={title}")
             context_str = "\\n".join(formatted)
             logger.info(f"Context Provided ({len(context)} docs)")
+        return context_str
 
-        # 1. SQL 생성 (Generate SQL)
+    def _chain_inputs(self, query: str, context: Optional[List[Document]]) -> dict:
         current_date = datetime.now().strftime("%Y-%m-%d")
-        generated_sql = self.chain.invoke(
-            {
-                "schema": self.schema_info,
-                "query": query,
-                "context": context_str,
-                "current_date": current_date,
-            }
-        )
-        cleaned_sql = self._clean_sql(generated_sql)
-        logger.info(f"Generated SQL: {cleaned_sql}")
-
-        # 2. SQL 실행 (Execute SQL)
-        results = self._execute_query(cleaned_sql)
-        logger.info(f"Found {len(results)} results")
-
+        return {
+            "schema": self.schema_info
+            + (FTS_SCHEMA_INFO if self.use_fts else "")
+            + (CUBE_SCHEMA_INFO if self.use_cube else ""),
+            "keyword_rule": FTS_KEYWORD_RULE if self.use_fts else LIKE_KEYWORD_RULE,
+            "query": query,
+            "context": self._format_context(context),
+            "current_date": current_date,
+        }
+
+    def _to_documents(self, results: List[Dict[str, Any]]) -> List[Document]:
         # 3. 문서 변환 (Convert to Documents)
         documents = []
         for row in results:
+            if "title" not in row:
+                # 템플릿/NL2SQL의 집계 결과 (COUNT, GROUP BY) 행
+                content = ", ".join(f"{k}: {v}" for k, v in row.items())
+                documents.append(
+                    Document(page_content=content, metadata={**row, "source": "sql_database"})
+                )
+                continue
             content = f"Title: {row.get('title')}\\nDate: {row.get('date')}\\nCompany: {row.get('company')}\\nProblem: {row.get('problem')}\\nAction: {row.get('action')}"
 
             # Metadata
@@ -202,11 +406,129 @@ SQL Query:
 
         return documents
 
+    def _cached_sql(self, question_key: str, version: Optional[str]) -> Optional[str]:
+        if self.cache is None or version is None:
+            return None
+        return self.cache.get("sql", version, question_key)
+
+    def _remember_sql(
+        self, question_key: str, version: Optional[str], sql: str, results: Optional[list]
+    ) -> None:
+        # 실행에 성공한 SQL만 저장합니다 (잘못 생성된 SQL은 다음 요청에서 다시 생성).
+        if self.cache is not None and version is not None and results is not None:
+            self.cache.put("sql", version, question_key, sql)
+
+    def retrieve(
+        self, query: str, context: Optional[List[Document]] = None
+    ) -> List[Document]:
+        """
+        자연어 질문(NL)을 SQL로 변환하여 실행하고, 결과를 Document 리스트로 반환합니다.
+        """
+        logger.info(f"Processing Query: {query}")
+        version = self._current_version()
+
+        # 0. Fast Path: 통계/목록 질문은 LLM 없이 템플릿 SQL로 처리
+        template = self._template_sql(query)
+        if template is not None:
+            route, sql, params, slots = template
+            record_sql_route(route)
+            with span("retrieval", f"sql.{route}"):
+                results = self._execute_query(sql, params, version=version) or []
+            logger.info(f"Template SQL ({route}): {sql} -> {len(results)} results")
+            if not keyword_miss(slots, results):
+                return self._to_documents(results)
+            # 키워드를 잘못 잡았을 수 있으므로 '0건'으로 답하지 않고 NL2SQL로 다시 시도합니다.
+            logger.info("Template keyword filter matched nothing. Falling back to NL2SQL.")
+
+        # 1. 같은 질문 + 컨텍스트로 이미 검증된 SQL이 있으면 LLM 생략
+        question_key = self._question_key(query, context)
+        cleaned_sql = self._cached_sql(question_key, version)
+        if cleaned_sql is not None:
+            record_sql_route("cache")
+            logger.info(f"Cached SQL: {cleaned_sql}")
+            with span("retrieval", "sql.cached"):
+                results = self._execute_query(cleaned_sql, version=version)
+        else:
+            record_sql_route("llm")
+            with span("retrieval", "sql.nl2sql"):
+                # 2. SQL 생성 (Generate SQL)
+                generated_sql = self.chain.invoke(self._chain_inputs(query, context))
+                cleaned_sql = self._clean_sql(generated_sql)
+                logger.info(f"Generated SQL: {cleaned_sql}")
+
+                # 3. SQL 실행 (Execute SQL)
+                results = self._execute_query(cleaned_sql, version=version)
+            self._remember_sql(question_key, version, cleaned_sql, results)
+
+        results = results or []
+        logger.info(f"Found {len(results)} results")
+        return self._to_documents(results)
+
+    async def aretrieve(
+        self, query: str, context: Optional[List[Document]] = None
+    ) -> List[Document]:
+        """retrieve의 비동기 버전. sqlite 실행은 스레드에서 수행합니다."""
+        logger.info(f"Processing Query (async): {query}")
+        version = await asyncio.to_thread(self._current_version)
+
+        template = self._template_sql(query)
+        if template is not None:
+            route, sql, params, slots = template
+            record_sql_route(route)
+            with span("retrieval", f"sql.{route}"):
+                results = await asyncio.to_thread(
+                    self._execute_query, sql, params, version=version
+                )
+            results = results or []
+            logger.info(f"Template SQL ({route}): {sql} -> {len(results)} results")
+            if not keyword_miss(slots, results):
+                return self._to_documents(results)
+            logger.info("Template keyword filter matched nothing. Falling back to NL2SQL.")
+
+        question_key = self._question_key(query, context)
+        cleaned_sql = self._cached_sql(question_key, version)
+        if cleaned_sql is not None:
+            record_sql_route("cache")
+            logger.info(f"Cached SQL: {cleaned_sql}")
+            with span("retrieval", "sql.cached"):
+                results = await asyncio.to_thread(
+                    self._execute_query, cleaned_sql, version=version
+                )
+        else:
+            record_sql_route("llm")
+            with span("retrieval", "sql.nl2sql"):
+                generated_sql = await self.chain.ainvoke(self._chain_inputs(query, context))
+                cleaned_sql = self._clean_sql(generated_sql)
+                logger.info(f"Generated SQL: {cleaned_sql}")
+
+                results = await asyncio.to_thread(
+                    self._execute_query, cleaned_sql, version=version
+                )
+            self._remember_sql(question_key, version, cleaned_sql, results)
+
+        results = results or []
+        logger.info(f"Found {len(results)} results")
+        return self._to_documents(results)
+
+# --- Singleton ---
+# LLM 클라이언트 / 프롬프트 체인 / 커넥션 풀을 요청마다 다시 만들지 않도록 프로세스에서 공유합니다.
+_sql_retriever_instance = None
+_sql_retriever_lock = Lock()
+
+
+def get_sql_retriever() -> SQLRetriever:
+    global _sql_retriever_instance
+    if _sql_retriever_instance is None:
+        with _sql_retriever_lock:
+            if _sql_retriever_instance is None:
+                _sql_retriever_instance = SQLRetriever()
+    return _sql_retriever_instance
+
 
 if __name__ == "__main__":
     # Test
     try:
-        retriever = SQLRetriever()
+        retriever = get_sql_retriever()
         docs = retriever.retrieve("인천국제공항공사 최신 2건 알려줘")
         for doc in docs:
             print(f"[{doc.metadata.get('date')}] {doc.metadata.get('title')}")
@@ -0,0 +1,376 @@
+"""
+SQL Fast Path: 자주 나오는 통계/목록 질문을 LLM 없이 파라미터화된 SQL 템플릿으로 처리합니다.
+
+지원하는 질문 형태 (슬롯: 연도, 분기, 기관, 분류, 리스크 분야, 처분 수준, 키워드, N, 정렬)
+- count:  "2024년 징계 건수", "인천국제공항공사 감사 몇 건이야?", "2023년 2분기 중징계 건수"
+- group:  "기관별 감사 건수", "2023년 유형별 통계", "연도별 현황", "분기별 추이", "상위 5개 기관"
+- latest: "최신 3건", "인천국제공항공사 레일바이크 관련 최근 2건", "가장 오래된 사례 5개"
+
+count / group 질문이 통계 큐브(audit_stats) 차원만으로 표현되면 build_cube_sql이 큐브 조회로,
+그 외에는 build_sql이 audits 집계로 처리합니다.
+해석할 수 없는 표현(월/기간 조건, 이전 답변 참조, 의도 불명, 키워드 과다 등)이 남으면
+None을 반환하고, SQLRetriever가 기존 NL2SQL(LLM) 경로로 처리합니다.
+슬롯을 뽑고 남은 단어는 DB 어휘(제목 / 분류 단어)에 있을 때만 검색 키워드로 쓰며, 없는 단어가 남으면 역시 None입니다.
+키워드 조건이 0건을 돌려주면 SQLRetriever가 NL2SQL로 다시 처리합니다 (keyword_miss).
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from common.metadata_db import (
+    CUBE_ALL,
+    CUBE_DIMENSIONS,
+    CUBE_MAX_DIMS,
+    CUBE_TABLE,
+    FTS_COLUMNS,
+    FTS_MIN_CHARS,
+    FTS_TABLE,
+    QUARTER_EXPR,
+    YEAR_EXPR,
+    fts_match,
+)
+
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 50
+# 템플릿으로 처리할 최대 키워드 수 (넘으면 LLM 경로)
+MAX_KEYWORDS = 3
+
+# --- 슬롯 / 의도 패턴 ---
+YEAR_PATTERN = re.compile(r"(20\d{2})\s*년?도?")
+THIS_YEAR_PATTERN = re.compile(r"올해|금년")
+LAST_YEAR_PATTERN = re.compile(r"작년|지난\s*해|전년")
+QUARTER_PATTERN = re.compile(r"([1-4])\s*분기")
+LIMIT_PATTERN = re.compile(r"(\d{1,3})\s*(?:건|개|곳)")
+
+GROUP_PATTERNS = [
+    (re.compile(r"(?:기관|회사|공사|공공기관)\s*별"), "company"),
+    (re.compile(r"(?:연도|년도|연)\s*별"), "year"),
+    (re.compile(r"분기\s*별"), "quarter"),
+    (re.compile(r"처분\s*(?:수준|유형|종류)?\s*별"), "disposition_level"),
+    (re.compile(r"(?:리스크|위험)\s*(?:유형|분야)?\s*별"), "risk_category"),
+    (re.compile(r"(?:출처|사이트|데이터\s*소스)\s*별"), "site"),
+    (re.compile(r"세부\s*(?:유형|분야|분류)\s*별"), "sub_cat"),
+    (re.compile(r"(?:유형|분야|분류|카테고리)\s*별"), "cat"),
+]
+RANKING_PATTERN = re.compile(r"가장\s*많은|많이\s*받은|순위|상위|top", re.I)
+COUNT_PATTERN = re.compile(r"건수|몇\s*(?:건|개)|개수|총\s*몇|얼마나|통계|현황")
+LATEST_PATTERN = re.compile(r"최신|최근|latest|recent", re.I)
+OLDEST_PATTERN = re.compile(r"가장\s*오래된|오래된\s*순|과거\s*순|오름차순")
+
+# 템플릿으로 표현할 수 없는 조건 -> LLM 경로
+UNSUPPORTED_PATTERN = re.compile(
+    r"\d{1,2}\s*월|상반기|하반기|부터|까지|이후|이전|사이|~|"  # 기간 조건
+    r"\d+\s*(?:년간|개월|년\s*동안)|(?<!\d)\d{1,2}\s*년(?!도)|"  # 기간 길이 ('최근 3년간', '6개월')
+    r"\d+\s*번|그\s*중|그중|해당|위의|위\s*(?:건|사례|항목|내용)|방금|앞의|이\s*(?:건|사례|항목)|"  # 이전 답변 참조
+    r"파일|다운로드|링크|url|원문|비교|차이|평균|비율|제외|아닌",
+    re.I,
+)
+
+# 슬롯을 뽑고 남은 토큰 중 의미 없는 단어 (의도 표현, 요청 표현)
+STOPWORDS = {
+    "감사", "감사결과", "사례", "사례들", "결과", "내역", "목록", "리스트", "전체", "모든", "총",
+    "건", "개", "곳", "몇", "건수", "개수", "수", "통계", "현황", "순위", "상위", "top",
+    "최신", "최근", "가장", "오래된", "많은", "많이", "받은", "순", "순으로", "정렬",
+    "관련", "관련된", "대한", "대해", "관한", "기준", "별", "년", "년도", "연도", "올해", "작년",
+    "분기", "추이", "추세", "트렌드", "처분", "리스크", "분야", "유형", "분류", "카테고리",
+    "알려줘", "알려", "줘", "주세요", "알려주세요", "보여줘", "보여", "찾아줘", "찾아", "뽑아줘",
+    "정리해줘", "정리", "조회", "검색", "확인", "뭐야", "뭐", "있어", "있나", "있는지", "어떻게",
+    "얼마나", "되나", "돼", "돼요", "인가", "인지", "이야", "입니다", "요", "좀", "나", "에",
+}
+
+# 검색 키워드로 쓰기에는 너무 일반적인 단어 (남으면 질문 의도를 템플릿으로 표현할 수 없다고 보고 LLM 경로)
+VAGUE_TERMS = {"주요", "문제", "문제점", "내용", "사항", "원인", "이유", "사유", "특징", "요약", "지적", "지적사항"}
+
+TOKEN_PATTERN = re.compile(r"[가-힣A-Za-z0-9]+")
+# 토큰 끝의 조사 (긴 것부터 검사)
+PARTICLES = ("에서의", "에서", "으로", "에게", "부터", "까지", "의", "은", "는", "이", "가", "을", "를", "에", "로", "와", "과", "도", "만")
+
+
+def _longest_first(names: Iterable[str]) -> List[str]:
+    return sorted({name for name in names if name}, key=len, reverse=True)
+
+
+def _strip_particle(token: str) -> str:
+    for particle in PARTICLES:
+        # 한 글자 조사는 3글자 이상 토큰에서만 떼어냅니다 ('비리' 같은 단어 보호).
+        if token.endswith(particle) and len(token) - len(particle) >= 2:
+            return token[: -len(particle)]
+    return token
+
+
+def vocabulary(texts: Iterable[str]) -> set:
+    """제목 / 분류 값에서 검색 키워드 후보 단어 집합을 만듭니다 (조사 제거, 2글자 이상, 숫자 제외)."""
+    words = set()
+    for text in texts:
+        for token in TOKEN_PATTERN.findall(text or ""):
+            token = _strip_particle(token)
+            if len(token) >= 2 and not token.isdigit():
+                words.add(token)
+    return words
+
+
+def keyword_miss(slots: Dict[str, Any], results: Optional[List[Dict[str, Any]]]) -> bool:
+    """키워드 조건이 있는 템플릿 결과가 비었는지 (0행 또는 count=0). 이 경우 NL2SQL로 다시 시도합니다."""
+    if not slots.get("keywords"):
+        return False
+    if not results:
+        return True
+    return slots["intent"] == "count" and not results[0].get("count")
+
+
+class StatsQueryParser:
+    """
+    결정적(deterministic) 의도/슬롯 파서.
+    기관명 / 분류(cat, sub_cat) / 리스크 분야 / 처분 수준 사전은 audit_metadata.db의 DISTINCT 값으로 채웁니다.
+    vocabulary가 주어지면 그 안에 있는 단어만 검색 키워드로 인정합니다 (None이면 제한 없음).
+    """
+
+    def __init__(
+        self,
+        companies: Iterable[str] = (),
+        categories: Iterable[str] = (),
+        risk_categories: Iterable[str] = (),
+        dispositions: Iterable[str] = (),
+        vocabulary: Optional[Iterable[str]] = None,
+    ):
+        # 긴 이름부터 매칭해야 '한국가스공사'가 '한국가스안전공사'의 일부로 잘못 잡히지 않습니다.
+        self.companies = _longest_first(companies)
+        self.categories = _longest_first(categories)
+        self.risk_categories = _longest_first(risk_categories)
+        self.dispositions = _longest_first(dispositions)
+        self.vocabulary = set(vocabulary) if vocabulary is not None else None
+
+    def parse(self, query: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """질문 -> 슬롯 dict. 템플릿으로 처리할 수 없으면 None."""
+        text = (query or "").strip()
+        if not text or UNSUPPORTED_PATTERN.search(text):
+            return None
+        now = now or datetime.now()
+        rest = text
+
+        def take(pattern: re.Pattern) -> List[re.Match]:
+            nonlocal rest
+            matches = list(pattern.finditer(rest))
+            rest = pattern.sub(" ", rest)
+            return matches
+
+        # 1. 기관 / 분류 (사전 매칭, 먼저 떼어내야 이름 안의 숫자/단어가 다른 슬롯으로 잡히지 않음)
+        company = self._take_name(self.companies, text)
+        if company:
+            rest = rest.replace(company, " ")
+        risk_category = self._take_name(self.risk_categories, rest)
+        if risk_category:
+            rest = rest.replace(risk_category, " ")
+        disposition = self._take_name(self.dispositions, rest)
+        if disposition:
+            rest = rest.replace(disposition, " ")
+        category = self._take_category(rest)
+        if category:
+            rest = rest.replace(category, " ")
+
+        # 2. 연도 (하나만 지원)
+        years = {m.group(1) for m in take(YEAR_PATTERN)}
+        if take(THIS_YEAR_PATTERN):
+            years.add(str(now.year))
+        if take(LAST_YEAR_PATTERN):
+            years.add(str(now.year - 1))
+        if len(years) > 1:
+            return None
+        quarters = {m.group(1) for m in take(QUARTER_PATTERN)}
+        if len(quarters) > 1:
+            return None
+
+        # 3. N
+        limits = {int(m.group(1)) for m in take(LIMIT_PATTERN)}
+        if len(limits) > 1:
+            return None
+        limit = limits.pop() if limits else None
+
+        # 4. 의도
+        group_by = None
+        for pattern, column in GROUP_PATTERNS:
+            if take(pattern):
+                group_by = group_by or column
+        ranking = bool(take(RANKING_PATTERN))
+        counting = bool(take(COUNT_PATTERN))
+        oldest = bool(take(OLDEST_PATTERN))
+        latest = bool(take(LATEST_PATTERN))
+
+        if group_by:
+            intent = "group"
+        elif ranking:
+            # "감사를 가장 많이 받은 기관" 처럼 기준이 기관뿐인 순위 질문
+            if "기관" not in rest and "공사" not in rest:
+                return None
+            intent, group_by = "group", "company"
+        elif counting and limit is None:
+            intent = "count"
+        elif latest or oldest or limit is not None:
+            intent = "latest"
+        else:
+            return None
+
+        # 5. 남은 토큰 = 검색 키워드 (DB 어휘에 있는 명사형 단어만)
+        keywords = []
+        for token in TOKEN_PATTERN.findall(rest):
+            token = _strip_particle(token)
+            if token.lower() in STOPWORDS or token in PARTICLES or token in {"기관", "공사", "공공기관"}:
+                continue
+            if len(token) < 2 or token.isdigit() or token in VAGUE_TERMS:
+                return None
+            if self.vocabulary is not None and token not in self.vocabulary:
+                return None
+            keywords.append(token)
+        if len(keywords) > MAX_KEYWORDS:
+            return None
+
+        return {
+            "intent": intent,
+            "year": years.pop() if years else None,
+            "quarter": quarters.pop() if quarters else None,
+            "company": company,
+            "category": category,
+            "risk_category": risk_category,
+            "disposition_level": disposition,
+            "keywords": keywords,
+            "group_by": group_by,
+            "limit": min(limit, MAX_LIMIT) if limit else None,
+            "order": "ASC" if oldest else "DESC",
+        }
+
+    @staticmethod
+    def _take_name(names: List[str], text: str) -> Optional[str]:
+        for name in names:
+            if name in text:
+                return name
+        return None
+
+    def _take_category(self, text: str) -> Optional[str]:
+        # 분류명은 짧아서('안전') 다른 단어('안전사고')의 일부일 수 있으므로 토큰 단위로만 매칭합니다.
+        tokens = {_strip_particle(token) for token in TOKEN_PATTERN.findall(text)}
+        return self._take_name([c for c in self.categories if c in tokens], text)
+
+
+def _keyword_clauses(keywords: List[str], use_fts: bool) -> Tuple[List[str], List[Any]]:
+    """NL2SQL 키워드 규칙과 같은 의미: 3글자 이상은 FTS5 MATCH, 나머지는 컬럼별 LIKE."""
+    clauses, params = [], []
+    indexed = [kw for kw in keywords if use_fts and len(kw) >= FTS_MIN_CHARS]
+    if indexed:
+        clauses.append(f"id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)")
+        params.append(fts_match(indexed))
+    for kw in keywords:
+        if kw in indexed:
+            continue
+        clauses.append("(" + " OR ".join(f"{col} LIKE ?" for col in FTS_COLUMNS) + ")")
+        params.extend([f"%{kw}%"] * len(FTS_COLUMNS))
+    return clauses, params
+
+
+# group_by 슬롯 -> (별칭, audits 집계 식) 목록. 분기별은 연도와 함께 묶습니다.
+GROUP_COLUMNS = {
+    "company": [("company", "company")],
+    "year": [("year", YEAR_EXPR)],
+    "quarter": [("year", YEAR_EXPR), ("quarter", QUARTER_EXPR)],
+    "cat": [("cat", "cat")],
+    "sub_cat": [("sub_cat", "sub_cat")],
+    "site": [("site", "site")],
+    "risk_category": [("risk_category", "risk_category")],
+    "disposition_level": [("disposition_level", "disposition_level")],
+}
+# 시간 차원은 시간 순, 나머지는 건수 많은 순으로 정렬
+TIME_GROUPS = {"year", "quarter"}
+# 값이 지정되면 필터가 되는 차원 슬롯 (audits 컬럼과 큐브 차원 이름이 같음)
+EQUALITY_SLOTS = ("company", "risk_category", "disposition_level")
+
+
+def _group_order(slots: Dict[str, Any]) -> str:
+    aliases = [alias for alias, _ in GROUP_COLUMNS[slots["group_by"]]]
+    if slots["group_by"] in TIME_GROUPS:
+        return ", ".join(f"{alias} ASC" for alias in aliases)
+    return f"count DESC, {aliases[0]} ASC"
+
+
+def build_cube_sql(slots: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+    """
+    count / group 질문을 통계 큐브(audit_stats) 조회로 바꿉니다. 큐브로 표현할 수 없으면 None.
+    키워드 / cat·sub_cat 조건이 있거나, 필터 + 그룹 차원이 CUBE_MAX_DIMS를 넘으면 audits에서 집계합니다.
+    """
+    if slots["intent"] not in ("count", "group") or slots["keywords"] or slots["category"]:
+        return None
+
+    filters = {dim: slots[dim] for dim in ("year", "quarter") + EQUALITY_SLOTS if slots.get(dim)}
+    group = [alias for alias, _ in GROUP_COLUMNS[slots["group_by"]]] if slots["intent"] == "group" else []
+    used = set(filters) | set(group)
+    if not used <= set(CUBE_DIMENSIONS) or len(used) > CUBE_MAX_DIMS:
+        return None
+
+    clauses, params = [], []
+    for dim in CUBE_DIMENSIONS:
+        if dim in filters:
+            clauses.append(f"{dim} = ?")
+            params.append(filters[dim])
+        else:
+            clauses.append(f"{dim} != ?" if dim in group else f"{dim} = ?")
+            params.append(CUBE_ALL)
+    where = " AND ".join(clauses)
+
+    if slots["intent"] == "count":
+        # 차원이 모두 고정되므로 PRIMARY KEY 조회 (행이 없으면 0건)
+        sql = (
+            "SELECT COALESCE(MAX(count), 0) AS count, MAX(penalty_sum) AS penalty_sum, "
+            f"ROUND(MAX(severity_avg), 2) AS severity_avg FROM {CUBE_TABLE} WHERE {where}"
+        )
+        return sql, params
+
+    sql = (
+        f"SELECT {', '.join(group)}, count, penalty_sum, ROUND(severity_avg, 2) AS severity_avg "
+        f"FROM {CUBE_TABLE} WHERE {where} ORDER BY {_group_order(slots)}"
+    )
+    if slots["limit"]:
+        sql += " LIMIT ?"
+        params.append(slots["limit"])
+    return sql, params
+
+
+def build_sql(slots: Dict[str, Any], use_fts: bool) -> Tuple[str, List[Any]]:
+    """슬롯 dict -> audits 대상 (SQL, params). 값은 모두 바인딩 파라미터로 전달합니다."""
+    clauses, params = [], []
+    if slots["year"]:
+        # 'YYYY-MM-DD' / 'YYYY.MM.DD' 모두 문자열 범위로 비교 (date 인덱스 사용)
+        clauses.append("date >= ? AND date < ?")
+        params.extend([slots["year"], str(int(slots["year"]) + 1)])
+    if slots.get("quarter"):
+        clauses.append(f"{QUARTER_EXPR} = ?")
+        params.append(slots["quarter"])
+    for dim in EQUALITY_SLOTS:
+        if slots.get(dim):
+            clauses.append(f"{dim} = ?")
+            params.append(slots[dim])
+    if slots["category"]:
+        clauses.append("(cat = ? OR sub_cat = ?)")
+        params.extend([slots["category"], slots["category"]])
+    keyword_clauses, keyword_params = _keyword_clauses(slots["keywords"], use_fts)
+    clauses.extend(keyword_clauses)
+    params.extend(keyword_params)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    if slots["intent"] == "count":
+        return f"SELECT COUNT(*) AS count FROM audits{where}", params
+
+    if slots["intent"] == "group":
+        columns = GROUP_COLUMNS[slots["group_by"]]
+        select = ", ".join(f"{expr} AS {alias}" for alias, expr in columns)
+        positions = ", ".join(str(i + 1) for i in range(len(columns)))
+        sql = (
+            f"SELECT {select}, COUNT(*) AS count FROM audits{where} "
+            f"GROUP BY {positions} ORDER BY {_group_order(slots)}"
+        )
+        if slots["limit"]:
+            sql += " LIMIT ?"
+            params.append(slots["limit"])
+        return sql, params
+
+    sql = f"SELECT * FROM audits{where} ORDER BY date {slots['order']}, id {slots['order']} LIMIT ?"
+    params.append(slots["limit"] or DEFAULT_LIMIT)
+    return sql, params
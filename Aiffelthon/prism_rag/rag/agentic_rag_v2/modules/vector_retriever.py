@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
+import asyncio
 import os
 import pickle
+import threading
 import time
 from pymilvus import MilvusClient
 from langchain_milvus import Milvus
@@ -12,6 +14,7 @@ from sentence_transformers import CrossEncoder
 
 from common.config import Config
 from common.logger_config import setup_logger
+from common.tracing import span, traced
 
 logger = setup_logger("VECTOR_RETRIEVER")
 
@@ -49,6 +52,11 @@ class VectorRetriever:
             auto_id=True,
         )
 
+        # asearch_and_merge는 서브 쿼리마다 스레드에서 BM25 / 리랭킹을 수행하므로,
+        # 공유 Kiwi 토크나이저와 CrossEncoder를 여러 스레드가 동시에 쓰지 않도록 잠급니다.
+        self._tokenizer_lock = threading.Lock()
+        self._reranker_lock = threading.Lock()
+
         # 3. 리랭커 초기화 (Initialize Reranker)
         try:
             self.reranker = CrossEncoder("BAAI/bge-reranker-v2-m3", max_length=512)
@@ -107,6 +115,7 @@ class VectorRetriever:
             logger.error(f"❌ Failed to load corpus: {e}")
             return []
 
+    @traced("startup", "bm25.index")
     def _build_bm25_index(self):
         logger.info("Building BM25 Index...")
         self.tokenizer = Kiwi()
@@ -260,12 +269,68 @@ class VectorRetriever:
         # --- 1. Dense Retrieval (밀집 검색) ---
         # 참고: 단순화를 위해 'expr' 필터는 완벽히 구현되지 않았습니다.
         # 엄격한 필터링이 필요하면 expr 구성을 추가해야 합니다.
-        dense_results = self.vector_store.similarity_search(query, k=50)
+        with span("retrieval", "milvus.search"):
+            dense_results = self.vector_store.similarity_search(query, k=50)
 
         # --- 2. Sparse Retrieval (희소 검색) ---
-        tokenized_query = [t.form for t in self.tokenizer.tokenize(query)]
-        sparse_docs = self.bm25.get_top_n(tokenized_query, self.bm25_docs, n=50)
+        sparse_docs = self._sparse_search(query)
+
+        return self._merge_and_rerank(
+            query, dense_results, sparse_docs, top_k, filters, use_reranker
+        )
 
+    async def asearch_and_merge(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Dict[str, Any] = {},
+        use_reranker: bool = True,
+    ) -> List[Document]:
+        """
+        search_and_merge의 비동기 버전.
+        Dense(Milvus async)와 Sparse(BM25)를 동시에 수행하고,
+        CPU 작업(RRF + Rerank)은 스레드로 넘겨 이벤트 루프를 막지 않습니다.
+        """
+        if "k" in filters:
+            top_k = int(filters["k"])
+            logger.info(f"Override Top-K: {top_k}")
+
+        logger.info(f"Hybrid Searching for (async): '{query}'")
+
+        dense_results, sparse_docs = await asyncio.gather(
+            self._adense_search(query),
+            asyncio.to_thread(self._sparse_search, query),
+        )
+
+        return await asyncio.to_thread(
+            self._merge_and_rerank,
+            query,
+            dense_results,
+            sparse_docs,
+            top_k,
+            filters,
+            use_reranker,
+        )
+
+    async def _adense_search(self, query: str) -> List[Document]:
+        with span("retrieval", "milvus.search"):
+            return await self.vector_store.asimilarity_search(query, k=50)
+
+    def _sparse_search(self, query: str) -> List[Document]:
+        with span("retrieval", "bm25.search"):
+            with self._tokenizer_lock:
+                tokenized_query = [t.form for t in self.tokenizer.tokenize(query)]
+            return self.bm25.get_top_n(tokenized_query, self.bm25_docs, n=50)
+
+    def _merge_and_rerank(
+        self,
+        query: str,
+        dense_results: List[Document],
+        sparse_docs: List[Document],
+        top_k: int,
+        filters: Dict[str, Any],
+        use_reranker: bool,
+    ) -> List[Document]:
         # --- 3. RRF Fusion ---
         dense_ranks = {doc.page_content: i for i, doc in enumerate(dense_results)}
         sparse_ranks = {doc.page_content: i for i, doc in enumerate(sparse_docs)}
@@ -335,7 +400,9 @@ class VectorRetriever:
             # Extract content for reranker
             pool_texts = [d.page_content for d in pool]
             pairs = [[query, text] for text in pool_texts]
-            scores = self.reranker.predict(pairs)
+            with span("retrieval", "rerank", batch_size=len(pairs)):
+                with self._reranker_lock:
+                    scores = self.reranker.predict(pairs)
 
             scored = sorted(zip(pool, scores), key=lambda x: x[1], reverse=True)
 
@@ -1,4 +1,22 @@
-from typing import TypedDict, List, Dict, Any
+from typing import Annotated, TypedDict, List, Dict, Any
+
+# messages 채널에서 "앞에서 n개 삭제"를 뜻하는 항목 키 (요약에 반영된 메시지 정리용)
+TRIM_KEY = "__trim__"
+
+
+def merge_messages(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    messages 채널 Reducer.
+    대화 기록은 백엔드(체크포인터)가 소유하며, 클라이언트/노드는 새 메시지만 보내고 여기서 뒤에 덧붙입니다.
+    {TRIM_KEY: n} 항목은 기록 앞쪽 n개를 버립니다.
+    """
+    messages = list(left or [])
+    for item in right or []:
+        if TRIM_KEY in item:
+            messages = messages[item[TRIM_KEY]:]
+        else:
+            messages.append(item)
+    return messages
 
 
 class AgentState(TypedDict):
@@ -14,8 +32,9 @@ class AgentState(TypedDict):
     documents: List[str]  # 검색된 문서 컨텍스트 리스트
     graph_context: List[str]  # (New) 그래프 DB 검색 결과 리스트
     sub_queries: List[str]  # 분해된 하위 질문 리스트
-    messages: List[Dict[str, Any]]  # 대화 기록 (Chat History)
+    messages: Annotated[List[Dict[str, Any]], merge_messages]  # 대화 기록 (Append-only, 요약 후 앞부분 정리)
     summary: str  # (New) 대화 내용을 요약한 장기 기억 (Long-term Memory)
+    last_summarized_index: int  # summary에 반영된 마지막 메시지 위치 (점진적 요약 포인터)
     persist_documents: List[Any]  # (New) 이전 턴의 문서 컨텍스트 (Reference용)
 
     # 슈퍼바이저 필드 (계획 및 라우팅)
@@ -43,6 +62,7 @@ class AgentState(TypedDict):
     facts: dict  # 추출된 사실 관계
     matched_regulations: list  # 매칭된 관련 법령
     sop_context: str  # (New) 생성기에 제공할 SOP/규정 컨텍스트
+    context_tokens: int  # 생성 프롬프트에 채워진 컨텍스트 토큰 수 (Context Packer 보고값)
     compliance_result: str  # 규정 위반 여부 판정 결과
 
     # 결과 필드
@@ -1,8 +1,19 @@
 """
 audit_v10.json -> Milvus 업로드 스크립트
-실행: python upload_to_milvus.py
+실행: python upload_to_milvus.py          # 바뀐 사례만 반영 (증분)
+      python upload_to_milvus.py --full   # 컬렉션을 지우고 처음부터 다시 업로드
+      python upload_to_milvus.py --bulk   # 전체 재적재를 Bulk Import(적재 파일 → 한 번에 가져오기)로 수행
+
+컬렉션에 들어간 사례별 내용 해시를 MANIFEST_PATH에 기록해 두고, 다음 실행에서는
+새로 생기거나 바뀐 사례의 청크만 임베딩해 교체하고 없어진 사례의 청크는 삭제합니다.
+임베딩(스레드 풀, 429 적응형 속도 제한)과 Milvus 삽입을 큐로 분리한 파이프라인으로 업로드합니다.
+중간에 끊기면 같은 명령으로 다시 실행하세요. 진행 기록(UPLOAD_CHECKPOINT)을 읽어 남은 배치만 업로드합니다.
+--bulk는 행을 gRPC로 나눠 보내지 않고 타입이 정해진 스키마의 적재 파일로 한 번에 가져온 뒤 인덱스를 마지막에 한 번만 만듭니다
+(common/milvus_bulk.py). 진행 기록은 쓰지 않으며, 중간에 끊기면 다시 실행해도 임베딩은 캐시에서 읽습니다.
 """
 
+import argparse
+import hashlib
 import sys
 import os
 import json
@@ -11,7 +22,19 @@ import time
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(project_root)
 
+from common.chunking import build_parent_text, chunk_parent_text, chunker_name
 from common.config import Config
+from common.embedding_cache import CachedEmbeddings
+from common.milvus_bulk import BulkLoader, build_row, build_schema, check_bulk_support
+from common.embedding_pipeline import (
+    AdaptiveRateLimiter,
+    IngestManifest,
+    UploadCheckpoint,
+    content_hash,
+    diff_cases,
+    embed_texts,
+    run_pipeline,
+)
 from langchain_naver import ClovaXEmbeddings
 from langchain_milvus import Milvus
 from langchain_core.documents import Document
@@ -20,150 +43,289 @@ from pymilvus import MilvusClient
 # ── 설정 ──────────────────────────────────────────────
 DATA_PATH = os.path.join(project_root, "audit_v10.json")
 COLLECTION_NAME = "audit_v10_collection"
-CHUNK_SIZE = 500
-BATCH_SIZE = 50
-SLEEP_BETWEEN_BATCHES = 2
-RESUME_FROM = 0          # 처음부터 시작
+BATCH_SIZE = 50         # 임베딩 / 삽입 단위 (청크 수)
+INSERT_QUEUE_SIZE = 8   # 임베딩은 끝났지만 아직 삽입되지 않은 배치 수 상한
+UPLOAD_CHECKPOINT = os.path.join(project_root, ".upload_progress.json")
+MANIFEST_PATH = os.path.join(project_root, "manifests", f"{COLLECTION_NAME}.json")
+DELETE_BATCH_SIZE = 1000
 # ─────────────────────────────────────────────────────
 
 
-def build_parent_text(item: dict) -> str:
+def build_cases(data: list) -> dict:
     """
-    v10 구조에 맞게 parent_text 생성
-    - contents_summary 안에 outline, problems, opinion, criteria, action이 있음
-    - contents, problem, action은 최상위 필드
+    audit_v10.json 항목 -> {case_id: {"hash": 내용 해시, "docs": [청크 Document]}}
+    청크 ID는 f"{case_id}-{순번}"이라 재실행해도 같은 사례는 같은 ID를 갖습니다.
     """
-    summary = item.get("contents_summary") or {}
-    
-    # contents_summary가 dict인 경우 (감사원 데이터)
-    if isinstance(summary, dict):
-        outline   = summary.get("outline", "")
-        problems  = summary.get("problems", "")
-        opinion   = summary.get("opinion", "")
-        criteria  = summary.get("criteria", "")
-        action    = summary.get("action", "")
-    else:
-        outline = problems = opinion = criteria = action = ""
-
-    # 최상위 필드 fallback
-    if not problems:
-        problems = item.get("problem", "")
-    if not action:
-        action = item.get("action", "")
-    if not outline:
-        outline = item.get("contents", "")
-
-    parts = [
-        f"[Title]: {item.get('title', '')}",
-        f"[Outline]: {outline}",
-        f"[Problems]: {problems}",
-        f"[Opinion]: {opinion}",
-        f"[Criteria]: {criteria}",
-        f"[Action]: {action}",
-    ]
-    return "\n".join([p for p in parts if p.split(": ", 1)[1].strip()])
+    cases = {}
+    for pos, item in enumerate(data):
+        parent_text = build_parent_text(item)
+        if not parent_text.strip():
+            continue
+
+        case_id = str(item.get("idx", pos))
+        if case_id in cases:
+            case_id = f"{case_id}@{pos}"
+        metadata = {
+            "parent_text": parent_text,
+            "source_type": "audit",
+            "source": "audit_v10.json",
+            "idx": str(item.get("idx", "")),
+            "site": item.get("site", ""),
+            "date": item.get("date") or "1900.01.01",
+            "title": item.get("title", ""),
+            "outline": (item.get("contents_summary") or {}).get("outline", "") if isinstance(item.get("contents_summary"), dict) else "",
+            "category": item.get("category", ""),
+            "cat": item.get("cat") or "",
+            "sub_cat": item.get("sub_cat") or "",
+            "download_url": item.get("download_url", ""),
+            "file_path": item.get("file_path", ""),
+            "risk_category": item.get("risk_category", ""),
+            "disposition_level": str(item.get("disposition_level", "")),
+        }
+        cases[case_id] = {
+            # 본문(parent_text)뿐 아니라 메타데이터가 바뀌어도 다시 적재합니다.
+            "hash": content_hash(metadata),
+            "docs": [
+                Document(page_content=chunk, metadata={"doc_text": chunk, **metadata})
+                for chunk in chunk_parent_text(parent_text)
+            ],
+        }
+    return cases
+
 
+def chunk_ids(case_id: str, start: int, end: int) -> list:
+    return [f"{case_id}-{n}" for n in range(start, end)]
 
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> list:
-    if len(text) <= chunk_size:
-        return [text]
-    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
 
+def upload_fingerprint(documents: list, ids: list) -> str:
+    """컬렉션 / 모델 / 배치 크기 / 청크 ID와 내용이 모두 같을 때만 진행 기록을 이어서 씁니다."""
+    h = hashlib.sha256(f"{COLLECTION_NAME}|{Config.EMBEDDING_MODEL}|{BATCH_SIZE}".encode("utf-8"))
+    for doc_id, doc in zip(ids, documents):
+        h.update(doc_id.encode("utf-8"))
+        h.update(hashlib.sha256(doc.page_content.encode("utf-8")).digest())
+    return h.hexdigest()
 
-def main():
+
+def collection_count(client: MilvusClient) -> int:
+    rows = client.query(COLLECTION_NAME, filter="", output_fields=["count(*)"])
+    return int(rows[0]["count(*)"])
+
+
+def main(full: bool = False, bulk: bool = False):
+    full = full or bulk
     print("=" * 50)
     print("📦 Milvus 업로드 시작 (audit_v10)")
     print("=" * 50)
 
+    if bulk:
+        # 기존 컬렉션을 지운 뒤에 실패하지 않도록 의존성 / MinIO 접근을 먼저 확인합니다.
+        try:
+            check_bulk_support(Config.MILVUS_URI)
+        except RuntimeError as e:
+            print(f"\n❌ Bulk Import를 사용할 수 없습니다: {e}")
+            sys.exit(1)
+
     # 1. 데이터 로드
     print(f"\n1️⃣  데이터 로드: {DATA_PATH}")
     with open(DATA_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
     print(f"   총 {len(data)}개 항목 로드 완료")
 
-    # 2. 임베딩 모델 초기화
-    print(f"\n2️⃣  임베딩 모델 초기화: {Config.EMBEDDING_MODEL}")
-    embedding_model = ClovaXEmbeddings(model=Config.EMBEDDING_MODEL)
+    # 2. Document 생성
+    print(f"\n2️⃣  문서 청킹 및 메타데이터 구성 중...")
+    cases = build_cases(data)
+    print(f"   {len(cases)}개 사례, 총 {sum(len(c['docs']) for c in cases.values())}개 청크 생성 완료")
 
-    # 3. 컬렉션 확인
-    print(f"\n3️⃣  기존 컬렉션 확인: {COLLECTION_NAME}")
+    # 3. 적재 목록(manifest)과 비교
+    print(f"\n3️⃣  적재 목록 비교: {MANIFEST_PATH}")
+    manifest = IngestManifest(
+        MANIFEST_PATH,
+        {
+            "collection": COLLECTION_NAME,
+            "uri": Config.MILVUS_URI,
+            "embedding_model": Config.EMBEDDING_MODEL,
+            "chunker": chunker_name(),
+        },
+    )
     client = MilvusClient(uri=Config.MILVUS_URI, token=Config.MILVUS_TOKEN)
-    existing = client.list_collections()
-    if COLLECTION_NAME in existing:
-        if RESUME_FROM > 0:
-            print(f"   ▶️  이어서 업로드 (RESUME_FROM={RESUME_FROM})")
-        else:
-            print(f"   ⚠️  기존 컬렉션 발견 → 삭제 후 재생성")
+    exists = COLLECTION_NAME in client.list_collections()
+    old = None if full else manifest.load()
+    if old is not None and not exists:
+        print(f"   ⚠️  적재 목록은 있지만 컬렉션이 없음 → 전체 업로드")
+        old = None
+
+    def plan(old):
+        """(업로드할 청크, 청크 ID, 먼저 지울 청크 ID가 속한 사례, 마지막에 지울 청크 ID)"""
+        added, changed, removed = diff_cases(old, cases)
+        documents, ids, stale = [], [], []
+        for case_id in added + changed:
+            docs = cases[case_id]["docs"]
+            documents.extend(docs)
+            ids.extend(chunk_ids(case_id, 0, len(docs)))
+        for case_id in changed:
+            # 청크 수가 줄어든 사례의 남는 청크
+            stale.extend(chunk_ids(case_id, len(cases[case_id]["docs"]), old[case_id]["chunks"]))
+        for case_id in removed:
+            stale.extend(chunk_ids(case_id, 0, old[case_id]["chunks"]))
+        print(f"   추가 {len(added)}건 / 변경 {len(changed)}건 / 삭제 {len(removed)}건 / 유지 {len(cases) - len(added) - len(changed)}건")
+        return documents, ids, set(changed), stale
+
+    incremental = old is not None
+    documents, ids, changed, stale = plan(old or {})
+    checkpoint = UploadCheckpoint(
+        UPLOAD_CHECKPOINT, upload_fingerprint(documents, ids) + ("" if incremental else "|full")
+    )
+    if full:
+        checkpoint.clear()
+    done = set() if bulk else checkpoint.load()
+
+    if incremental and not done:
+        # 다른 곳에서 컬렉션을 바꿨다면 적재 목록을 믿을 수 없으므로 전체를 다시 올립니다.
+        expected = sum(case["chunks"] for case in old.values())
+        try:
+            actual = collection_count(client)
+        except Exception as e:
+            print(f"   ⚠️  컬렉션 행 수 확인 실패 ({e}) → 적재 목록을 그대로 사용")
+            actual = expected
+        if actual != expected:
+            print(f"   ⚠️  컬렉션 행 수({actual})가 적재 목록({expected})과 다름 → 전체 업로드")
+            incremental = False
+            documents, ids, changed, stale = plan({})
+            checkpoint = UploadCheckpoint(UPLOAD_CHECKPOINT, upload_fingerprint(documents, ids) + "|full")
+            done = set() if bulk else checkpoint.load()
+
+    if not incremental:
+        if exists and not done:
+            print(f"   ⚠️  기존 컬렉션 삭제 후 재생성: {COLLECTION_NAME}")
             client.drop_collection(COLLECTION_NAME)
+        elif done and not exists:
+            checkpoint.clear()
+            done = set()
+        manifest.clear()
+    if done:
+        print(f"   ▶️  이어서 업로드 ({len(done)}개 배치 완료 기록: {UPLOAD_CHECKPOINT})")
+
+    if not documents and not stale:
+        print("\n✅ 바뀐 사례가 없습니다. 업로드를 건너뜁니다.")
+        return
+
+    # 4. 임베딩 모델 초기화
+    print(f"\n4️⃣  임베딩 모델 초기화: {Config.EMBEDDING_MODEL}")
+    embedding_model = ClovaXEmbeddings(model=Config.EMBEDDING_MODEL)
+    if Config.EMBEDDING_CACHE_ENABLED:
+        # 이미 임베딩한 청크는 디스크 캐시에서 읽습니다 (청크 크기 / 메타데이터만 바뀐 재적재는 대부분 로컬)
+        embedding_model = CachedEmbeddings(embedding_model, model=Config.EMBEDDING_MODEL)
+        print(f"   💾 임베딩 캐시: {os.path.abspath(Config.EMBEDDING_CACHE_DIR)}")
+
+    # 5. Milvus 업로드 (임베딩 스레드 풀 -> 큐 -> 삽입 스레드 / Bulk Import 적재 파일)
+    batches = [
+        (batch_no, i)
+        for batch_no, i in enumerate(range(0, len(documents), BATCH_SIZE))
+        if batch_no not in done
+    ]
+    total_batches = (len(documents) + BATCH_SIZE - 1) // BATCH_SIZE
+    print(
+        f"\n5️⃣  Milvus {'Bulk Import' if bulk else '업로드'} 중 (배치: {BATCH_SIZE}개, 남은 배치: {len(batches)}/{total_batches}, "
+        f"동시 임베딩: {Config.EMBEDDING_CONCURRENCY}, 초기 속도: {Config.EMBEDDING_QPS} req/s)..."
+    )
+    limiter = AdaptiveRateLimiter(Config.EMBEDDING_QPS, Config.EMBEDDING_QPS_MAX)
+
+    def embed(batch):
+        _, i = batch
+        texts = [doc.page_content for doc in documents[i:i + BATCH_SIZE]]
+        return embed_texts(embedding_model, texts, limiter, Config.EMBEDDING_CALL_SIZE)
+
+    if bulk:
+        # 벡터 차원을 알아야 스키마를 만들 수 있으므로 첫 청크를 먼저 임베딩합니다 (본 적재에서는 캐시 적중)
+        dim = len(embed_texts(embedding_model, [documents[0].page_content], limiter)[0])
+        metadata_fields = list(documents[0].metadata)
+        schema = build_schema(dim, metadata_fields)
+        client.create_collection(COLLECTION_NAME, schema=schema)
+        loader = BulkLoader(client, COLLECTION_NAME, schema, Config.MILVUS_URI, Config.MILVUS_TOKEN)
+        print(f"   스키마: pk / text / vector({dim}) + {len(metadata_fields)}개 VARCHAR 필드")
     else:
-        print(f"   ✅ 기존 컬렉션 없음 → 새로 생성")
+        vector_store = Milvus(
+            embedding_function=embedding_model,
+            connection_args={
+                "uri": Config.MILVUS_URI,
+                "token": Config.MILVUS_TOKEN,
+            },
+            collection_name=COLLECTION_NAME,
+            auto_id=False,
+            drop_old=False,
+        )
 
-    # 4. Document 생성
-    print(f"\n4️⃣  문서 청킹 및 메타데이터 구성 중...")
-    documents = []
-    for item in data:
-        parent_text = build_parent_text(item)
-        if not parent_text.strip():
-            continue
+    def write_rows(batch, vectors):
+        _, i = batch
+        for doc_id, doc, vector in zip(ids[i:i + BATCH_SIZE], documents[i:i + BATCH_SIZE], vectors):
+            loader.append(build_row(doc_id, doc.page_content, vector, doc.metadata, metadata_fields))
+
+    def insert(batch, vectors):
+        _, i = batch
+        docs = documents[i:i + BATCH_SIZE]
+        batch_ids = ids[i:i + BATCH_SIZE]
+        # 바뀐 사례는 같은 ID의 이전 청크를 지우고 넣습니다 (삭제 → 삽입 모두 같은 배치 안이라 재실행해도 안전)
+        replaced = [doc_id for doc_id in batch_ids if doc_id.rsplit("-", 1)[0] in changed]
+        if replaced:
+            client.delete(COLLECTION_NAME, ids=replaced)
+        vector_store.add_embeddings(
+            texts=[doc.page_content for doc in docs],
+            embeddings=vectors,
+            metadatas=[doc.metadata for doc in docs],
+            ids=batch_ids,
+        )
 
-        for chunk in chunk_text(parent_text):
-            doc = Document(
-                page_content=chunk,
-                metadata={
-                    "doc_text": chunk,
-                    "parent_text": parent_text,
-                    "source_type": "audit",
-                    "source": "audit_v10.json",
-                    "idx": str(item.get("idx", "")),
-                    "site": item.get("site", ""),
-                    "date": item.get("date") or "1900.01.01",
-                    "title": item.get("title", ""),
-                    "outline": (item.get("contents_summary") or {}).get("outline", "") if isinstance(item.get("contents_summary"), dict) else "",
-                    "category": item.get("category", ""),
-                    "cat": item.get("cat") or "",
-                    "sub_cat": item.get("sub_cat") or "",
-                    "download_url": item.get("download_url", ""),
-                    "file_path": item.get("file_path", ""),
-                    "risk_category": item.get("risk_category", ""),
-                    "disposition_level": str(item.get("disposition_level", "")),
-                },
-            )
-            documents.append(doc)
-
-    print(f"   총 {len(documents)}개 청크 생성 완료")
-    if RESUME_FROM > 0:
-        print(f"   ⏩ {RESUME_FROM}개 건너뛰고 이어서 시작")
-
-    # 5. Milvus 업로드 (배치)
-    print(f"\n5️⃣  Milvus 업로드 중 (배치: {BATCH_SIZE}개, 딜레이: {SLEEP_BETWEEN_BATCHES}s)...")
     start = time.time()
-    vector_store = None
+    uploaded = 0
 
-    for i in range(0, len(documents), BATCH_SIZE):
-        if i < RESUME_FROM:
-            continue
+    def on_inserted(batch):
+        nonlocal uploaded
+        batch_no, i = batch
+        if not bulk:
+            checkpoint.mark(batch_no)
+        uploaded += len(documents[i:i + BATCH_SIZE])
+        elapsed = time.time() - start
+        print(
+            f"   [{uploaded}/{len(documents)} 청크] {'임베딩' if bulk else '업로드'} "
+            f"({elapsed:.1f}s, {uploaded / max(elapsed, 1e-6):.1f} chunks/s, 속도 {limiter.rate:.1f} req/s)"
+        )
 
-        batch = documents[i:i + BATCH_SIZE]
-
-        if vector_store is None:
-            vector_store = Milvus.from_documents(
-                documents=batch,
-                embedding=embedding_model,
-                connection_args={
-                    "uri": Config.MILVUS_URI,
-                    "token": Config.MILVUS_TOKEN,
-                },
-                collection_name=COLLECTION_NAME,
-                drop_old=False,
-            )
+    try:
+        run_pipeline(
+            batches,
+            embed,
+            write_rows if bulk else insert,
+            concurrency=Config.EMBEDDING_CONCURRENCY,
+            queue_size=INSERT_QUEUE_SIZE,
+            on_inserted=on_inserted,
+        )
+        if bulk:
+            load_start = time.time()
+            print(f"   📥 적재 파일 가져오기 + 인덱스 생성 중...")
+            loader.finish()
+            print(f"   {loader.rows}행 적재 완료 ({time.time() - load_start:.1f}s)")
+    except Exception as e:
+        print(f"\n❌ 업로드 중단: {e}")
+        if bulk:
+            print("   같은 명령으로 다시 실행하세요. 이미 임베딩한 청크는 캐시에서 읽습니다.")
         else:
-            vector_store.add_documents(batch)
+            print(f"   완료된 배치는 {UPLOAD_CHECKPOINT}에 기록되어 있습니다. 같은 명령으로 다시 실행하면 이어서 업로드합니다.")
+        raise
 
-        elapsed = time.time() - start
-        print(f"   [{i + len(batch)}/{len(documents)}] 업로드 완료 ({elapsed:.1f}s)")
-        time.sleep(SLEEP_BETWEEN_BATCHES)
+    # 삭제된 사례 / 줄어든 청크 정리
+    for i in range(0, len(stale), DELETE_BATCH_SIZE):
+        client.delete(COLLECTION_NAME, ids=stale[i:i + DELETE_BATCH_SIZE])
+    if stale:
+        print(f"   🗑️  {len(stale)}개 청크 삭제")
 
-    print(f"\n✅ 업로드 완료! 총 소요시간: {time.time() - start:.1f}s")
+    manifest.save({
+        case_id: {"hash": case["hash"], "chunks": len(case["docs"])}
+        for case_id, case in cases.items()
+    })
+    checkpoint.clear()
+    print(f"\n✅ 업로드 완료! 총 소요시간: {time.time() - start:.1f}s (429 응답 {limiter.rate_limited}회)")
+    if isinstance(embedding_model, CachedEmbeddings):
+        print(f"   임베딩 캐시 적중 {embedding_model.hits}개 / API 호출 {embedding_model.misses}개")
 
     # 6. 검증
     print(f"\n6️⃣  업로드 검증...")
@@ -175,4 +337,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="audit_v10.json -> Milvus uploader")
+    parser.add_argument("--full", action="store_true", help="적재 목록 / 진행 기록을 무시하고 컬렉션을 다시 만듦")
+    parser.add_argument("--bulk", action="store_true", help="--full을 Bulk Import로 수행 (Milvus 서버는 MinIO 필요)")
+    args = parser.parse_args()
+    main(args.full, args.bulk)
@@ -0,0 +1,187 @@
+"""
+/chat 엔드포인트 동시성 부하 테스트 (Load Test).
+
+여러 세션이 동시에 질문을 보냈을 때의 지연 시간(Latency)과 처리량(Throughput)을 측정합니다.
+백엔드(main.py)가 실행 중이어야 합니다.
+
+Usage:
+    python load_test.py --concurrency 10 --requests 50
+    python load_test.py --url http://localhost:8000/chat --query "가스공사 횡령 사례 알려줘"
+
+    # 독립 세션 확장성: concurrency를 늘려가며 처리량이 선형으로 늘어나는지 확인
+    python load_test.py --scaling 1,2,4,8 --requests 32
+
+    # 같은 세션에 동시 요청 (세션 Lock에 의해 직렬화되어야 함)
+    python load_test.py --session-mode shared --concurrency 4 --requests 8
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "안녕",
+    "2024년 감사 건수 통계 알려줘",
+    "인천국제공항공사 최신 2건 알려줘",
+    "근무태만 사례 알려줘",
+    "횡령 시 처리 규정은?",
+]
+
+
+async def run_one(client: httpx.AsyncClient, url: str, query: str, session_id: str) -> dict:
+    """SSE 스트림을 끝까지 읽고 첫 토큰 시간(TTFT)과 전체 시간을 기록합니다."""
+    payload = {"query": query, "session_id": session_id}
+    start = time.perf_counter()
+    first_token = None
+    error = None
+
+    try:
+        async with client.stream("POST", url, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("type") in ("token", "answer") and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif event.get("type") == "error":
+                    error = event.get("content")
+    except Exception as e:
+        error = str(e)
+
+    return {
+        "query": query,
+        "session_id": session_id,
+        "latency": time.perf_counter() - start,
+        "ttft": first_token,
+        "error": error,
+    }
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def report(results: list, elapsed: float, verbose: bool = True) -> dict:
+    ok = [r for r in results if not r["error"]]
+    latencies = [r["latency"] for r in ok]
+    ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+
+    summary = {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "elapsed_sec": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 2),
+        "latency_p95": round(percentile(latencies, 95), 2),
+        "latency_mean": round(statistics.mean(latencies), 2) if latencies else 0.0,
+        "ttft_p50": round(percentile(ttfts, 50), 2),
+        "ttft_p95": round(percentile(ttfts, 95), 2),
+    }
+
+    if not verbose:
+        return summary
+
+    print("\n📊 [Load Test Result]")
+    for k, v in summary.items():
+        print(f"   {k:>15}: {v}")
+    for r in results:
+        if r["error"]:
+            print(f"   ❌ {r['query']}: {r['error']}")
+    return summary
+
+
+def session_ids(mode: str, n: int) -> list:
+    """unique: 요청마다 다른 세션 (독립 사용자), shared: 모든 요청이 같은 세션 (같은 탭에서 연타)."""
+    if mode == "shared":
+        return [f"load_shared_{uuid.uuid4().hex[:8]}"] * n
+    return [f"load_{uuid.uuid4().hex[:8]}" for _ in range(n)]
+
+
+async def run_level(client: httpx.AsyncClient, args, queries: list, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    sessions = session_ids(args.session_mode, args.requests)
+
+    async def bounded(i: int):
+        async with semaphore:
+            return await run_one(client, args.url, queries[i % len(queries)], sessions[i])
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+    return list(results), time.perf_counter() - start
+
+
+def report_scaling(levels: list) -> None:
+    """concurrency별 처리량과 선형 확장 대비 효율 (throughput / (base throughput * c))."""
+    base = levels[0]
+    base_per_worker = base["throughput_rps"] / base["concurrency"] if base["throughput_rps"] else 0.0
+
+    print(f"\n📈 [Scaling] session_mode={levels[0]['session_mode']}")
+    print(f"   {'conc':>5} {'rps':>8} {'p50':>7} {'p95':>7} {'errors':>7} {'efficiency':>11}")
+    for level in levels:
+        ideal = base_per_worker * level["concurrency"]
+        level["efficiency"] = round(level["throughput_rps"] / ideal, 3) if ideal else 0.0
+        print(
+            f"   {level['concurrency']:>5} {level['throughput_rps']:>8} "
+            f"{level['latency_p50']:>7} {level['latency_p95']:>7} "
+            f"{level['errors']:>7} {level['efficiency']:>11}"
+        )
+
+
+async def main(args):
+    queries = [args.query] if args.query else DEFAULT_QUERIES
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    levels = [int(c) for c in args.scaling.split(",")] if args.scaling else [args.concurrency]
+
+    output = {"session_mode": args.session_mode, "levels": []}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        for concurrency in levels:
+            print(
+                f"🚀 {args.requests} requests, concurrency={concurrency}, "
+                f"sessions={args.session_mode} -> {args.url}"
+            )
+            results, elapsed = await run_level(client, args, queries, concurrency)
+            summary = report(results, elapsed, verbose=not args.scaling)
+            summary.update({"concurrency": concurrency, "session_mode": args.session_mode})
+            output["levels"].append({"summary": summary, "results": results})
+
+    if args.scaling:
+        report_scaling([level["summary"] for level in output["levels"]])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agentic RAG /chat load test")
+    parser.add_argument("--url", default="http://localhost:8000/chat")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--query", default=None, help="모든 요청에 같은 질문 사용")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument(
+        "--session-mode",
+        choices=["unique", "shared"],
+        default="unique",
+        help="unique: 요청마다 새 세션, shared: 모든 요청이 한 세션 (세션 Lock 직렬화 확인)",
+    )
+    parser.add_argument(
+        "--scaling", default=None, help="쉼표로 구분한 concurrency 목록 (예: 1,2,4,8)"
+    )
+    asyncio.run(main(parser.parse_args()))
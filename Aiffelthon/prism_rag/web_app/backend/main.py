@@ -2,7 +2,8 @@ import sys
 import os
 import json
 import asyncio
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict
 
 # Add parent directory to path to import agentic_rag_v2 modules
 # web_app/backend -> web_app -> project_root
@@ -13,6 +14,7 @@ sys.path.append(project_root)  # Load project root first to import common.config
 
 # Import Config to get the active RAG version
 from common.config import Config
+from common.tracing import latency_summary, record as record_span, sql_route_summary
 
 rag_dir = os.path.join(project_root, "rag", Config.ACTIVE_RAG_DIR)
 
@@ -28,9 +30,10 @@ print(f"🔹 [Backend] Active RAG Module: {rag_dir}")
 sys.path.append(rag_dir)  # Add dynamic RAG module to path
 
 from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from graph import app as rag_app  # The compiled LangGraph app
 
 # DraftingAgent depends on agentic_rag_v2 modules.
@@ -43,6 +46,12 @@ except ImportError:
     )
     DraftingAgent = None
 
+# 대화 요약은 응답 전송 후 백그라운드에서 수행합니다 (V2 전용).
+try:
+    from modules.memory import check_turn_messages, summarize_in_background
+except ImportError:
+    check_turn_messages = summarize_in_background = None
+
 app = FastAPI(title="Agentic RAG API")
 
 # Allow CORS for Next.js
@@ -69,11 +78,37 @@ async def startup_event():
             "⚠️ modules.vector_retriever not found (Likely running V1). Skipping warmup."
         )
 
+    # 오래된 체크포인트 정리 (RedisSaver 사용 시, 스레드별 최근 CHECKPOINT_KEEP_LAST개만 유지)
+    compactor = getattr(rag_app.checkpointer, "arun_compactor", None)
+    if compactor is not None:
+        app.state.compactor_task = asyncio.create_task(
+            compactor(Config.CHECKPOINT_COMPACT_INTERVAL)
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    task = getattr(app.state, "compactor_task", None)
+    if task is not None:
+        task.cancel()
+
+    try:
+        from common.redis_pool import close_async_redis
+
+        await close_async_redis()
+    except ImportError:
+        pass
+
 
 class ChatRequest(BaseModel):
     query: str
+    # /chat은 대화 기록을 체크포인터(session_id)에서 읽으므로 보낼 필요가 없습니다.
+    # (V1 그래프와 보고서 엔드포인트는 history가 있으면 그대로 사용합니다.)
     history: list = []
-    session_id: str = "default_session"
+    # 브라우저 탭마다 고유한 값 (= LangGraph thread_id). Redis 키 구분자(':')는 허용하지 않습니다.
+    session_id: str = Field(
+        default="default_session", max_length=128, pattern=r"^[A-Za-z0-9_\-]+$"
+    )
     additional_info: dict = {}
     dashboard_context: dict = {}  # 대시보드 필터 현황
 
@@ -102,29 +137,89 @@ NODE_NAMES = {
 }
 
 
+class SessionLocks:
+    """
+    session_id(= LangGraph thread) 단위 asyncio.Lock.
+    같은 thread의 요청(그래프 실행, 백그라운드 요약 반영)이 체크포인트 체인에 교차해서 쓰지 않도록 직렬화합니다.
+    서로 다른 세션은 서로 기다리지 않습니다. 사용 중인 세션의 Lock만 보관합니다.
+    (프로세스 내 Lock이므로 여러 워커로 띄울 때는 session_id 기준 sticky routing이 필요합니다.)
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holders: Dict[str, int] = {}
+
+    def locked(self, session_id: str) -> bool:
+        lock = self._locks.get(session_id)
+        return lock is not None and lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._holders[session_id] = self._holders.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._holders[session_id] -= 1
+            if not self._holders[session_id]:
+                del self._holders[session_id]
+                del self._locks[session_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+session_locks = SessionLocks()
+
+
 async def event_generator(
     query: str, history: list, session_id: str
 ) -> AsyncGenerator[str, None]:
     """
     Yields Server-Sent Events (SSE) for the frontend.
+    같은 세션의 이전 요청이 끝날 때까지 기다린 뒤 그래프를 실행합니다.
     """
+    if session_locks.locked(session_id):
+        yield f"data: {json.dumps({'type': 'status', 'content': '이전 질문을 처리 중입니다. 잠시 기다려 주세요...'})}\n\n"
+
+    async with session_locks.hold(session_id):
+        async for event in graph_events(query, history, session_id):
+            yield event
+
+
+async def graph_events(
+    query: str, history: list, session_id: str
+) -> AsyncGenerator[str, None]:
+    """그래프 실행 결과를 SSE 이벤트로 변환합니다 (호출자가 세션 Lock을 잡고 있어야 합니다)."""
     inputs = {
         # Do NOT initialize documents=[], or it wipes previous state before Router can save it!
-        "messages": history,  # Pass history to graph state
         "reflection_count": 0,
     }
 
     # Input Key Mapping (V1 vs V2)
     # V2 uses "query", V1 uses "question"
     if "v1" in Config.ACTIVE_RAG_DIR:
+        inputs["messages"] = history  # V1은 클라이언트가 보낸 전체 기록을 사용
         inputs["question"] = query
         inputs["original_question"] = query  # V1 often needs this initialized
     else:
+        # V2: 대화 기록은 체크포인터가 소유합니다. 새 사용자 메시지만 덧붙입니다 (merge_messages reducer).
+        inputs["messages"] = [{"role": "user", "content": query}]
         inputs["query"] = query
 
     # Thread Config for Redis Memory
     config = {"configurable": {"thread_id": session_id}}
 
+    # V2 (Debug): 턴이 끝난 뒤 대화 기록이 user/assistant 메시지 1개씩만 늘었는지 확인합니다.
+    # 체크포인트 전체 조회가 턴마다 두 번 추가되므로 기본값은 꺼져 있습니다.
+    check_history = (
+        Config.DEBUG_CHECK_TURN_MESSAGES
+        and check_turn_messages is not None
+        and rag_app.checkpointer is not None
+    )
+    history_before = await thread_messages(session_id) if check_history else []
+
     # Initial Event
     yield f"data: {json.dumps({'type': 'status', 'content': '분석 시작...'})}\n\n"
 
@@ -135,9 +230,27 @@ async def event_generator(
         
         import time
         start_total = time.time()
-        async for output in rag_app.astream(inputs, config=config):
+
+        # [Streaming] "updates"는 노드 완료(상태 이벤트), "custom"은 generate 노드의 토큰 스트림입니다.
+        tokens_sent = False
+        async for mode, output in rag_app.astream(
+            inputs, config=config, stream_mode=["updates", "custom"]
+        ):
+            if mode == "custom":
+                event_type = output.get("type") if isinstance(output, dict) else None
+                if event_type == "generation_start":
+                    # 검증 단계에서 재생성이 결정되면 이미 보낸 토큰을 무효화하도록 알립니다.
+                    if tokens_sent:
+                        yield f"data: {json.dumps({'type': 'revision', 'content': ''})}\n\n"
+                        tokens_sent = False
+                elif event_type == "token" and output.get("content"):
+                    tokens_sent = True
+                    yield f"data: {json.dumps({'type': 'token', 'content': output['content']})}\n\n"
+                continue
+
             for key, value in output.items():
                 print(f"[API Log] Node Completed: {key}")
+                value = value or {}
 
                 # 1. Send Status Update (Thought Process)
                 status_msg = NODE_NAMES.get(key, f"{key} 단계 완료")
@@ -152,6 +265,7 @@ async def event_generator(
 
                 if key in safe_answer_nodes:
                     # We need to dig the answer from the state.
+                    # 토큰 스트림을 받은 클라이언트도 'answer'로 최종 텍스트를 확정합니다.
                     if "answer" in value and value["answer"]:
                         yield f"data: {json.dumps({'type': 'answer', 'content': value['answer']})}\n\n"
                         # 출처 문서 함께 전송
@@ -175,7 +289,10 @@ async def event_generator(
                         yield f"data: {json.dumps({'type': 'command', 'content': value['command']})}\n\n"
         
         end_total = time.time()
-        print("🔥 TOTAL RAG TIME:", end_total - start_total)
+        record_span("request", "chat", end_total - start_total)
+
+        if check_history:
+            check_turn_messages(history_before, await thread_messages(session_id))
         
         yield "data: [DONE]\n\n"
 
@@ -195,12 +312,47 @@ async def chat_endpoint(request: ChatRequest):
     session_id = request.session_id or "default_session"
     print(f" -> [API] Session ID: {session_id}")
 
+    # [DONE] 이후 요약을 갱신하여 다음 턴의 체크포인트에 반영합니다.
+    background = None
+    if summarize_in_background:
+        # 요약(LLM 호출)은 Lock 밖에서, 체크포인트 반영만 세션 Lock 안에서 수행합니다.
+        background = BackgroundTask(
+            summarize_in_background,
+            rag_app,
+            {"configurable": {"thread_id": session_id}},
+            lock=session_locks.hold(session_id),
+        )
+
     return StreamingResponse(
         event_generator(request.query, request.history, session_id),
         media_type="text/event-stream",
+        background=background,
     )
 
 
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """세션의 대화 기록/체크포인트를 삭제합니다 (프론트엔드 '대화 초기화')."""
+    checkpointer = rag_app.checkpointer
+    if checkpointer is not None:
+        async with session_locks.hold(session_id):
+            await checkpointer.adelete_thread(session_id)
+    return {"status": "deleted", "session_id": session_id}
+
+
+async def thread_messages(session_id: str) -> list:
+    """체크포인터에 저장된 세션 대화 기록."""
+    snapshot = await rag_app.aget_state({"configurable": {"thread_id": session_id}})
+    return list((snapshot.values or {}).get("messages", [])) if snapshot else []
+
+
+async def session_history(request: ChatRequest) -> list:
+    """요청에 history가 없으면 체크포인터에 저장된 세션 대화 기록을 사용합니다."""
+    if request.history:
+        return request.history
+    return await thread_messages(request.session_id or "default_session")
+
+
 @app.post("/check_report_readiness")
 async def check_report_readiness_endpoint(request: ChatRequest):
     """
@@ -214,7 +366,7 @@ async def check_report_readiness_endpoint(request: ChatRequest):
         }
 
     agent = DraftingAgent()
-    result = agent.analyze_requirements(request.history)
+    result = await agent.aanalyze_requirements(await session_history(request))
     return result
 
 
@@ -233,9 +385,10 @@ async def generate_report_endpoint(request: ChatRequest):
         }
 
     agent = DraftingAgent()
+    history = await session_history(request)
     from modules.vector_retriever import get_retriever
 
-    retriever = get_retriever()
+    retriever = await asyncio.to_thread(get_retriever)
 
     # 2. Construct Search Query for Context (Source B)
     search_query = ""
@@ -247,8 +400,8 @@ async def generate_report_endpoint(request: ChatRequest):
         ]
         search_query = " ".join([s for s in subjects if s]).strip()
 
-    if not search_query and request.history:
-        for msg in reversed(request.history):
+    if not search_query and history:
+        for msg in reversed(history):
             if msg["role"] == "user":
                 search_query = msg["content"]
                 break
@@ -260,15 +413,16 @@ async def generate_report_endpoint(request: ChatRequest):
 
     # 3. Retrieve Documents (Source B)
     try:
-        retrieved_docs = retriever.search_and_merge(search_query, top_k=3)
+        retrieved_docs = await retriever.asearch_and_merge(search_query, top_k=3)
         print(f"   -> Retrieved {len(retrieved_docs)} documents for context.")
     except Exception as e:
         print(f"   -> ⚠️ Retrieval Failed: {e}")
         retrieved_docs = []
 
-    # 4. Generate Report
-    report_content = agent.generate_report(
-        messages=request.history,
+    # 4. Generate Report (긴 동기 호출이므로 이벤트 루프를 막지 않도록 스레드에서 실행)
+    report_content = await asyncio.to_thread(
+        agent.generate_report,
+        messages=history,
         retrieved_docs=retrieved_docs,
         additional_info=request.additional_info,
         dashboard_context=request.dashboard_context,
@@ -279,7 +433,37 @@ async def generate_report_endpoint(request: ChatRequest):
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "model": Config.LLM_MODEL}
+    return {"status": "ok", "model": Config.LLM_MODEL, "active_sessions": len(session_locks)}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint (노드/LLM/검색 단계별 latency 히스토그램, 토큰, 캐시 hit)."""
+    try:
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    except ImportError:
+        return Response("prometheus_client not installed\n", status_code=501)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/metrics/latency")
+def latency_metrics():
+    """최근 샘플 기준 노드/LLM/검색 단계별 p50/p95/p99 (초)."""
+    return latency_summary()
+
+
+@app.get("/metrics/sql")
+def sql_route_metrics():
+    """SQLRetriever 경로별 처리 횟수 (템플릿 Fast Path vs NL2SQL)."""
+    return sql_route_summary()
+
+
+@app.get("/metrics/llm")
+def llm_scheduler_metrics():
+    """모델별 LLM 스케줄러 대기열 깊이 / 평균 대기 시간 / 429 횟수."""
+    from common.llm_scheduler import scheduler_metrics
+
+    return scheduler_metrics()
 
 
 if __name__ == "__main__":
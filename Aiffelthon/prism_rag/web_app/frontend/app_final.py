@@ -10,6 +10,9 @@ import math
 import ast
 import re
 import requests
+import uuid
+import os
+import sqlite3
 
 NODE_NAME_MAP = {
     "router": "질문 분석",
@@ -359,6 +362,71 @@ def load_risk_keywords():
     except FileNotFoundError:
         return METADATA_MAP.copy()
 
+# ---------------------------------------------------------
+# 2-1. 통계 큐브 (build_metadata_db.py가 만든 audit_metadata.db의 audit_stats)
+#      차원 조합별 건수 / 처분금액 합계 / 처분강도 평균이 미리 집계되어 있어,
+#      필터가 없는 기본 화면의 집계는 원본 행 수와 무관하게 큐브에서 바로 읽습니다.
+# ---------------------------------------------------------
+STATS_DB_PATH = os.path.join("common", "audit_metadata.db")
+CUBE_ALL = "*"
+CUBE_DIMS = ["year", "quarter", "site", "company", "agency_category",
+             "audit_report_type", "risk_category", "disposition_level"]
+
+@st.cache_data
+def load_stats_cube(db_mtime):
+    """db_mtime: DB를 다시 빌드하면 캐시가 갱신되도록 하는 캐시 키"""
+    try:
+        conn = sqlite3.connect(f"file:{STATS_DB_PATH}?mode=ro", uri=True)
+        try:
+            return pd.read_sql_query("SELECT * FROM audit_stats", conn)
+        finally:
+            conn.close()
+    except Exception:
+        return pd.DataFrame()
+
+def get_stats_cube():
+    if not os.path.exists(STATS_DB_PATH):
+        return pd.DataFrame()
+    return load_stats_cube(os.path.getmtime(STATS_DB_PATH))
+
+def cube_counts(group, **filters):
+    """
+    group 차원별 집계 (나머지 차원은 '*' = 전체). 큐브가 없으면 None → 호출부에서 pandas 집계.
+    반환 컬럼: group 차원들 + 건수 / 처분금액 / 처분강도
+    """
+    cube = get_stats_cube()
+    if cube.empty:
+        return None
+    mask = pd.Series(True, index=cube.index)
+    for dim in CUBE_DIMS:
+        if dim in filters: mask &= cube[dim] == str(filters[dim])
+        elif dim in group: mask &= (cube[dim] != CUBE_ALL) & (cube[dim] != '')
+        else: mask &= cube[dim] == CUBE_ALL
+    out = cube.loc[mask, list(group) + ['count', 'penalty_sum', 'severity_avg']]
+    return out.rename(columns={'count': '건수', 'penalty_sum': '처분금액', 'severity_avg': '처분강도'}).reset_index(drop=True)
+
+def cube_org_risk(orgs, by_year=False):
+    """
+    기관 벤치마크의 calc_risk(지적건수 / 처분강도 / 반복비율)를 큐브에서 계산합니다.
+    반복비율 = 3건 이상 지적된 리스크 분야 수 / 지적된 리스크 분야 수 × 100. 큐브가 없으면 None.
+    """
+    keys = ['agency_category', 'year'] if by_year else ['agency_category']
+    base = cube_counts(keys)
+    per_risk = cube_counts(keys + ['risk_category'])
+    if base is None or per_risk is None:
+        return None
+    base = base[base['agency_category'].isin(orgs)]
+    per_risk = per_risk[per_risk['agency_category'].isin(orgs)]
+    rep = per_risk.groupby(keys)['건수'].agg(lambda c: (c >= 3).sum() / max(len(c), 1) * 100).reset_index(name='반복비율')
+    out = base.merge(rep, on=keys, how='left').fillna({'반복비율': 0})
+    out = out.rename(columns={'건수': '지적건수'})[keys + ['지적건수', '처분강도', '반복비율']]
+    if by_year:
+        out['year'] = out['year'].astype(int)
+    else:
+        # 큐브에 없는 기관(지적 0건)도 선택 순서대로 한 행씩 남깁니다.
+        out = pd.DataFrame({'agency_category': orgs}).merge(out, how='left').fillna(0)
+    return out
+
 if 'df' not in st.session_state or 'risk_category' not in st.session_state['df'].columns:
     with st.spinner('🚀 데이터 로딩 중...'):
         st.cache_data.clear()
@@ -995,6 +1063,9 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
         # ── 세션 상태 초기화 ──────────────────────────────
         if "chat_history" not in st.session_state:
             st.session_state["chat_history"] = []
+        # 브라우저 탭(Streamlit 세션)마다 고유한 LangGraph thread를 사용합니다.
+        if "session_id" not in st.session_state:
+            st.session_state["session_id"] = f"prism_{uuid.uuid4().hex}"
         if "thought_process" not in st.session_state:
             st.session_state["thought_process"] = {}
         if "show_report" not in st.session_state:
@@ -1094,6 +1165,14 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
 
             # 대화 초기화
             if st.button("🗑️ 대화 초기화", key="clear_chat"):
+                # 대화 기록은 백엔드 체크포인터가 관리하므로 서버 쪽 세션도 함께 지웁니다.
+                try:
+                    requests.delete(
+                        f"http://localhost:8000/sessions/{st.session_state['session_id']}", timeout=5
+                    )
+                except requests.RequestException:
+                    pass
+                st.session_state["session_id"] = f"prism_{uuid.uuid4().hex}"
                 st.session_state["chat_history"] = []
                 st.session_state["thought_process"] = {}
                 st.session_state["references"] = {}
@@ -1117,10 +1196,10 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
                     try:
                         response = requests.post(
                             "http://localhost:8000/chat",
+                            # 새 메시지만 보냅니다. 이전 대화는 백엔드가 session_id로 이어 붙입니다.
                             json={
                                 "query": user_input,
-                                "history": st.session_state["chat_history"],
-                                "session_id": "prism_session_01"
+                                "session_id": st.session_state["session_id"]
                             },
                             stream=True,
                             timeout=None
@@ -1130,6 +1209,8 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
                             answer_text = ""
                             thoughts = []
                             references = []
+                            # 토큰 스트리밍 출력 영역
+                            stream_placeholder = st.empty()
 
                             for line in response.iter_lines():
                                 if line:
@@ -1145,8 +1226,17 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
                                                     "node": json_data["node"],
                                                     "content": json_data["content"]
                                                 })
-                                            elif json_data.get("type") == "answer":
+                                            elif json_data.get("type") == "token":
                                                 answer_text += json_data.get("content", "")
+                                                stream_placeholder.markdown(answer_text + "▌")
+                                            elif json_data.get("type") == "revision":
+                                                # 검증 후 재생성: 스트리밍된 초안을 지우고 다시 받음
+                                                answer_text = ""
+                                                stream_placeholder.info("답변을 검증하여 다시 작성하는 중입니다...")
+                                            elif json_data.get("type") == "answer":
+                                                # 최종 확정 답변으로 교체
+                                                answer_text = json_data.get("content", "")
+                                                stream_placeholder.markdown(answer_text)
                                             elif json_data.get("type") == "references":
                                                 references = json_data.get("content", [])
                                             elif json_data.get("type") == "command":
@@ -1201,7 +1291,7 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
                             res = requests.post(
                                 "http://localhost:8000/check_report_readiness",
                                 json={"query": "Check Readiness", "history": history,
-                                      "session_id": "prism_session_01"},
+                                      "session_id": st.session_state["session_id"]},
                             )
                             data = res.json()
                             if data.get("status") == "missing_info":
@@ -1247,7 +1337,7 @@ elif menu == "감사 정보 AI 검색 및 최신 뉴스":
                                 json={
                                     "query": "Generate Report",
                                     "history": history,
-                                    "session_id": "prism_session_01",
+                                    "session_id": st.session_state["session_id"],
                                     "additional_info": st.session_state["user_inputs"],
                                     "dashboard_context": dashboard_context,
                                 },
@@ -1385,6 +1475,9 @@ elif menu == "감사 트렌드":
         if sel_at and "전체" not in sel_at_raw: fdf = fdf[fdf['audit_report_type'].isin(sel_at)]
         if sel_org_cat and "전체" not in sel_oc_raw: fdf = fdf[fdf['org_category'].isin(sel_org_cat)]
         if sel_org: fdf = fdf[fdf['agency_category'].isin(sel_org)]
+        # 필터가 모두 기본값이면 (전체 기간/전체 유형/전체 기관) 집계를 통계 큐브에서 읽습니다.
+        use_cube = ("전체" in sel_sites_raw and pp == "전체" and "전체" in sel_at_raw
+                    and "전체" in sel_oc_raw and not sel_org)
 
         kc1,kc2,kc3,kc4,kc5 = st.columns(5)
         kc1.metric("📋 총 지적 건수",f"{len(fdf):,}건"); kc2.metric("🏢 기관 수",f"{fdf['agency_category'].nunique():,}개")
@@ -1417,14 +1510,30 @@ elif menu == "감사 트렌드":
                 elif ts_period == "연도별": tc = 'year'
                 else: tc = 'year_month'
 
+                # 분기별/연도별은 큐브(year, quarter, audit_report_type)에서 바로 집계
+                cube_td = None
+                if use_cube and tc != 'year_month':
+                    cube_group = ['year', 'quarter'] if tc == 'year_quarter' else ['year']
+                    if ts_bytype and ts_at_filter == "전체": cube_group.append('audit_report_type')
+                    cube_filter = {} if ts_at_filter == "전체" else {'audit_report_type': ts_at_filter}
+                    cube_td = cube_counts(cube_group, **cube_filter)
+                    if cube_td is not None and tc == 'year_quarter':
+                        cube_td['year_quarter'] = cube_td['year'] + '-Q' + cube_td['quarter']
+
                 if not ts_data.empty:
                     if ts_bytype and ts_at_filter == "전체":
-                        td = ts_data.groupby([tc,'audit_report_type']).size().reset_index(name='건수').sort_values(tc)
+                        if cube_td is not None:
+                            td = cube_td[[tc,'audit_report_type','건수']].sort_values(tc)
+                        else:
+                            td = ts_data.groupby([tc,'audit_report_type']).size().reset_index(name='건수').sort_values(tc)
                         td[tc] = td[tc].astype(str)
                         fig = px.line(td,x=tc,y='건수',color='audit_report_type',markers=True,
                                       color_discrete_sequence=px.colors.qualitative.Set2)
                     else:
-                        td = ts_data.groupby(tc).size().reset_index(name='건수').sort_values(tc)
+                        if cube_td is not None:
+                            td = cube_td[[tc,'건수']].sort_values(tc)
+                        else:
+                            td = ts_data.groupby(tc).size().reset_index(name='건수').sort_values(tc)
                         td[tc] = td[tc].astype(str)
                         fig = go.Figure(go.Scatter(x=td[tc],y=td['건수'],mode='lines+markers',
                                                    line=dict(color='#4ECDC4',width=3)))
@@ -1477,7 +1586,9 @@ elif menu == "감사 트렌드":
             with c3:
                 st.subheader("3. Top-N 랭킹")
                 tn = st.slider("상위 N",5,30,10,5,key="tn")
-                ork = fdf.groupby('agency_category').size().reset_index(name='건수').sort_values('건수',ascending=True).tail(tn)
+                ork = cube_counts(['agency_category']) if use_cube else None
+                if ork is None: ork = fdf.groupby('agency_category').size().reset_index(name='건수')
+                ork = ork.sort_values('건수',ascending=True).tail(tn)
                 fig3 = go.Figure(go.Bar(x=ork['건수'],y=ork['agency_category'],orientation='h',
                     text=ork['건수'],texttemplate='%{text:,}건',textposition='auto',
                     textfont=dict(size=10),
@@ -1486,7 +1597,9 @@ elif menu == "감사 트렌드":
                     height=max(350,tn*30),margin=dict(l=10,r=10,t=40,b=10))
                 st.plotly_chart(fig3,use_container_width=True)
                 st.markdown("---"); st.markdown("**감사 유형별 구성**")
-                trk = fdf.groupby('audit_report_type').size().reset_index(name='건수').sort_values('건수',ascending=False)
+                trk = cube_counts(['audit_report_type']) if use_cube else None
+                if trk is None: trk = fdf.groupby('audit_report_type').size().reset_index(name='건수')
+                trk = trk.sort_values('건수',ascending=False)
                 figd = go.Figure(go.Pie(labels=trk['audit_report_type'],values=trk['건수'],hole=0.45,
                     textinfo='label+percent',textposition='auto',
                     marker=dict(colors=px.colors.qualitative.Pastel)))
@@ -1497,7 +1610,10 @@ elif menu == "감사 트렌드":
                 st.subheader("4. 전년 대비(YoY) 증감")
                 ydf = fdf.dropna(subset=['year']).copy(); ydf['year']=ydf['year'].astype(int)
                 if not ydf.empty:
-                    yc = ydf.groupby('year').size().reset_index(name='건수').sort_values('year')
+                    yc = cube_counts(['year']) if use_cube else None
+                    if yc is not None: yc = yc[['year','건수']].astype({'year': int})
+                    else: yc = ydf.groupby('year').size().reset_index(name='건수')
+                    yc = yc.sort_values('year')
                     yc['prev']=yc['건수'].shift(1); yc['yoy']=((yc['건수']-yc['prev'])/yc['prev']*100).round(1)
                     ych = yc.dropna(subset=['yoy'])
                     if not ych.empty:
@@ -1552,7 +1668,9 @@ elif menu == "리스크 - 기관 벤치마크 (Macro view)":
         else:
             # org_category 필터 적용된 기관 목록
             filtered_orgs = available_orgs_bm
-            org_stats = df.groupby('agency_category').agg(cnt=('idx','count'),avg_sev=('disposition_severity','mean')).reset_index()
+            org_stats = cube_counts(['agency_category'])
+            if org_stats is not None: org_stats = org_stats.rename(columns={'건수':'cnt','처분강도':'avg_sev'})
+            else: org_stats = df.groupby('agency_category').agg(cnt=('idx','count'),avg_sev=('disposition_severity','mean')).reset_index()
             my_cnt = org_stats.loc[org_stats['agency_category']==my_org,'cnt'].iloc[0] if not org_stats[org_stats['agency_category']==my_org].empty else 0
             auto_peers = org_stats[
                 (org_stats['cnt']>=my_cnt*0.5)&(org_stats['cnt']<=my_cnt*1.5)
@@ -1574,11 +1692,13 @@ elif menu == "리스크 - 기관 벤치마크 (Macro view)":
                     return c,s,r
 
                 all_orgs = [my_org]+peer_orgs
-                rows=[]
-                for o in all_orgs:
-                    od=df[df['agency_category']==o]; c,s,r=calc_risk(od)
-                    rows.append({'agency_category':o,'지적건수':c,'처분강도':s,'반복비율':r})
-                sdf = pd.DataFrame(rows)
+                sdf = cube_org_risk(all_orgs)
+                if sdf is None:
+                    rows=[]
+                    for o in all_orgs:
+                        od=df[df['agency_category']==o]; c,s,r=calc_risk(od)
+                        rows.append({'agency_category':o,'지적건수':c,'처분강도':s,'반복비율':r})
+                    sdf = pd.DataFrame(rows)
                 for col in ['지적건수','처분강도','반복비율']:
                     mx=sdf[col].max(); sdf[f'{col}_n']=(sdf[col]/mx*100) if mx>0 else 0
                 sdf['리스크점수']=(sdf['지적건수_n']*0.4+sdf['처분강도_n']*0.4+sdf['반복비율_n']*0.2).round(1)
@@ -1644,14 +1764,16 @@ elif menu == "리스크 - 기관 벤치마크 (Macro view)":
                 st.divider()
 
                 st.subheader("3. 연도별 리스크 추이")
-                ys_rows=[]
-                for o in all_orgs:
-                    od=df[df['agency_category']==o]
-                    for yr in sorted(od['year'].dropna().unique()):
-                        yd=od[od['year']==yr]; c,s,r=calc_risk(yd)
-                        ys_rows.append({'agency_category':o,'year':int(yr),'지적건수':c,'처분강도':s,'반복비율':r})
-                if ys_rows:
-                    ysd=pd.DataFrame(ys_rows)
+                ysd = cube_org_risk(all_orgs, by_year=True)
+                if ysd is None:
+                    ys_rows=[]
+                    for o in all_orgs:
+                        od=df[df['agency_category']==o]
+                        for yr in sorted(od['year'].dropna().unique()):
+                            yd=od[od['year']==yr]; c,s,r=calc_risk(yd)
+                            ys_rows.append({'agency_category':o,'year':int(yr),'지적건수':c,'처분강도':s,'반복비율':r})
+                    ysd = pd.DataFrame(ys_rows)
+                if not ysd.empty:
                     for yr in ysd['year'].unique():
                         m=ysd['year']==yr
                         for col in ['지적건수','처분강도','반복비율']:
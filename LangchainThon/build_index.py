@@ -10,6 +10,7 @@ load_dotenv()
 
 DOCS_DIR = os.getenv("DOCS_DIR", "./data")
 CHROMA_DIR = os.getenv("CHROMA_DIR", "./chroma_db")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
 
 
 def load_all_pdfs(pdf_dir):
@@ -50,7 +51,7 @@ def main():
     chunks = build_chunks(docs)
     print(f"✂ chunks created: {len(chunks)}")
 
-    vs = get_vectorstore(CHROMA_DIR)
+    vs = get_vectorstore(CHROMA_DIR, embedding_cache_dir=EMBEDDING_CACHE_DIR)
 
     print("🧠 Saving embeddings to Chroma...")
     vs.add_documents(chunks)
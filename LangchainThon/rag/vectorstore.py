@@ -5,11 +5,23 @@ from langchain_openai import OpenAIEmbeddings
 from config import settings
 from typing import Optional
 
-def get_embeddings():
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+def get_embeddings(cache_dir: Optional[str] = None):
     # [확인] 팀에서 합의된 고성능 모델 사용 (Large 모델은 차원이 높아 검색이 정교함)
-    return OpenAIEmbeddings(model="text-embedding-3-large")
+    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    if not cache_dir:
+        return embeddings
+
+    # [추가] 인덱스 재생성 시 이미 임베딩한 청크는 디스크 캐시에서 읽음 (모델명 + 청크 내용 해시가 키)
+    from langchain.embeddings import CacheBackedEmbeddings
+    from langchain.storage import LocalFileStore
+
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings, LocalFileStore(cache_dir), namespace=EMBEDDING_MODEL
+    )
 
-def get_vectorstore(persist_directory: Optional[str] = None):
+def get_vectorstore(persist_directory: Optional[str] = None, embedding_cache_dir: Optional[str] = None):
     """
     [변경점 설명]
     build_index.py에서 get_vectorstore() 호출 시 인자를 주지 않아도 
@@ -18,7 +30,7 @@ def get_vectorstore(persist_directory: Optional[str] = None):
     # [추가/확인] 경로가 없을 경우 settings에서 가져오는 안전장치
     persist_directory = persist_directory or settings.chroma_dir
     
-    embeddings = get_embeddings()
+    embeddings = get_embeddings(embedding_cache_dir)
     
     # [참고] collection_name은 나중에 다른 성격의 데이터(예: 면접 꿀팁 등)와 
     # 구분하기 위해 현재 'accepted_coverletters'로 명확히 지정됨